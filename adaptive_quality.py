@@ -0,0 +1,122 @@
+# adaptive_quality.py - Trades tracking quality for speed to hold a target frame rate
+import os
+import time
+
+from camera import TARGET_FPS
+
+ADAPTIVE_ENABLED = os.environ.get("HAND_ADAPTIVE", "0") == "1"
+# Fraction of one core the whole process may use (e.g. 0.8); unset = no CPU limit
+CPU_BUDGET = float(os.environ["HAND_CPU_BUDGET"]) if os.environ.get("HAND_CPU_BUDGET") else None
+
+
+class QualityLevel:
+    def __init__(self, model_complexity, input_scale, max_num_hands, decimation):
+        self.model_complexity = model_complexity
+        self.input_scale = input_scale
+        self.max_num_hands = max_num_hands  # None = whatever the mode asked for
+        self.decimation = decimation  # Run inference on every Nth frame
+
+    def __repr__(self):
+        hands = "all" if self.max_num_hands is None else self.max_num_hands
+        return (f"complexity {self.model_complexity}, scale {self.input_scale:g}, "
+                f"hands {hands}, every {self.decimation} frame(s)")
+
+
+# Best quality first; each step is cheaper than the one before
+LEVELS = [
+    QualityLevel(1, 1.0, None, 1),
+    QualityLevel(0, 1.0, None, 1),
+    QualityLevel(0, 0.75, None, 1),
+    QualityLevel(0, 0.75, 1, 1),
+    QualityLevel(0, 0.5, 1, 1),
+    QualityLevel(0, 0.5, 1, 2),
+    QualityLevel(0, 0.5, 1, 3),
+]
+
+
+class QualityController:
+    """Moves between quality levels based on measured frame time and CPU use
+
+    Hysteresis keeps it from oscillating: it steps down only after the budget
+    has been missed for downgrade_after frames in a row, and steps back up
+    only after upgrade_after frames with comfortable headroom. Levels that
+    track a single hand are skipped while two hands have been seen recently.
+    """
+
+    def __init__(self, target_fps=TARGET_FPS, cpu_budget=CPU_BUDGET, max_num_hands=1,
+                 downgrade_after=15, upgrade_after=90, headroom=0.7, alpha=0.1):
+        self.frame_budget = 1.0 / target_fps
+        self.cpu_budget = cpu_budget
+        self.max_num_hands = max_num_hands
+        self.downgrade_after = downgrade_after
+        self.upgrade_after = upgrade_after
+        self.headroom = headroom
+        self.alpha = alpha
+
+        self.level_index = 0
+        self.frame_time = None
+        self.cpu_usage = 0.0
+        self.over_count = 0
+        self.under_count = 0
+        self.last_multi_hand = 0.0
+
+        self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+
+    @property
+    def level(self):
+        return LEVELS[self.level_index]
+
+    def hands_for(self, level):
+        if level.max_num_hands is None:
+            return self.max_num_hands
+        return min(level.max_num_hands, self.max_num_hands)
+
+    def allowed(self, index):
+        # Keep tracking both hands for a few seconds after two were in view
+        level = LEVELS[index]
+        two_hands_recently = time.perf_counter() - self.last_multi_hand < 3.0
+        return not (two_hands_recently and self.hands_for(level) < self.max_num_hands)
+
+    def record(self, frame_time, hands_seen):
+        """Feed one frame's processing time; returns the new level if it changed, else None"""
+        now = time.perf_counter()
+        if hands_seen > 1:
+            self.last_multi_hand = now
+
+        self.frame_time = frame_time if self.frame_time is None else (
+            self.alpha * frame_time + (1 - self.alpha) * self.frame_time)
+
+        wall = now - self.last_wall
+        if wall >= 0.5:
+            cpu = time.process_time()
+            self.cpu_usage = (cpu - self.last_cpu) / wall
+            self.last_wall, self.last_cpu = now, cpu
+
+        # Decimated levels only pay for inference on some frames
+        effective = self.frame_time / self.level.decimation
+        over = effective > self.frame_budget or (self.cpu_budget is not None and self.cpu_usage > self.cpu_budget)
+        under = effective < self.frame_budget * self.headroom and (
+            self.cpu_budget is None or self.cpu_usage < self.cpu_budget * self.headroom)
+
+        self.over_count = self.over_count + 1 if over else 0
+        self.under_count = self.under_count + 1 if under else 0
+
+        new_index = self.level_index
+        if self.over_count >= self.downgrade_after:
+            new_index = self.level_index + 1
+            while new_index < len(LEVELS) and not self.allowed(new_index):
+                new_index += 1
+        elif self.under_count >= self.upgrade_after:
+            new_index = self.level_index - 1
+
+        if 0 <= new_index < len(LEVELS) and new_index != self.level_index:
+            direction = "⬇️" if new_index > self.level_index else "⬆️"
+            self.level_index = new_index
+            self.over_count = self.under_count = 0
+            # Start the new level's estimate fresh
+            self.frame_time = None
+            print(f"{direction}  Quality: {self.level} "
+                  f"(cpu {self.cpu_usage:.0%})")
+            return self.level
+        return None
@@ -0,0 +1,65 @@
+# benchmark.py - End-to-end FPS and latency of a mode on recorded or synthetic video
+import time
+import argparse
+
+from headless import MODES, configure, create_mode, drive
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_benchmark(mode_name, source, frames, pacing, landmarks=None):
+    """Drive a mode's update_frame directly and time every call
+
+    Runs headless: offscreen Qt and recorded instead of real mouse/keyboard
+    output. With landmarks, a recorded session replaces MediaPipe so the
+    mode's own per-frame cost is measured.
+    """
+    configure(source, landmarks, pacing=pacing)
+    app, mode = create_mode(mode_name)
+
+    start = time.perf_counter()
+    latencies = drive(app, mode, frames)
+    elapsed = time.perf_counter() - start
+
+    mode.cleanup()
+    return {
+        "mode": mode_name,
+        "source": source,
+        "pacing": pacing,
+        "frames": len(latencies),
+        "fps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "max_ms": max(latencies) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a mode end to end, MediaPipe included")
+    parser.add_argument("mode", choices=sorted(MODES))
+    parser.add_argument("--source", default="synthetic", help="camera[:N], file:PATH, dir:PATH or synthetic[:WxH]")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--pacing", choices=["fast", "realtime"], default="fast",
+                        help="fast = as fast as possible, realtime = paced at the source FPS")
+    parser.add_argument("--landmarks", help="recorded session to replay instead of running MediaPipe")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.mode, args.source, args.frames, args.pacing, args.landmarks)
+    print("\n" + "=" * 60)
+    print(f"📈 {result['mode']} mode on {result['source']} ({result['pacing']})")
+    print("=" * 60)
+    print(f"Frames:  {result['frames']}")
+    print(f"FPS:     {result['fps']:.1f}")
+    print(f"Latency: mean {result['mean_ms']:.1f} ms | p50 {result['p50_ms']:.1f} ms | "
+          f"p95 {result['p95_ms']:.1f} ms | max {result['max_ms']:.1f} ms")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
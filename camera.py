@@ -0,0 +1,191 @@
+# camera.py - Capture profile negotiation shared by the menu and every mode
+import os
+import sys
+import json
+import time
+
+import cv2
+
+CAMERA_INDEX = int(os.environ.get("HAND_CAMERA", "0"))
+TARGET_FPS = float(os.environ.get("HAND_TARGET_FPS", "30"))
+FORCED_PROFILE = os.environ.get("HAND_CAPTURE_PROFILE")
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "hand_control", "capture_profiles.json")
+# Seconds a cached profile is trusted before the camera is probed again (default a week)
+CACHE_TTL = float(os.environ.get("HAND_PROFILE_TTL", str(7 * 24 * 3600)))
+
+
+class CaptureProfile:
+    """A pixel format, resolution and frame rate to request from the driver"""
+
+    def __init__(self, name, fourcc, width, height, fps):
+        self.name = name
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    def __repr__(self):
+        return f"{self.name} ({self.fourcc} {self.width}x{self.height}@{self.fps})"
+
+
+# Ordered from lowest to highest expected latency. Compressed MJPG is what
+# lets most USB webcams reach high frame rates; YUYV saves decode time but is
+# limited by USB bandwidth.
+PROFILES = [
+    CaptureProfile("mjpg-480p120", "MJPG", 640, 480, 120),
+    CaptureProfile("mjpg-480p90", "MJPG", 640, 480, 90),
+    CaptureProfile("mjpg-480p60", "MJPG", 640, 480, 60),
+    CaptureProfile("yuyv-480p60", "YUYV", 640, 480, 60),
+    CaptureProfile("mjpg-720p60", "MJPG", 1280, 720, 60),
+    CaptureProfile("mjpg-480p30", "MJPG", 640, 480, 30),
+    CaptureProfile("yuyv-480p30", "YUYV", 640, 480, 30),
+    CaptureProfile("mjpg-720p30", "MJPG", 1280, 720, 30),
+    CaptureProfile("yuyv-240p30", "YUYV", 320, 240, 30),
+]
+
+
+def default_backend():
+    return cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+
+
+def fourcc_to_str(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def apply_profile(cap, profile):
+    """Request a profile and return what the driver actually granted"""
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile.fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile.height)
+    cap.set(cv2.CAP_PROP_FPS, profile.fps)
+    # Keep at most one frame queued in the driver so we always read the newest
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return granted(cap)
+
+
+def granted(cap):
+    return {
+        "fourcc": fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffersize": cap.get(cv2.CAP_PROP_BUFFERSIZE),
+    }
+
+
+def measure_fps(cap, frames=10):
+    """Time a burst of reads; drivers often report an FPS they don't deliver"""
+    cap.read()  # The first read includes stream start-up
+    start = time.time()
+    read = 0
+    for _ in range(frames):
+        ret, _ = cap.read()
+        if ret:
+            read += 1
+    elapsed = time.time() - start
+    return read / elapsed if elapsed > 0 and read else 0.0
+
+
+def meets(profile, result, target_fps):
+    return (
+        result["fourcc"] == profile.fourcc
+        and result["width"] >= profile.width
+        and result["height"] >= profile.height
+        and result["fps"] >= target_fps
+    )
+
+
+def load_cache():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        with open(CACHE_PATH, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"⚠️  Could not cache capture profile: {e}")
+
+
+def negotiate(cap, target_fps=TARGET_FPS, verify=True):
+    """Pick the lowest-latency profile the camera grants at target_fps or better
+
+    Returns (profile, result, reached). When every granted profile delivers
+    fewer frames than asked for (long exposures in a dim room, say), the one
+    measured fastest comes back with reached False; profile is None only if
+    the driver granted none of them.
+    """
+    best, best_result = None, None
+    for profile in PROFILES:
+        if profile.fps < target_fps:
+            continue
+        result = apply_profile(cap, profile)
+        if not meets(profile, result, target_fps):
+            continue
+        if verify:
+            result["measured_fps"] = measure_fps(cap)
+            if result["measured_fps"] < target_fps * 0.9:
+                if best is None or result["measured_fps"] > best_result["measured_fps"]:
+                    best, best_result = profile, result
+                continue
+        return profile, result, True
+    return best, best_result or granted(cap), False
+
+
+def open_camera(index=None, target_fps=None):
+    """Open the webcam with the best capture profile for this machine
+
+    The negotiated profile is cached per camera index so later launches
+    apply it directly instead of probing again - also when it falls short of
+    the target, so a dim room doesn't mean a full probe on every launch.
+    Entries older than CACHE_TTL are probed again.
+    """
+    index = CAMERA_INDEX if index is None else index
+    target_fps = TARGET_FPS if target_fps is None else target_fps
+
+    cap = cv2.VideoCapture(index, default_backend())
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        print(f"❌ Could not open camera {index}")
+        return cap
+
+    profiles = {profile.name: profile for profile in PROFILES}
+    cache = load_cache()
+    cache_key = f"{index}@{target_fps:g}"
+    entry = cache.get(cache_key)
+    if isinstance(entry, str):
+        # Written before entries had a timestamp; probe again
+        entry = None
+    chosen = FORCED_PROFILE
+    if chosen is None and entry and time.time() - entry.get("time", 0) < CACHE_TTL:
+        chosen = entry.get("profile")
+
+    if chosen in profiles:
+        profile = profiles[chosen]
+        result = apply_profile(cap, profile)
+        if FORCED_PROFILE or meets(profile, result, target_fps):
+            print(f"📷 Camera {index}: {profile} → granted {result['fourcc']} {result['width']}x{result['height']}@{result['fps']:g}")
+            return cap
+
+    profile, result, reached = negotiate(cap, target_fps)
+    if profile is None:
+        # Nothing was granted - keep a sane low-latency default
+        profile = profiles["mjpg-480p30"]
+        result = apply_profile(cap, profile)
+        print(f"⚠️  Camera {index} cannot reach {target_fps:g} fps, using {profile}")
+    elif not reached:
+        measured = result["measured_fps"]
+        result = apply_profile(cap, profile)
+        print(f"⚠️  Camera {index} delivers at most {measured:.1f} of {target_fps:g} fps, using {profile}")
+    cache[cache_key] = {"profile": profile.name, "reached": reached, "time": time.time()}
+    save_cache(cache)
+
+    print(f"📷 Camera {index}: {profile} → granted {result['fourcc']} {result['width']}x{result['height']}@{result['fps']:g}")
+    return cap
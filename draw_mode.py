@@ -2,24 +2,23 @@
 import sys
 import cv2
 import numpy as np
-import mediapipe as mp
 from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QtGui import QPainter, QPen, QImage, QCursor, QColor, QFont
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QPainter, QPen, QImage
+from PyQt5.QtCore import Qt, QTimer, QRect
 import os
 from datetime import datetime
-from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-from PIL import Image
-import pyautogui
 import time
+from ocr_server import OCRClient, AUTOSTART as OCR_AUTOSTART
+from ocr_cache import OCRCache
+from recognizer import RecognizerRouter, TesseractRecognizer, TrOCRRecognizer
+from drawing_store import DrawingStore
+from startup import Initializer, open_tracking
+from temporal import TemporalRecognizer
+from gestures import count_extended_fingers, is_fist, is_rock_sign
+from scheduler import ActionScheduler, paint_status
+from overlay import CachedPanel
+from input_backend import open_backend
 
-mp_hands = mp.solutions.hands
-
-# Load TrOCR model for handwriting recognition
-print("Loading TrOCR model...")
-processor = TrOCRProcessor.from_pretrained('microsoft/trocr-base-handwritten')
-model = VisionEncoderDecoderModel.from_pretrained('microsoft/trocr-base-handwritten')
-print("✅ TrOCR model loaded!")
 
 class DrawingMode(QWidget):
     def __init__(self):
@@ -32,25 +31,45 @@ class DrawingMode(QWidget):
         self.canvas = QImage(self.size(), QImage.Format_RGBA8888)
         self.canvas.fill(Qt.transparent)
 
-        self.cap = cv2.VideoCapture(0)
-        self.hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
-
         # Drawing settings
         self.smoothing_factor = 0.5
         self.prev = None
         self.drawing = False
         self.last_smooth_pos = None
-        self.gesture_cooldown = 0
+        self.gestures = TemporalRecognizer(hold_overrides={"quit": 400, "clear": 400})
         self.menu_visible = True  # Track menu visibility
         
         self.brush_size = 5
         self.min_movement = 2
         self.stroke_count = 0
         self.max_strokes_before_optimize = 500
-
-        # Configure pyautogui for typing
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.05  # Small delay between keystrokes for reliability
+        self.strokes = []  # Point lists kept as metadata for the drawing history
+
+        # Handwriting recognition runs in the shared OCR service so the
+        # model stays loaded between launches of this mode
+        self.ocr = OCRClient()
+        self.ocr_cache = OCRCache(capacity=256, disk_dir="saves/ocr_cache")
+
+        # Tesseract answers first; TrOCR is used when it is unsure and time allows
+        self.recognizer = RecognizerRouter(
+            TesseractRecognizer(), TrOCRRecognizer(self.ocr), stats_path="saves/recognizer_stats.json"
+        )
+        self.ocr_budget_ms = 1500
+
+        # Load OCR while the camera opens and the hand model warms up
+        init = Initializer()
+        init.start("tesseract", self.recognizer.fast.load)
+        if OCR_AUTOSTART:
+            init.start("trocr", self.recognizer.accurate.load)
+        init.start("input", open_backend)
+        self.cap, self.tracker, _ = open_tracking(init, classify=self.classify_gesture, flow_points=(8, 4), max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        self.input = init.result("input")
+
+        # Saved drawings are written and indexed off the GUI thread
+        self.store = DrawingStore("saves")
+        self.scheduler = ActionScheduler(self)
+        self.panel = CachedPanel(550, 120)
+        self.painted_panel = None
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
@@ -79,80 +98,6 @@ class DrawingMode(QWidget):
     def distance(self, pos1, pos2):
         return ((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)**0.5
 
-    def count_extended_fingers(self, landmarks, frame_shape):
-        fingers = []
-        
-        # Thumb
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        if thumb_tip.x < thumb_ip.x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Other fingers
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y < pip.y:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        return sum(fingers)
-
-    def is_fist(self, landmarks, frame_shape):
-        """Check if hand is making a fist (all fingers closed)"""
-        fingers = []
-        
-        # Thumb - check if thumb is across palm
-        thumb_tip = landmarks.landmark[4]
-        thumb_mcp = landmarks.landmark[2]
-        if thumb_tip.x > thumb_mcp.x:  # Thumb across palm
-            fingers.append(0)
-        else:
-            fingers.append(1)
-        
-        # Other fingers - check if tips are below PIP joints
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y > pip.y:  # Finger tip below PIP joint (closed)
-                fingers.append(0)
-            else:
-                fingers.append(1)
-        
-        # Fist if no fingers are extended
-        return sum(fingers) == 0
-
-    def is_rock_sign(self, landmarks, frame_shape):
-        """Check for rock sign 🤘 (index + pinky extended)"""
-        fingers = []
-        
-        # Check thumb
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        fingers.append(1 if thumb_tip.x < thumb_ip.x else 0)
-        
-        # Check other fingers
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            fingers.append(1 if tip.y < pip.y else 0)
-        
-        # Index and pinky extended, middle and ring closed
-        # [thumb, index, middle, ring, pinky]
-        return fingers[1] == 1 and fingers[2] == 0 and fingers[3] == 0 and fingers[4] == 1
-
     def toggle_menu_visibility(self):
         """Toggle the info panel visibility"""
         self.menu_visible = not self.menu_visible
@@ -160,41 +105,36 @@ class DrawingMode(QWidget):
         status = "visible" if self.menu_visible else "hidden"
         print(f"📋 Menu {status}")
 
-    def check_gestures(self, landmarks, frame_shape):
-        extended_fingers = self.count_extended_fingers(landmarks, frame_shape)
-        is_fist_gesture = self.is_fist(landmarks, frame_shape)
-        
-        self.gesture_cooldown = max(0, self.gesture_cooldown - 1)
+    def classify_gesture(self, landmarks, frame_shape):
+        """Gesture shown in a single frame (stateless, safe off the GUI thread)"""
+        extended_fingers = count_extended_fingers(landmarks)
         
-        if self.gesture_cooldown > 0:
-            return None
-            
         gesture = None
         
         if extended_fingers == 3:
             gesture = "save"
-        elif is_fist_gesture:
+        elif is_fist(landmarks):
             gesture = "clear"
-        elif self.is_rock_sign(landmarks, frame_shape):
+        elif is_rock_sign(landmarks):
             gesture = "toggle_menu"
         elif extended_fingers == 4:
             gesture = "quit"
-            
-        if gesture:
-            self.gesture_cooldown = 30
-            
         return gesture
 
+    def check_gestures(self, gesture):
+        return self.gestures.update(gesture)
+
     def clear_canvas(self):
         self.canvas.fill(Qt.transparent)
         self.update()
         self.prev = None
         self.last_smooth_pos = None
         self.stroke_count = 0
+        self.strokes = []
         print("🎨 Canvas cleared!")
 
     def type_text(self, text):
-        """Type out text character by character using pyautogui"""
+        """Type out text character by character through the input backend"""
         if not text or text.isspace():
             print("❌ No text to type")
             return
@@ -206,36 +146,27 @@ class DrawingMode(QWidget):
         
         # Type each character with small delays
         for char in cleaned_text:
-            if char == ' ':
-                pyautogui.press('space')
-            elif char == '\n':
-                pyautogui.press('enter')
-            elif char == '.':
-                pyautogui.press('.')
-            elif char == ',':
-                pyautogui.press(',')
-            elif char == '!':
-                pyautogui.press('!')
-            elif char == '?':
-                pyautogui.press('?')
-            else:
-                # For letters and numbers, use write (handles shift automatically)
-                pyautogui.write(char)
-            
+            self.input.press(char)
+
             # Small delay between characters for reliability
             time.sleep(0.05)
         
         print("✅ Finished typing!")
 
+    def canvas_to_bgr(self):
+        """Copy the canvas into a BGR array without going through a file"""
+        w, h = self.canvas.width(), self.canvas.height()
+        ptr = self.canvas.constBits()
+        ptr.setsize(self.canvas.byteCount())
+        rgba = np.frombuffer(ptr, np.uint8).reshape(h, self.canvas.bytesPerLine())[:, :w * 4].reshape(h, w, 4)
+        return cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR)
+
     def save_image(self):
         try:
             if not os.path.exists("saves"):
                 os.makedirs("saves")
-            filename = f"saves/drawing.png"
-            
-            self.canvas.save(filename, "PNG")
-            
-            img = cv2.imread(filename)
+
+            img = self.canvas_to_bgr()
             hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
             lower1 = np.array([0, 120, 70])
             upper1 = np.array([10, 255, 255])
@@ -250,48 +181,70 @@ class DrawingMode(QWidget):
             kernel = np.ones((5, 5), np.uint8)
             dilated = cv2.dilate(letter, kernel, iterations=3)
             final_img = cv2.bitwise_not(dilated)
-            
-            cv2.imwrite(filename, final_img)
-            print(f"✅ Saved: {filename}")
-            
-            print("🔍 Running handwriting recognition...")
-            image = Image.open(filename).convert("RGB")
-            pixel_values = processor(images=image, return_tensors="pt").pixel_values
-            generated_ids = model.generate(pixel_values)
-            generated_text = processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-            
-            print(f"📝 Recognized text: '{generated_text}'")
-            
-            # Type the recognized text
-            if generated_text.strip():
-                print("⌨️  Typing recognized text...")
-                self.type_text(generated_text)
-            else:
-                print("❌ No text recognized to type")
-            
-            print("\n")
+
+            # Save first so the drawing is kept even if recognition fails
+            ticket = self.store.submit(final_img, strokes=self.strokes)
+
+            # OCR and typing are slow; run them off the GUI thread so tracking keeps going
+            self.scheduler.run_in_background("ocr", "Recognizing & typing", self.recognize_and_type, final_img, ticket)
             
         except Exception as e:
             print(f"❌ Error: {e}")
         
         self.clear_canvas()
 
+    def recognize_and_type(self, final_img, ticket):
+        """Runs on the scheduler's worker thread, one drawing at a time"""
+        engine = "cache"
+        generated_text = self.ocr_cache.get(final_img)
+        if generated_text is None:
+            print("🔍 Running handwriting recognition...")
+            generated_text, engine = self.recognizer.recognize(final_img, budget_ms=self.ocr_budget_ms)
+            self.ocr_cache.put(final_img, generated_text)
+            print(f"🧠 Used {engine} ({self.recognizer.summary()})")
+        else:
+            print("⚡ Recognized from cache")
+        stats = self.ocr_cache.stats()
+        print(f"📊 OCR cache: {stats['hits'] + stats['near_hits'] + stats['disk_hits']} hits, {stats['misses']} misses")
+        
+        print(f"📝 Recognized text: '{generated_text}'")
+        self.store.set_text(ticket, generated_text, engine)
+        
+        # Type the recognized text
+        if generated_text.strip():
+            print("⌨️  Typing recognized text...")
+            self.type_text(generated_text)
+        else:
+            print("❌ No text recognized to type")
+        
+        print("\n")
+        return generated_text
+
     def quit_mode(self):
         print("👋 Returning to menu...")
         self.cleanup()
         QApplication.quit()
 
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            return
+        for frame_shape, results, gesture in self.tracker.poll():
+            if self.handle_frame(frame_shape, results, gesture):
+                return
 
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
+        # Strokes repaint their own area as they are drawn; the panel only
+        # needs a repaint when its status or the background work changes
+        rows = len(self.scheduler.status_lines())
+        panel_state = (self.panel_status(), rows, self.scheduler.busy())
+        if panel_state != self.painted_panel or rows:
+            if self.painted_panel is not None and rows < self.painted_panel[1]:
+                self.update()  # Panel shrank; clear what it used to cover
+            else:
+                self.update(self.panel.rect(20, 20, rows))
+            self.painted_panel = panel_state
 
+    def handle_frame(self, frame_shape, results, gesture):
+        """React to one analyzed frame; returns True once the mode has quit"""
         if results.multi_hand_landmarks:
-            h, w, _ = frame.shape
+            h, w, _ = frame_shape
             lm = results.multi_hand_landmarks[0].landmark
 
             ix, iy = int(lm[8].x * w), int(lm[8].y * h)
@@ -299,7 +252,7 @@ class DrawingMode(QWidget):
             dist = ((ix - tx)**2 + (iy - ty)**2)**0.5
 
             # Check gestures
-            gesture = self.check_gestures(results.multi_hand_landmarks[0], frame.shape)
+            gesture = self.check_gestures(gesture)
             if gesture:
                 if gesture == "save":
                     self.save_image()
@@ -309,10 +262,10 @@ class DrawingMode(QWidget):
                     self.toggle_menu_visibility()
                 elif gesture == "quit":
                     self.quit_mode()
-                    return
+                    return True
                 self.prev = None
                 self.last_smooth_pos = None
-                return
+                return False
 
             # Drawing logic
             prev_drawing_state = self.drawing
@@ -330,7 +283,7 @@ class DrawingMode(QWidget):
             sy = int(iy * (screen_h / h))
 
             smooth_x, smooth_y = self.smooth_position(sx, sy)
-            QCursor.setPos(smooth_x, smooth_y)
+            self.input.move_to(smooth_x, smooth_y)
 
             if self.drawing:
                 current_pos = (smooth_x, smooth_y)
@@ -348,8 +301,7 @@ class DrawingMode(QWidget):
             self.prev = None
             self.last_smooth_pos = None
             self.drawing = False
-
-        self.update()
+        return False
 
     def draw_line(self, x1, y1, x2, y2):
         painter = QPainter(self.canvas)
@@ -360,58 +312,52 @@ class DrawingMode(QWidget):
         painter.setPen(pen)
         painter.drawLine(x1, y1, x2, y2)
         painter.end()
+
+        # Repaint just the segment, padded by the brush width
+        pad = self.brush_size + 2
+        self.update(QRect(min(x1, x2) - pad, min(y1, y2) - pad, abs(x2 - x1) + 2 * pad, abs(y2 - y1) + 2 * pad))
+
+        if not self.strokes or self.strokes[-1][-1] != [x1, y1]:
+            self.strokes.append([[x1, y1]])
+        self.strokes[-1].append([x2, y2])
         
         self.stroke_count += 1
         if self.stroke_count >= self.max_strokes_before_optimize:
             print("⚠️  Canvas getting heavy - consider clearing")
             self.stroke_count = 0
 
+    def panel_status(self):
+        return "Drawing" if self.drawing else "Paused"
+
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.drawImage(0, 0, self.canvas)
+        # Only copy the part of the canvas being repainted
+        area = event.rect()
+        painter.drawImage(area, self.canvas, area)
         
         # Only draw menu if visible
         if not self.menu_visible:
             return
         
-        # Draw compact info panel with white opaque background
-        panel_width = 550
-        panel_height = 120
+        # Compact info panel from cache, with background work drawn live below it
+        status_lines = self.scheduler.status_lines()
         margin = 20
-        
-        # Semi-transparent white background
-        painter.setBrush(QColor(255, 255, 255, 230))  # White with opacity
-        painter.setPen(QPen(QColor(0, 0, 0, 150), 2))
-        painter.drawRoundedRect(margin, margin, panel_width, panel_height, 10, 10)
-        
-        # Title and status
-        font = QFont('Arial', 12, QFont.Bold)
-        painter.setFont(font)
-        painter.setPen(QPen(Qt.black))
-        
-        status = "Drawing" if self.drawing else "Paused"
-        title = f"✍️ DRAWING MODE - Status: {status}"
-        painter.drawText(margin + 10, margin + 25, title)
-        
-        # Instructions
-        small_font = QFont('Arial', 11)
-        painter.setFont(small_font)
-        
-        y_pos = margin + 50
-        instructions = [
+        title = f"✍️ DRAWING MODE - Status: {self.panel_status()}"
+        y_pos = self.panel.paint(painter, margin, margin, title, [
             "🤟 3 fingers = Save & Type  |  ✊ Fist = Clear canvas",
             "🤘 Rock sign = Toggle menu  |  🖖 4 fingers = Menu"
-        ]
-        
-        for instruction in instructions:
-            painter.drawText(margin + 10, y_pos, instruction)
-            y_pos += 30
+        ], extra_rows=len(status_lines))
+        painter.setFont(self.panel.text_font)
+        paint_status(painter, status_lines, margin + 10, y_pos, self.panel.width - 20)
 
     def cleanup(self):
+        # Let a drawing that is still being typed finish before the store closes
+        self.scheduler.shutdown(wait=True)
+        self.store.close()
+        self.input.close()
+        self.tracker.close()
         if self.cap:
             self.cap.release()
-        if self.hands:
-            self.hands.close()
 
     def closeEvent(self, event):
         self.cleanup()
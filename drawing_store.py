@@ -0,0 +1,266 @@
+# drawing_store.py - Write-behind, content-addressed history of saved drawings
+import os
+import sys
+import csv
+import json
+import time
+import queue
+import sqlite3
+import hashlib
+import threading
+
+import cv2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drawings (
+    id INTEGER PRIMARY KEY,
+    sha TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    text TEXT,
+    engine TEXT,
+    stroke_count INTEGER,
+    strokes TEXT,
+    width INTEGER,
+    height INTEGER
+);
+CREATE INDEX IF NOT EXISTS drawings_created_at ON drawings (created_at);
+CREATE INDEX IF NOT EXISTS drawings_sha ON drawings (sha);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS drawings_fts USING fts5 (text, content='drawings', content_rowid='id');
+"""
+
+EXPORT_FIELDS = ["id", "sha", "path", "created_at", "text", "engine", "stroke_count", "width", "height"]
+
+
+def fts_query(text):
+    """Quote each word as an FTS5 string, so characters like - * " ( : are searched for, not parsed"""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class DrawingStore:
+    """Saves drawings on a background thread and indexes them in SQLite
+
+    Images are stored once under objects/<sha[:2]>/<sha>.png, so saving the
+    same drawing twice costs one row and no extra file. The GUI thread only
+    enqueues work; encoding, hashing, file writes and inserts all happen on
+    the writer thread. A drawing is saved before it is recognized, and its
+    text is filled in with set_text() once OCR is done.
+    """
+
+    def __init__(self, root="saves", index_name="drawings.sqlite"):
+        self.root = root
+        self.index_path = os.path.join(root, index_name)
+        self.queue = queue.Queue()
+        self.fts = False
+        self.next_ticket = 0
+        self.rows = {}  # ticket -> (row id, text indexed for it); only touched by the writer thread
+
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+        # Create the schema up front so readers never see a missing table
+        conn = self.connect()
+        conn.close()
+
+        self.writer = threading.Thread(target=self.write_loop, name="drawing-store", daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 - searches fall back to LIKE
+            self.fts = False
+        return conn
+
+    def submit(self, image, text=None, engine=None, strokes=None):
+        """Queue a grayscale or BGR image array for saving; returns a ticket for set_text()"""
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.queue.put({
+            "ticket": ticket,
+            "image": image,
+            "text": text,
+            "engine": engine,
+            "strokes": strokes or [],
+            "created_at": time.time(),
+        })
+        return ticket
+
+    def set_text(self, ticket, text, engine=None):
+        """Record the recognized text of a drawing submitted earlier"""
+        self.queue.put({"update": ticket, "text": text, "engine": engine})
+
+    def write_loop(self):
+        conn = self.connect()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            try:
+                if "update" in item:
+                    self.update(conn, item)
+                else:
+                    self.write(conn, item)
+            except Exception as e:
+                print(f"❌ Could not save drawing: {e}")
+            finally:
+                self.queue.task_done()
+        conn.close()
+
+    def write(self, conn, item):
+        ok, png = cv2.imencode(".png", item["image"])
+        if not ok:
+            raise ValueError("PNG encoding failed")
+        data = png.tobytes()
+        sha = hashlib.sha256(data).hexdigest()
+
+        path = os.path.join(self.root, "objects", sha[:2], f"{sha}.png")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        height, width = item["image"].shape[:2]
+        strokes = item["strokes"]
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO drawings (sha, path, created_at, text, engine, stroke_count, strokes, width, height) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha, path, item["created_at"], item["text"], item["engine"], len(strokes), json.dumps(strokes), width, height),
+            )
+            if self.fts and item["text"]:
+                conn.execute("INSERT INTO drawings_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, item["text"]))
+        self.rows[item["ticket"]] = (cursor.lastrowid, item["text"])
+        print(f"✅ Saved: {path}")
+
+    def update(self, conn, item):
+        if item["update"] not in self.rows:
+            return  # The drawing itself could not be saved
+        row_id, old_text = self.rows.pop(item["update"])
+        with conn:
+            conn.execute("UPDATE drawings SET text = ?, engine = ? WHERE id = ?", (item["text"], item["engine"], row_id))
+            if self.fts:
+                # External-content FTS tables need the old text to remove an entry
+                if old_text:
+                    conn.execute("INSERT INTO drawings_fts (drawings_fts, rowid, text) VALUES ('delete', ?, ?)", (row_id, old_text))
+                if item["text"]:
+                    conn.execute("INSERT INTO drawings_fts (rowid, text) VALUES (?, ?)", (row_id, item["text"]))
+
+    def flush(self):
+        """Block until every queued drawing has been written"""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+    def search(self, query, limit=50):
+        """Drawings whose recognized text matches query (every word, with FTS5), newest first"""
+        if not query.split():
+            return self.recent(limit)
+        conn = self.connect()
+        try:
+            rows = None
+            if self.fts:
+                try:
+                    rows = conn.execute(
+                        "SELECT d.* FROM drawings_fts f JOIN drawings d ON d.id = f.rowid "
+                        "WHERE drawings_fts MATCH ? ORDER BY d.created_at DESC LIMIT ?",
+                        (fts_query(query), limit),
+                    ).fetchall()
+                except sqlite3.OperationalError as e:
+                    print(f"⚠️  Full-text search failed ({e}), falling back to LIKE")
+            if rows is None:
+                rows = conn.execute(
+                    "SELECT * FROM drawings WHERE text LIKE ? ORDER BY created_at DESC LIMIT ?",
+                    (f"%{query}%", limit),
+                ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def recent(self, limit=50):
+        conn = self.connect()
+        try:
+            rows = conn.execute("SELECT * FROM drawings ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
+    def export(self, out, fmt="jsonl", include_strokes=False):
+        """Stream the whole index to a file object; returns the number of rows written"""
+        conn = self.connect()
+        fields = EXPORT_FIELDS + (["strokes"] if include_strokes else [])
+        count = 0
+        try:
+            rows = conn.execute(f"SELECT {', '.join(fields)} FROM drawings ORDER BY id")
+            if fmt == "csv":
+                writer = csv.writer(out)
+                writer.writerow(fields)
+                for row in rows:
+                    writer.writerow(list(row))
+                    count += 1
+            else:
+                for row in rows:
+                    record = dict(row)
+                    if include_strokes:
+                        record["strokes"] = json.loads(record["strokes"] or "[]")
+                    out.write(json.dumps(record) + "\n")
+                    count += 1
+        finally:
+            conn.close()
+        return count
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search and export the saved drawing history")
+    parser.add_argument("--root", default="saves", help="directory holding drawings.sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    search = sub.add_parser("search", help="find drawings by recognized text")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=50)
+
+    recent = sub.add_parser("recent", help="list the newest drawings")
+    recent.add_argument("--limit", type=int, default=20)
+
+    export = sub.add_parser("export", help="dump the index as JSON lines or CSV (e.g. as OCR benchmark input)")
+    export.add_argument("output", help="output file, or - for stdout")
+    export.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    export.add_argument("--strokes", action="store_true", help="include stroke coordinates")
+
+    args = parser.parse_args()
+    store = DrawingStore(args.root)
+
+    if args.command == "export":
+        if args.output == "-":
+            count = store.export(sys.stdout, args.format, args.strokes)
+        else:
+            with open(args.output, "w", newline="") as f:
+                count = store.export(f, args.format, args.strokes)
+        print(f"📦 Exported {count} drawings", file=sys.stderr)
+    else:
+        rows = store.search(args.query, args.limit) if args.command == "search" else store.recent(args.limit)
+        for row in rows:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["created_at"]))
+            print(f"{when}  {row['text']!r:30}  {row['path']}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 # gesture_mode.py - Gesture mode for Windows shortcuts
 import sys
-import cv2
-import numpy as np
-import mediapipe as mp
 from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QtGui import QPainter, QPen, QColor, QFont
+from PyQt5.QtGui import QPainter
 from PyQt5.QtCore import Qt, QTimer
-import pyautogui
 import time
 import os
-import subprocess
+from startup import Initializer, open_tracking
+from temporal import TemporalRecognizer
+from scheduler import ActionScheduler, paint_status
+from overlay import CachedPanel
+from input_backend import open_backend
+from gesture_model import load_model
+from gestures import GESTURES, classify_hand
+from motion import MotionGestures
+
+# Seconds between a clap and the shutdown command; showing five fingers meanwhile cancels it
+SHUTDOWN_COUNTDOWN = 5
 
-mp_hands = mp.solutions.hands
 
 class GestureMode(QWidget):
     def __init__(self):
@@ -24,19 +29,22 @@ class GestureMode(QWidget):
         self.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.showFullScreen()
 
-        self.cap = cv2.VideoCapture(0)
-        self.hands = mp_hands.Hands(max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        # A trained model (HAND_GESTURE_MODEL) replaces the hand-written rules
+        self.model = load_model(labels=GESTURES)
+        classify = self.model.classify if self.model else self.classify_gesture
+        init = Initializer()
+        init.start("input", open_backend)
+        self.cap, self.tracker, _ = open_tracking(init, classify=classify, max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        self.input = init.result("input")
 
-        self.gesture_cooldown = 0
+        self.gestures = TemporalRecognizer(hold_overrides={"four_fingers": 400})
         self.last_gesture_time = 0
         self.gesture_delay = 1.0  # Minimum time between gestures
-        self.clap_detected = False
-        self.last_clap_time = 0
+        self.motion = MotionGestures()  # Claps need both palms closing in fast, not just touching
         self.menu_visible = True  # Track menu visibility
-
-        # Configure pyautogui
-        pyautogui.FAILSAFE = False
-        pyautogui.PAUSE = 0.1
+        self.scheduler = ActionScheduler(self)
+        self.panel = CachedPanel(600, 210, title_size=14)
+        self.painted_busy = False
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
@@ -52,205 +60,10 @@ class GestureMode(QWidget):
         print("• ✌️ Peace sign = Space")
         print("• 🤙 Pinky only = Undo")
         print("• 🤘 Rock sign = Toggle menu")
-        print("• 👏 CLAP = SHUTDOWN (30s delay)")
+        print(f"• 👏 CLAP = SHUTDOWN after a {SHUTDOWN_COUNTDOWN}s countdown (🖐️ 5 fingers cancels)")
         print("• 🖖 4 fingers = Return to Menu")
         print("="*60 + "\n")
 
-    def count_extended_fingers(self, landmarks, frame_shape):
-        fingers = []
-        
-        # Thumb
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        if thumb_tip.x < thumb_ip.x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Other fingers
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y < pip.y:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        return sum(fingers)
-
-    def is_fist(self, landmarks, frame_shape):
-        """Check if hand is making a fist (all fingers closed)"""
-        fingers = []
-        
-        # Thumb - check if thumb is across palm
-        thumb_tip = landmarks.landmark[4]
-        thumb_mcp = landmarks.landmark[2]
-        if thumb_tip.x > thumb_mcp.x:  # Thumb across palm
-            fingers.append(0)
-        else:
-            fingers.append(1)
-        
-        # Other fingers - check if tips are below PIP joints
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y > pip.y:  # Finger tip below PIP joint (closed)
-                fingers.append(0)
-            else:
-                fingers.append(1)
-        
-        # Fist if no fingers are extended
-        return sum(fingers) == 0
-
-    def is_thumbs_up(self, landmarks, frame_shape):
-        """Check for thumbs up gesture (only thumb extended)"""
-        fingers = []
-        
-        # Thumb should be extended
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        if thumb_tip.x < thumb_ip.x:  # Thumb extended
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Other fingers should be closed
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y > pip.y:  # Finger closed
-                fingers.append(0)
-            else:
-                fingers.append(1)
-        
-        # Only thumb extended, others closed
-        return sum(fingers) == 1 and fingers[0] == 1
-
-    def is_peace_sign(self, landmarks, frame_shape):
-        """Check for peace sign (index and middle fingers extended)"""
-        extended_fingers = self.count_extended_fingers(landmarks, frame_shape)
-        
-        if extended_fingers != 2:
-            return False
-            
-        # Check which specific fingers are extended
-        index_tip = landmarks.landmark[8]
-        index_pip = landmarks.landmark[6]
-        middle_tip = landmarks.landmark[12]
-        middle_pip = landmarks.landmark[10]
-        ring_tip = landmarks.landmark[16]
-        ring_pip = landmarks.landmark[14]
-        pinky_tip = landmarks.landmark[20]
-        pinky_pip = landmarks.landmark[18]
-        
-        # Index and middle extended, ring and pinky closed
-        index_extended = index_tip.y < index_pip.y
-        middle_extended = middle_tip.y < middle_pip.y
-        ring_closed = ring_tip.y > ring_pip.y
-        pinky_closed = pinky_tip.y > pinky_pip.y
-        
-        return index_extended and middle_extended and ring_closed and pinky_closed
-    
-    def is_pinky_only(self, landmarks, frame_shape):
-        """Check for pinky-only gesture (🤙 hang loose)"""
-        fingers = []
-        
-        # Thumb - should be closed or neutral
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        if thumb_tip.x < thumb_ip.x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Check each finger individually
-        finger_tips = [8, 12, 16, 20]  # index, middle, ring, pinky
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y < pip.y:  # Extended
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        # Should be: thumb closed, index closed, middle closed, ring closed, pinky extended
-        # fingers = [thumb, index, middle, ring, pinky]
-        return fingers == [0, 0, 0, 0, 1] or fingers == [1, 0, 0, 0, 1]  # Allow thumb either way
-
-    def is_rock_sign(self, landmarks, frame_shape):
-        """Check for rock sign 🤘 (index + pinky extended)"""
-        fingers = []
-        
-        # Check thumb
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        fingers.append(1 if thumb_tip.x < thumb_ip.x else 0)
-        
-        # Check other fingers
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            fingers.append(1 if tip.y < pip.y else 0)
-        
-        # Index and pinky extended, middle and ring closed
-        # [thumb, index, middle, ring, pinky]
-        return fingers[1] == 1 and fingers[2] == 0 and fingers[3] == 0 and fingers[4] == 1
-
-    def detect_clap(self, results, frame_shape):
-        """Detect clapping motion with both hands"""
-        if not results.multi_hand_landmarks or len(results.multi_hand_landmarks) < 2:
-            return False
-        
-        # Get landmarks for both hands
-        hand1 = results.multi_hand_landmarks[0]
-        hand2 = results.multi_hand_landmarks[1]
-        
-        # Get palm positions (landmark 0 is wrist, but landmark 9 is palm base)
-        hand1_palm = hand1.landmark[9]
-        hand2_palm = hand2.landmark[9]
-        
-        # Calculate distance between palms
-        h, w = frame_shape[:2]
-        hand1_x, hand1_y = int(hand1_palm.x * w), int(hand1_palm.y * h)
-        hand2_x, hand2_y = int(hand2_palm.x * w), int(hand2_palm.y * h)
-        
-        distance = np.sqrt((hand1_x - hand2_x)**2 + (hand1_y - hand2_y)**2)
-        
-        # Clap detected if palms are close together (within 100 pixels)
-        clap_detected = distance < 100
-        
-        # Check if hands are moving toward each other (optional enhancement)
-        current_time = time.time()
-        
-        if clap_detected and not self.clap_detected:
-            # New clap detected
-            self.clap_detected = True
-            self.last_clap_time = current_time
-            return True
-        elif not clap_detected:
-            self.clap_detected = False
-            
-        return False
-
-    def is_open_hand(self, landmarks, frame_shape):
-        """Check if hand is fully open (all fingers extended)"""
-        extended_fingers = self.count_extended_fingers(landmarks, frame_shape)
-        return extended_fingers == 5
-
     def shutdown_pc(self, method="shutdown", delay_seconds=5):
         """Shutdown PC using different methods"""
         try:
@@ -259,33 +72,33 @@ class GestureMode(QWidget):
                 print(f"🔄 Shutting down in {delay_seconds} seconds...")
                 print("⚠️  Press Ctrl+C in terminal to cancel!")
                 if os.name == 'nt':  # Windows
-                    subprocess.run(['shutdown', '/s', '/f', '/t', str(delay_seconds)])
+                    self.input.run(['shutdown', '/s', '/f', '/t', str(delay_seconds)])
                 else:  # Linux/Mac
-                    subprocess.run(['shutdown', '-h', '+1'])  # 1 minute delay
+                    self.input.run(['shutdown', '-h', '+1'])  # 1 minute delay
                     
             elif method == "immediate":
                 # Immediate shutdown (more aggressive)
                 print("🔴 IMMEDIATE SHUTDOWN!")
                 if os.name == 'nt':  # Windows
-                    subprocess.run(['shutdown', '/s', '/f', '/t', '0'])
+                    self.input.run(['shutdown', '/s', '/f', '/t', '0'])
                 else:  # Linux/Mac
-                    subprocess.run(['shutdown', '-h', 'now'])
+                    self.input.run(['shutdown', '-h', 'now'])
                     
             elif method == "hibernate":
                 # Hibernate
                 print("💤 Hibernating PC...")
                 if os.name == 'nt':  # Windows
-                    subprocess.run(['shutdown', '/h'])
+                    self.input.run(['shutdown', '/h'])
                 else:  # Linux/Mac
-                    subprocess.run(['systemctl', 'hibernate'])
+                    self.input.run(['systemctl', 'hibernate'])
                     
             elif method == "restart":
                 # Restart
                 print("🔄 Restarting PC...")
                 if os.name == 'nt':  # Windows
-                    subprocess.run(['shutdown', '/r', '/f', '/t', str(delay_seconds)])
+                    self.input.run(['shutdown', '/r', '/f', '/t', str(delay_seconds)])
                 else:  # Linux/Mac
-                    subprocess.run(['shutdown', '-r', '+1'])
+                    self.input.run(['shutdown', '-r', '+1'])
                     
             return True
             
@@ -310,32 +123,32 @@ class GestureMode(QWidget):
         
         if gesture == "fist":
             # Copy (Ctrl+C)
-            pyautogui.hotkey('ctrl', 'c')
+            self.input.hotkey('ctrl', 'c')
             print("📋 Copy (Ctrl+C)")
             
         elif gesture == "five_fingers":
             # Paste (Ctrl+V)
-            pyautogui.hotkey('ctrl', 'v')
+            self.input.hotkey('ctrl', 'v')
             print("📝 Paste (Ctrl+V)")
             
         elif gesture == "three_fingers":
             # Save (Ctrl+S)
-            pyautogui.hotkey('ctrl', 's')
+            self.input.hotkey('ctrl', 's')
             print("💾 Save (Ctrl+S)")
             
         elif gesture == "pinky_only":
             # Undo (Ctrl+Z)
-            pyautogui.hotkey('ctrl', 'z')
+            self.input.hotkey('ctrl', 'z')
             print("↩ Undo (Ctrl+Z)")
             
         elif gesture == "peace_sign":
             # Spacebar
-            pyautogui.press('space')
+            self.input.press('space')
             print("␣ Spacebar")
 
         elif gesture == "thumbs_up":
             # Enter
-            pyautogui.press('enter')
+            self.input.press('enter')
             print("↵ Enter")
 
         elif gesture == "rock_sign":
@@ -343,60 +156,38 @@ class GestureMode(QWidget):
             self.toggle_menu_visibility()
             
         elif gesture == "clap":
-            # SHUTDOWN with 30 second delay
-            print("👏 CLAP DETECTED - SHUTDOWN INITIATED!")
-            print("⚠️  PC will shutdown in 30 seconds!")
-            print("⚠️  To cancel: Open terminal and type: shutdown /a")
-            
-            # Show countdown
-            for i in range(5, 0, -1):
-                print(f"⏰ Shutdown in {i}...")
-                time.sleep(1)
-            
-            # Execute shutdown
-            success = self.shutdown_pc("shutdown", 5)
-            if success:
-                print("✅ Shutdown command sent successfully!")
-            else:
-                print("❌ Failed to send shutdown command")
+            # SHUTDOWN after a countdown shown in the panel; an open hand cancels it
+            if self.scheduler.pending("shutdown"):
+                return
+            print("👏 CLAP DETECTED - SHUTDOWN COUNTDOWN STARTED!")
+            print("🖐️  Show 5 fingers within 5 seconds to cancel")
+            print("⚠️  After that, cancel from a terminal: shutdown /a (Windows) or shutdown -c")
+            self.scheduler.countdown("shutdown", "Shutdown", SHUTDOWN_COUNTDOWN, self.send_shutdown,
+                                     cancel_gestures={"five_fingers"})
             
         elif gesture == "four_fingers":
             # Return to menu
             self.quit_mode()
             return
 
-    def check_gestures(self, landmarks, frame_shape):
-        """Check for single-hand gestures"""
-        extended_fingers = self.count_extended_fingers(landmarks, frame_shape)
-        
-        self.gesture_cooldown = max(0, self.gesture_cooldown - 1)
-        
-        if self.gesture_cooldown > 0:
-            return None
-            
-        gesture = None
-        
-        if self.is_fist(landmarks, frame_shape):
-            gesture = "fist"
-        elif extended_fingers == 5:
-            gesture = "five_fingers"
-        elif extended_fingers == 3:
-            gesture = "three_fingers"
-        elif self.is_thumbs_up(landmarks, frame_shape):
-            gesture = "thumbs_up"
-        elif self.is_pinky_only(landmarks, frame_shape):
-            gesture = "pinky_only"
-        elif self.is_rock_sign(landmarks, frame_shape):
-            gesture = "rock_sign"
-        elif self.is_peace_sign(landmarks, frame_shape):
-            gesture = "peace_sign"
-        elif extended_fingers == 4:
-            gesture = "four_fingers"
-            
-        if gesture:
-            self.gesture_cooldown = 30
-            
-        return gesture
+    def send_shutdown(self):
+        """Runs on the scheduler's worker thread once the countdown ends"""
+        success = self.shutdown_pc("shutdown", 5)
+        if success:
+            print("✅ Shutdown command sent successfully!")
+        else:
+            print("❌ Failed to send shutdown command")
+        return success
+
+    def classify_gesture(self, landmarks, frame_shape):
+        """Single-hand gesture shown in one frame (stateless, safe off the GUI thread)"""
+        gesture = classify_hand(landmarks)
+        # Pointing has no shortcut here
+        return None if gesture == "pointing" else gesture
+
+    def check_gestures(self, gesture):
+        """Debounce a single-hand gesture over time"""
+        return self.gestures.update(gesture)
 
     def quit_mode(self):
         print("👋 Returning to menu...")
@@ -404,75 +195,65 @@ class GestureMode(QWidget):
         QApplication.quit()
 
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            return
+        for frame_shape, results, gesture in self.tracker.poll():
+            # Motion history has to see every frame, with or without hands
+            motion = self.motion.update(results, frame_shape)
 
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
-
-        # First check for clap (requires both hands)
-        if results.multi_hand_landmarks and len(results.multi_hand_landmarks) >= 2:
-            if self.detect_clap(results, frame.shape):
-                current_time = time.time()
-                if current_time - self.last_gesture_time >= self.gesture_delay:
-                    self.execute_shortcut("clap")
-        
-        # Then check for single-hand gestures
-        elif results.multi_hand_landmarks:
-            gesture = self.check_gestures(results.multi_hand_landmarks[0], frame.shape)
-            if gesture:
-                self.execute_shortcut(gesture)
+            # First check for clap (requires both hands)
+            if results.multi_hand_landmarks and len(results.multi_hand_landmarks) >= 2:
+                if motion == "clap":
+                    current_time = time.time()
+                    if current_time - self.last_gesture_time >= self.gesture_delay:
+                        self.execute_shortcut("clap")
+            
+            # Then check for single-hand gestures
+            elif results.multi_hand_landmarks:
+                gesture = self.check_gestures(gesture)
+                # A pending countdown gets first look, so its cancel gesture
+                # doesn't also fire the gesture's usual shortcut
+                if gesture and self.scheduler.handle_gesture(gesture):
+                    continue
+                if gesture:
+                    self.execute_shortcut(gesture)
+                    if gesture == "four_fingers":
+                        return
 
-        self.update()
+        # The panel is static apart from countdown progress, so only repaint
+        # while something is pending and once more when it finishes
+        busy = self.scheduler.busy()
+        if busy:
+            self.update(self.panel.rect(20, 20, len(self.scheduler.status_lines())))
+        elif self.painted_busy:
+            self.update()
+        self.painted_busy = busy
 
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # Only draw menu if visible
-        if not self.menu_visible:
+        # Only draw menu if visible (a pending countdown always shows)
+        status_lines = self.scheduler.status_lines()
+        if not self.menu_visible and not status_lines:
             return
         
-        # Draw compact info panel with white opaque background
-        panel_width = 600
-        panel_height = 210
+        # Compact info panel from cache, with pending countdowns drawn live below it
         margin = 20
-        
-        # Semi-transparent white background
-        painter.setBrush(QColor(255, 255, 255, 230))
-        painter.setPen(QPen(QColor(0, 0, 0, 150), 2))
-        painter.drawRoundedRect(margin, margin, panel_width, panel_height, 10, 10)
-        
-        # Title
-        font = QFont('Arial', 14, QFont.Bold)
-        painter.setFont(font)
-        painter.setPen(QPen(Qt.black))
-        painter.drawText(margin + 10, margin + 25, "👐 GESTURE MODE - Windows Shortcuts")
-        
-        # Instructions
-        small_font = QFont('Arial', 11)
-        painter.setFont(small_font)
-        
-        y_pos = margin + 50
-        instructions = [
+        y_pos = self.panel.paint(painter, margin, margin, "👐 GESTURE MODE - Windows Shortcuts", [
             "✊ Fist = Copy (Ctrl+C)       🖐️ 5 fingers = Paste (Ctrl+V)",
             "🤟 3 fingers = Save (Ctrl+S)   👍 Thumbs up = Enter",
             "✌️ Peace sign = Space         🤙 Pinky only = Undo",
-            "🤘 Rock sign = Toggle menu    👏 CLAP = SHUTDOWN (30s)",
+            "🤘 Rock sign = Toggle menu    👏 CLAP = SHUTDOWN (🖐️ cancels)",
             "🖖 4 fingers = Menu"
-        ]
-        
-        for instruction in instructions:
-            painter.drawText(margin + 10, y_pos, instruction)
-            y_pos += 30
+        ], extra_rows=len(status_lines))
+        painter.setFont(self.panel.text_font)
+        paint_status(painter, status_lines, margin + 10, y_pos, self.panel.width - 20)
 
     def cleanup(self):
+        self.scheduler.shutdown()
+        self.input.close()
+        self.tracker.close()
         if self.cap and self.cap.isOpened():
             self.cap.release()
-        if self.hands:
-            self.hands.close()
 
     def closeEvent(self, event):
         self.cleanup()
@@ -0,0 +1,127 @@
+# fingertip_flow.py - Carries a few fingertip landmarks forward with optical flow between detections
+import os
+
+import cv2
+import numpy as np
+
+from inference_pool import PoolResults
+
+FLOW_ENABLED = os.environ.get("HAND_OPTICAL_FLOW", "0") == "1"
+REDETECT_EVERY = int(os.environ.get("HAND_FLOW_REDETECT", "4"))  # Frames between full MediaPipe runs
+
+
+class FingertipFlow:
+    """Tracks selected landmarks with pyramidal Lucas-Kanade between MediaPipe runs
+
+    After each full detection the chosen points (index and thumb tip by
+    default) are followed frame to frame inside a small grayscale patch
+    around them. The rest of the hand is moved by their mean displacement,
+    so landmarks a classifier compares them with (knuckles, wrist) stay in
+    step instead of going stale at the detected position. Any sign
+    of drift - a lost point, a forward-backward mismatch or an implausible
+    jump - returns None so the caller runs a full detection instead.
+    """
+
+    def __init__(self, points=(8, 4), redetect_every=REDETECT_EVERY, margin=48,
+                 win_size=(21, 21), max_level=2, max_fb_error=1.5, max_jump=0.12):
+        self.points = list(points)
+        self.redetect_every = redetect_every
+        self.margin = margin
+        self.lk_params = dict(winSize=win_size, maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.max_fb_error = max_fb_error
+        self.max_jump = max_jump
+
+        self.hand = None  # (points, label, score) of the tracked hand
+        self.pixels = None  # Tracked points in unmirrored pixel coordinates
+        self.patch = None
+        self.origin = None
+        self.since_detection = 0
+        self.tracked = 0
+        self.redetections = 0
+
+    def reset(self):
+        self.hand = None
+        self.pixels = None
+        self.patch = None
+
+    def crop(self, rgb, pixels):
+        """Grayscale patch around the points, and its top-left corner"""
+        h, w = rgb.shape[:2]
+        x0 = max(0, int(pixels[:, 0].min()) - self.margin)
+        y0 = max(0, int(pixels[:, 1].min()) - self.margin)
+        x1 = min(w, int(pixels[:, 0].max()) + self.margin + 1)
+        y1 = min(h, int(pixels[:, 1].max()) + self.margin + 1)
+        return cv2.cvtColor(rgb[y0:y1, x0:x1], cv2.COLOR_RGB2GRAY), np.array([x0, y0], np.float32)
+
+    def detected(self, results, rgb):
+        """Start tracking from a fresh MediaPipe result (landmarks already mirrored)"""
+        self.since_detection = 0
+        if not results.multi_hand_landmarks:
+            self.reset()
+            return
+
+        h, w = rgb.shape[:2]
+        landmarks = results.multi_hand_landmarks[0].landmark
+        label, score = "", 0.0
+        if results.multi_handedness:
+            classification = results.multi_handedness[0].classification[0]
+            label, score = classification.label, classification.score
+        self.hand = ([(lm.x, lm.y, lm.z) for lm in landmarks], label, score)
+
+        # The frame itself is not mirrored, so undo the landmark mirroring to find pixels
+        self.pixels = np.array([[(1.0 - landmarks[i].x) * w, landmarks[i].y * h] for i in self.points], np.float32)
+        self.patch, self.origin = self.crop(rgb, self.pixels)
+
+    def track(self, rgb):
+        """Results with the tracked points moved to this frame, or None when a detection is needed"""
+        if self.hand is None or self.since_detection >= self.redetect_every - 1:
+            return None
+
+        h, w = rgb.shape[:2]
+        x0, y0 = self.origin
+        current = cv2.cvtColor(rgb[int(y0):int(y0) + self.patch.shape[0], int(x0):int(x0) + self.patch.shape[1]],
+                               cv2.COLOR_RGB2GRAY)
+        if current.shape != self.patch.shape:
+            return self.drifted()
+
+        start = (self.pixels - self.origin).reshape(-1, 1, 2)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(self.patch, current, start, None, **self.lk_params)
+        if moved is None or not status.all():
+            return self.drifted()
+
+        # Track back to where we started; a good track lands on its own origin
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(current, self.patch, moved, None, **self.lk_params)
+        if back is None or not back_status.all():
+            return self.drifted()
+        if np.abs(back - start).reshape(-1, 2).max() > self.max_fb_error:
+            return self.drifted()
+
+        pixels = moved.reshape(-1, 2) + self.origin
+        if np.abs(pixels - self.pixels).max() > self.max_jump * w:
+            return self.drifted()
+        if (pixels < 0).any() or (pixels[:, 0] >= w).any() or (pixels[:, 1] >= h).any():
+            return self.drifted()
+
+        # Landmarks are mirrored, so a shift right in pixels is a shift left in x
+        dx, dy = (pixels - self.pixels).mean(axis=0)
+        dx, dy = -dx / w, dy / h
+        points, label, score = self.hand
+        points = [(x + dx, y + dy, z) for x, y, z in points]
+        for index, (px, py) in zip(self.points, pixels):
+            points[index] = (1.0 - px / w, py / h, points[index][2])
+        self.hand = (points, label, score)
+
+        self.pixels = pixels
+        self.patch, self.origin = self.crop(rgb, pixels)
+        self.since_detection += 1
+        self.tracked += 1
+        return PoolResults([self.hand])
+
+    def drifted(self):
+        self.redetections += 1
+        self.reset()
+        return None
+
+    def report(self):
+        return f"{self.tracked} frames tracked by optical flow, {self.redetections} drift re-detections"
@@ -0,0 +1,347 @@
+# frame_bus.py - One process owns the camera and shares frames with everyone else
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+BUS_NAME = os.environ.get("HAND_FRAME_BUS_NAME", "hand_frame_bus")
+SLOTS = 4
+MAGIC = 0x48414E44  # "HAND"
+
+# Header: int64 fields at the start of the block
+H_MAGIC, H_WIDTH, H_HEIGHT, H_CHANNELS, H_SLOTS, H_LATEST, H_PID, H_HEARTBEAT, H_FPS = range(9)
+HEADER_FIELDS = 16
+# Per slot: seqlock pair (start, end) plus capture time in ns
+SLOT_FIELDS = 3
+
+
+def attach(name):
+    """Attach to an existing block without letting this process's resource tracker delete it on exit"""
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == "posix":
+        try:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+class FrameBusLayout:
+    """Numpy views over the header, slot table and frame slots of one shared block"""
+
+    def __init__(self, shm, frame_shape=None, slots=SLOTS):
+        self.shm = shm
+        self.header = np.ndarray((HEADER_FIELDS,), np.int64, buffer=shm.buf)
+        if frame_shape is None:
+            frame_shape = (int(self.header[H_HEIGHT]), int(self.header[H_WIDTH]), int(self.header[H_CHANNELS]))
+            slots = int(self.header[H_SLOTS])
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.frame_bytes = int(np.prod(self.frame_shape))
+
+        table_offset = HEADER_FIELDS * 8
+        self.table = np.ndarray((slots, SLOT_FIELDS), np.int64, buffer=shm.buf, offset=table_offset)
+        self.data_offset = table_offset + slots * SLOT_FIELDS * 8
+
+    @staticmethod
+    def size_for(frame_shape, slots):
+        return HEADER_FIELDS * 8 + slots * SLOT_FIELDS * 8 + slots * int(np.prod(frame_shape))
+
+    def slot_view(self, slot):
+        return np.ndarray(self.frame_shape, np.uint8, buffer=self.shm.buf, offset=self.data_offset + slot * self.frame_bytes)
+
+    def release(self):
+        # Views must go before the block can be closed
+        self.header = None
+        self.table = None
+
+
+class FrameBroker:
+    """Reads a video source and publishes every frame into a shared memory ring
+
+    Each slot is guarded by a seqlock: the frame sequence number is written
+    to 'start' before the pixels and to 'end' after them, so a reader that
+    sees the same number on both sides of its copy knows it got a whole
+    frame.
+    """
+
+    def __init__(self, source, name=BUS_NAME, slots=SLOTS):
+        self.source = source
+        self.name = name
+        self.slots = slots
+        self.shm = None
+        self.layout = None
+        self.seq = 0
+
+    def create(self, frame_shape):
+        try:
+            # Opened without attach(): unlink() unregisters the block itself, and doing it
+            # twice makes the resource tracker complain about a name it no longer knows
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=FrameBusLayout.size_for(frame_shape, self.slots))
+        self.layout = FrameBusLayout(self.shm, frame_shape, self.slots)
+        self.layout.table[:] = -1
+        header = self.layout.header
+        header[H_HEIGHT], header[H_WIDTH], header[H_CHANNELS] = frame_shape
+        header[H_SLOTS] = self.slots
+        header[H_LATEST] = -1
+        header[H_PID] = os.getpid()
+        header[H_FPS] = int(self.source.get(cv2.CAP_PROP_FPS) or 0)
+        header[H_HEARTBEAT] = time.time_ns()
+        header[H_MAGIC] = MAGIC  # Written last: readers wait for it
+
+    def publish(self):
+        """Capture one frame straight into the next slot; returns False when the source is done"""
+        if self.layout is None:
+            ret, frame = self.source.read()
+            if not ret:
+                return False
+            self.create(frame.shape)
+        else:
+            frame = None
+
+        slot = self.seq % self.slots
+        row = self.layout.table[slot]
+        row[0] = self.seq
+        view = self.layout.slot_view(slot)
+        if frame is None:
+            ret, frame = self.source.read(image=view)
+            if not ret:
+                return False
+        if frame is not view:
+            if frame.shape != view.shape:
+                print(f"⚠️  Frame size changed to {frame.shape}, bus keeps {view.shape}")
+                return True
+            np.copyto(view, frame)
+        row[2] = time.time_ns()
+        row[1] = self.seq
+
+        header = self.layout.header
+        header[H_LATEST] = self.seq
+        header[H_HEARTBEAT] = row[2]
+        self.seq += 1
+        return True
+
+    def run(self, stop_event=None):
+        """Publish until the source ends or stop_event is set, then remove the shared memory"""
+        print(f"📡 Frame bus '{self.name}' publishing")
+        try:
+            while (stop_event is None or not stop_event.is_set()) and self.publish():
+                pass
+        finally:
+            self.close()
+
+    def close(self):
+        self.source.release()
+        if self.shm is not None:
+            self.layout.release()
+            self.layout = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class FrameBusSource:
+    """Consumer end of the bus, usable anywhere a cv2.VideoCapture is
+
+    read() waits for a frame newer than the last one returned and copies it
+    out. read_view() returns the slot itself without copying; it is only
+    valid until the broker wraps around the ring.
+    """
+
+    def __init__(self, name=BUS_NAME, timeout=5.0, stale_after=2.0):
+        self.name = name
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.last_seq = -1
+        self.frames_read = 0
+        self.frames_skipped = 0
+
+        deadline = time.time() + timeout
+        while True:
+            try:
+                self.shm = attach(name)
+                header = np.ndarray((HEADER_FIELDS,), np.int64, buffer=self.shm.buf)
+                if header[H_MAGIC] == MAGIC:
+                    del header
+                    break
+                del header
+                self.shm.close()
+            except FileNotFoundError:
+                pass
+            if time.time() > deadline:
+                raise TimeoutError(f"frame bus '{name}' is not running")
+            time.sleep(0.05)
+
+        self.layout = FrameBusLayout(self.shm)
+        self.opened = True
+
+    def isOpened(self):
+        if not self.opened:
+            return False
+        age = (time.time_ns() - int(self.layout.header[H_HEARTBEAT])) / 1e9
+        return age < self.stale_after
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.layout.header[H_FPS])
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def wait_for_new(self):
+        deadline = time.time() + self.timeout
+        while self.opened:
+            latest = int(self.layout.header[H_LATEST])
+            if latest > self.last_seq:
+                return latest
+            if time.time() > deadline:
+                return None
+            time.sleep(0.001)
+        return None
+
+    def read_view(self):
+        """Return (ret, view, seq) for the newest frame without copying"""
+        latest = self.wait_for_new()
+        if latest is None:
+            return False, None, None
+        slot = latest % self.layout.slots
+        if self.last_seq >= 0:
+            self.frames_skipped += max(0, latest - self.last_seq - 1)
+        self.last_seq = latest
+        self.frames_read += 1
+        return True, self.layout.slot_view(slot), latest
+
+    def read(self, image=None):
+        while True:
+            latest = self.wait_for_new()
+            if latest is None:
+                return False, None
+            slot = latest % self.layout.slots
+            row = self.layout.table[slot]
+            if row[1] != latest:
+                continue  # Broker is still writing it
+
+            view = self.layout.slot_view(slot)
+            if image is None or image.shape != view.shape:
+                image = np.empty(view.shape, np.uint8)
+            np.copyto(image, view)
+            del view
+
+            # The broker may have lapped us mid-copy; if so, take the next frame
+            if row[0] != latest:
+                continue
+
+            if self.last_seq >= 0:
+                self.frames_skipped += max(0, latest - self.last_seq - 1)
+            self.last_seq = latest
+            self.frames_read += 1
+            return True, image
+
+    def release(self):
+        if self.opened:
+            self.opened = False
+            self.layout.release()
+            self.shm.close()
+
+
+def bus_running(name=BUS_NAME):
+    try:
+        source = FrameBusSource(name, timeout=0.0)
+    except (TimeoutError, FileNotFoundError):
+        return False
+    running = source.isOpened()
+    source.release()
+    return running
+
+
+def start_broker(source_spec="camera", name=BUS_NAME, timeout=10.0):
+    """Spawn a broker process unless one is already publishing; returns it (or None if reused)
+
+    The broker stops when its stdin closes, so stop it with stop_broker().
+    """
+    if bus_running(name):
+        return None
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--source", source_spec, "--name", name,
+                                "--stop-on-eof"], stdin=subprocess.PIPE)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if bus_running(name):
+            return process
+        if process.poll() is not None:
+            break
+        time.sleep(0.1)
+    print("❌ Frame bus did not start")
+    return process
+
+
+def stop_broker(process, timeout=3.0):
+    """Ask a broker from start_broker() to stop, so it removes its shared memory; terminate only if it hangs"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        process.stdin.close()
+    except OSError:
+        pass
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print("⚠️  Frame bus did not stop, terminating it")
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def watch_stdin(stop_event):
+    """Set stop_event once the parent closes our stdin (or dies)"""
+    try:
+        while sys.stdin.buffer.read(4096):
+            pass
+    except (OSError, ValueError):
+        pass
+    stop_event.set()
+
+
+def main():
+    import argparse
+    from video_source import open_source
+
+    parser = argparse.ArgumentParser(description="Own the camera and publish frames to shared memory")
+    parser.add_argument("--source", default="camera", help="video source spec (see video_source.open_source)")
+    parser.add_argument("--name", default=BUS_NAME, help="shared memory block name")
+    parser.add_argument("--slots", type=int, default=SLOTS, help="frames kept in the ring")
+    parser.add_argument("--stop-on-eof", action="store_true", help="stop when stdin is closed (used by start_broker)")
+    args = parser.parse_args()
+
+    stop_event = threading.Event()
+    if args.stop_on_eof:
+        threading.Thread(target=watch_stdin, args=(stop_event,), name="stdin-watch", daemon=True).start()
+    # A plain SIGTERM also goes through the normal shutdown, so the block is still unlinked
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    broker = FrameBroker(open_source(args.source), args.name, args.slots)
+    try:
+        broker.run(stop_event)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
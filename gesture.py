@@ -3,6 +3,9 @@ import mediapipe as mp
 import pyautogui
 import math
 import numpy as np
+from camera import open_camera
+from temporal import TemporalRecognizer
+from gesture_model import load_model, SCRIPT_MODEL_PATH
 
 # MediaPipe Hands setup
 mp_hands = mp.solutions.hands
@@ -14,7 +17,7 @@ hands = mp_hands.Hands(
 )
 
 # Webcam
-cap = cv2.VideoCapture(0)
+cap = open_camera()
 
 # Get screen size
 screen_width, screen_height = pyautogui.size()
@@ -28,8 +31,7 @@ MODES = {
 current_mode = "GESTURE"
 
 # Gesture state
-last_gesture = None
-gesture_cooldown = 0
+gesture_trigger = TemporalRecognizer()
 
 # Drawing state
 drawing_canvas = None
@@ -41,7 +43,11 @@ drawing_type = None  # 'box', 'circle', 'freehand'
 # Mouse control state
 mouse_smoothing = []
 SMOOTHING_BUFFER_SIZE = 5
-mouse_click_cooldown = 0
+mouse_clicks = TemporalRecognizer(cooldown_ms=650)
+
+# Trained classifier (HAND_GESTURE_SCRIPT_MODEL), labelled with this script's gesture names
+SCRIPT_GESTURES = ["peace", "thumbs_up", "thumbs_down", "fist", "open_palm", "pointing", "three_fingers", "pinch"]
+gesture_model = load_model(SCRIPT_MODEL_PATH, labels=SCRIPT_GESTURES)
 
 def get_finger_status(hand_landmarks):
     """Returns list of which fingers are up [thumb, index, middle, ring, pinky]"""
@@ -204,7 +210,7 @@ def handle_drawing_mode(hand_landmarks, frame, gesture):
 
 def handle_mouse_mode(hand_landmarks, frame, gesture):
     """Handle mouse pointer control"""
-    global mouse_smoothing, mouse_click_cooldown
+    global mouse_smoothing
     
     index_tip = get_finger_position(hand_landmarks, frame.shape)
     
@@ -226,22 +232,19 @@ def handle_mouse_mode(hand_landmarks, frame, gesture):
     pyautogui.moveTo(avg_x, avg_y, duration=0.1)
     
     # Handle clicks
-    mouse_click_cooldown = max(0, mouse_click_cooldown - 1)
+    click = mouse_clicks.update(gesture)
     
-    if gesture == "fist" and mouse_click_cooldown == 0:
+    if click == "fist":
         print("🖱️ Left Click")
         pyautogui.click()
-        mouse_click_cooldown = 20
     
-    elif gesture == "peace" and mouse_click_cooldown == 0:
+    elif click == "peace":
         print("🖱️ Right Click")
         pyautogui.rightClick()
-        mouse_click_cooldown = 20
     
-    elif gesture == "pinch" and mouse_click_cooldown == 0:
+    elif click == "pinch":
         print("🖱️ Double Click")
         pyautogui.doubleClick()
-        mouse_click_cooldown = 20
     
     # Draw cursor on frame
     cv2.circle(frame, index_tip, 10, (255, 0, 0), -1)
@@ -282,8 +285,6 @@ while cap.isOpened():
     rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     results = hands.process(rgb_frame)
     
-    gesture_cooldown = max(0, gesture_cooldown - 1)
-    
     if results.multi_hand_landmarks:
         for hand_landmarks in results.multi_hand_landmarks:
             # Draw hand skeleton
@@ -294,14 +295,13 @@ while cap.isOpened():
             )
             
             # Detect gesture
-            gesture = detect_gesture(hand_landmarks)
+            gesture = gesture_model.classify(hand_landmarks, frame.shape) if gesture_model else detect_gesture(hand_landmarks)
             
             # Handle different modes
             if current_mode == "GESTURE":
-                if gesture and gesture != last_gesture and gesture_cooldown == 0:
-                    handle_gesture_mode(gesture)
-                    last_gesture = gesture
-                    gesture_cooldown = 20
+                triggered = gesture_trigger.update(gesture)
+                if triggered:
+                    handle_gesture_mode(triggered)
             
             elif current_mode == "DRAWING":
                 handle_drawing_mode(hand_landmarks, frame, gesture)
@@ -329,7 +329,6 @@ while cap.isOpened():
                 cv2.putText(frame, "Move=Pointer, Fist=LeftClick, Peace=RightClick, Pinch=DoubleClick", 
                            (10, instructions_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
     else:
-        last_gesture = None
         if current_mode == "DRAWING":
             start_point = None
     
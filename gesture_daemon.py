@@ -0,0 +1,283 @@
+# gesture_daemon.py - Headless hand tracker that publishes gesture events to local subscribers
+import os
+import json
+import time
+import queue
+import socket
+import tempfile
+import threading
+
+from gestures import classify_hand
+from motion import MotionGestures
+from temporal import TemporalRecognizer, HOLD_MS
+from ocr_server import socket_in_use
+
+SOCKET_PATH = os.environ.get("HAND_GESTURE_SOCKET", os.path.join(tempfile.gettempdir(), "hand_gestures.sock"))
+EVENT_TYPES = ("gesture", "motion", "fingertip", "hand_lost")
+
+
+class Subscription:
+    """Which events a client wants: types, gesture names and hand indexes (None = all)"""
+
+    def __init__(self, types=None, gestures=None, hands=None):
+        self.types = set(types) if types else None
+        self.gestures = set(gestures) if gestures else None
+        self.hands = set(hands) if hands else None
+
+    @classmethod
+    def from_message(cls, message):
+        return cls(message.get("types"), message.get("gestures"), message.get("hands"))
+
+    def matches(self, event):
+        if self.types is not None and event["type"] not in self.types:
+            return False
+        if self.hands is not None and event.get("hand") not in self.hands:
+            return False
+        if self.gestures is not None and event["type"] == "gesture" and event["gesture"] not in self.gestures:
+            return False
+        return True
+
+
+class Subscriber:
+    """One connected client: a reader thread for filter updates, a writer thread for events
+
+    Events are queued per client and the oldest are dropped when a slow
+    client falls behind, so one stuck reader never stalls tracking.
+    """
+
+    def __init__(self, conn, on_close):
+        self.conn = conn
+        self.on_close = on_close
+        self.subscription = Subscription(types=["gesture", "motion", "hand_lost"])
+        self.events = queue.Queue(maxsize=256)
+        self.closed = threading.Event()
+        self.dropped = 0
+        threading.Thread(target=self.read_loop, daemon=True).start()
+        threading.Thread(target=self.write_loop, daemon=True).start()
+
+    def read_loop(self):
+        try:
+            for line in self.conn.makefile("r", encoding="utf-8"):
+                try:
+                    self.subscription = Subscription.from_message(json.loads(line))
+                except ValueError:
+                    continue
+        except OSError:
+            pass
+        self.close()
+
+    def write_loop(self):
+        while not self.closed.is_set():
+            try:
+                event = self.events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.conn.sendall((json.dumps(event) + "\n").encode("utf-8"))
+            except OSError:
+                break
+        self.close()
+
+    def publish(self, event):
+        if not self.subscription.matches(event):
+            return
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        self.on_close(self)
+
+
+class GestureDaemon:
+    """Runs one HandTracker and fans its gestures and fingertip positions out over a Unix socket"""
+
+    def __init__(self, source=None, socket_path=SOCKET_PATH, max_num_hands=2,
+                 smoothing_factor=0.5, hold_ms=HOLD_MS):
+        self.source_spec = source
+        self.socket_path = socket_path
+        self.max_num_hands = max_num_hands
+        self.smoothing_factor = smoothing_factor
+        self.hold_ms = hold_ms
+
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = False
+
+        # Per hand slot (kept stable across MediaPipe reordering by the motion history):
+        # smoothed fingertip and the recognizer debouncing its gestures
+        self.smoothed = {}
+        self.recognizers = {}
+        self.hand_visible = False
+        self.motion = MotionGestures()
+
+    def listen(self):
+        # Only a socket nobody answers on is stale; a live one belongs to another daemon
+        if os.path.exists(self.socket_path):
+            if socket_in_use(self.socket_path):
+                raise RuntimeError(f"another gesture daemon is listening on {self.socket_path}")
+            os.unlink(self.socket_path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen()
+        threading.Thread(target=self.accept_loop, daemon=True).start()
+        print(f"📡 Gesture events on {self.socket_path}")
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                break
+            with self.lock:
+                self.subscribers.append(Subscriber(conn, self.remove_subscriber))
+            print(f"🔌 Subscriber connected ({len(self.subscribers)} total)")
+
+    def remove_subscriber(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def publish(self, event):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.publish(event)
+
+    def handle_results(self, results, frame_shape):
+        now = time.time()
+        hands = results.multi_hand_landmarks or []
+
+        motion = self.motion.update(results, frame_shape, now)
+        if motion is not None:
+            self.publish({"type": "motion", "gesture": motion, "t": now})
+
+        if not hands:
+            if self.hand_visible:
+                self.publish({"type": "hand_lost", "t": now})
+            self.hand_visible = False
+            self.smoothed.clear()
+            self.recognizers.clear()
+            return
+        self.hand_visible = True
+
+        history = self.motion.history
+        slots = [history.slots[i] if i < len(history.slots) else i for i in range(len(hands))]
+        for slot in list(self.smoothed):
+            if slot not in slots:
+                # That hand left; a new one in its slot starts fresh
+                self.smoothed.pop(slot, None)
+                self.recognizers.pop(slot, None)
+
+        for hand, landmarks in zip(slots, hands):
+            tip = landmarks.landmark[8]
+            if hand in self.smoothed:
+                px, py = self.smoothed[hand]
+                a = self.smoothing_factor
+                x, y = a * tip.x + (1 - a) * px, a * tip.y + (1 - a) * py
+            else:
+                x, y = tip.x, tip.y
+            self.smoothed[hand] = (x, y)
+            self.publish({"type": "fingertip", "hand": hand, "x": x, "y": y, "t": now})
+
+            # Only report a gesture once it has held, and once per hold
+            if hand not in self.recognizers:
+                self.recognizers[hand] = TemporalRecognizer(hold_ms=self.hold_ms, cooldown_ms=0)
+            gesture = self.recognizers[hand].update(classify_hand(landmarks))
+            if gesture is not None:
+                self.publish({"type": "gesture", "hand": hand, "gesture": gesture, "t": now})
+
+    def run(self):
+        from video_source import open_source
+        from tracking import HandTracker
+
+        self.listen()
+        cap = open_source(self.source_spec)
+        tracker = HandTracker(cap, max_num_hands=self.max_num_hands,
+                              min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        self.running = True
+        try:
+            while self.running and cap.isOpened():
+                drained = True
+                for frame_shape, results, _ in tracker.poll(timeout=0.05):
+                    self.handle_results(results, frame_shape)
+                    drained = False
+                if drained and getattr(cap, "exhausted", False):
+                    # A recorded source has run out and its last frames are published
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.running = False
+            tracker.close()
+            cap.release()
+            self.server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+class GestureSubscriber:
+    """Client side: iterate over events from a running gesture daemon"""
+
+    def __init__(self, types=None, gestures=None, hands=None, socket_path=SOCKET_PATH):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.subscribe(types, gestures, hands)
+
+    def subscribe(self, types=None, gestures=None, hands=None):
+        message = {"types": types or list(EVENT_TYPES), "gestures": gestures, "hands": hands}
+        self.sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def __iter__(self):
+        for line in self.sock.makefile("r", encoding="utf-8"):
+            yield json.loads(line)
+
+    def close(self):
+        self.sock.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared hand tracking daemon publishing gesture events")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="track hands and publish events")
+    serve.add_argument("--source", default=None, help="video source spec (defaults to the camera)")
+    serve.add_argument("--hands", type=int, default=2, help="maximum hands to track")
+
+    listen = sub.add_parser("listen", help="print events from a running daemon")
+    listen.add_argument("--types", nargs="*", choices=EVENT_TYPES, help="event types to receive")
+    listen.add_argument("--gestures", nargs="*", help="only these gesture names")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        GestureDaemon(args.source, args.socket, max_num_hands=args.hands).run()
+    else:
+        subscriber = GestureSubscriber(args.types, args.gestures, socket_path=args.socket)
+        try:
+            for event in subscriber:
+                print(json.dumps(event))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            subscriber.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# gesture_model.py - Trainable k-NN gesture classifier on wrist-normalized landmarks
+import os
+import time
+import argparse
+
+import numpy as np
+
+from landmark_dataset import LandmarkDataset, find_sessions, POINTS
+
+# Paths of trained models; when set, Gesture Mode and gesture.py classify with them instead of
+# their hand-written rules. Each has its own since the two name their gestures differently.
+MODEL_PATH = os.environ.get("HAND_GESTURE_MODEL")
+SCRIPT_MODEL_PATH = os.environ.get("HAND_GESTURE_SCRIPT_MODEL")
+
+WRIST = 0
+MIDDLE_MCP = 9
+NONE_LABEL = "none"
+
+
+def normalize(landmarks, aspect=1.0):
+    """(frames, 21, 3) landmarks -> (frames, 63) pose vectors
+
+    Moves the wrist to the origin, rotates the hand so the wrist -> middle
+    knuckle direction points up and scales that length to 1. What is left is
+    the shape of the hand, independent of where it is, how far away it is and
+    how it is turned in the image plane.
+
+    MediaPipe's x and y are fractions of the frame width and height, so x is
+    first stretched by aspect (width / height, per frame or for all) to put
+    both axes in the same unit; rotating without that would shear the hand.
+    """
+    lm = np.asarray(landmarks, np.float32)
+    centered = lm - lm[:, WRIST:WRIST + 1]
+    centered[:, :, 0] *= np.reshape(np.asarray(aspect, np.float32), (-1, 1))
+    axis = centered[:, MIDDLE_MCP, :2]
+    length = np.maximum(np.linalg.norm(axis, axis=1), 1e-6)
+    # Rotation taking axis onto (0, -1), image y pointing down
+    sin = -axis[:, 0] / length
+    cos = -axis[:, 1] / length
+    x, y = centered[:, :, 0], centered[:, :, 1]
+    out = np.empty_like(centered)
+    out[:, :, 0] = cos[:, None] * x - sin[:, None] * y
+    out[:, :, 1] = sin[:, None] * x + cos[:, None] * y
+    out[:, :, 2] = centered[:, :, 2]
+    out /= length[:, None, None]
+    return out.reshape(len(lm), POINTS * 3)
+
+
+class GestureClassifier:
+    """k nearest neighbours over a capped set of normalized training poses
+
+    Poses further than reject_distance from every training pose are reported
+    as no gesture, so hands in between gestures don't get forced into one.
+    """
+
+    def __init__(self, vectors, labels, names, k=5, reject_distance=None, aspect=None):
+        self.vectors = np.ascontiguousarray(vectors, np.float32)
+        self.labels = np.asarray(labels, np.int64)
+        self.names = list(names)
+        self.k = min(k, len(self.vectors))
+        self.reject_distance = reject_distance
+        # Width / height of the training frames, assumed when classify() gets no frame shape.
+        # None for models trained before landmarks were aspect-corrected; those compare raw poses.
+        self.aspect = aspect
+        self.ignored = set()  # Label names the consumer has no use for; classified as no gesture
+        self.squared_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        # Reused by classify() so a single frame allocates as little as possible
+        self.points = np.empty((1, POINTS, 3), np.float32)
+
+    @classmethod
+    def train(cls, landmarks, label_names, k=5, max_per_label=600, seed=0, aspect=1.0):
+        """Fit from (frames, 21, 3) landmarks, a label name and the width / height of each frame"""
+        rng = np.random.default_rng(seed)
+        label_names = np.asarray(label_names)
+        aspect = np.broadcast_to(np.asarray(aspect, np.float32), (len(label_names),))
+        names = sorted(set(label_names.tolist()))
+        vectors, labels = [], []
+        for index, name in enumerate(names):
+            rows = np.flatnonzero(label_names == name)
+            if len(rows) > max_per_label:
+                rows = rng.choice(rows, max_per_label, replace=False)
+            vectors.append(normalize(landmarks[rows], aspect[rows]))
+            labels.append(np.full(len(rows), index))
+        model = cls(np.concatenate(vectors), np.concatenate(labels), names, k, aspect=float(np.median(aspect)))
+
+        # Reject anything further than the usual spacing between training poses
+        spacing = np.empty(len(model.vectors), np.float32)
+        for start in range(0, len(model.vectors), 1024):
+            squared = model.distances(model.vectors[start:start + 1024])
+            rows = np.arange(len(squared))
+            squared[rows, start + rows] = np.inf
+            spacing[start:start + len(squared)] = np.sqrt(np.maximum(squared.min(axis=1), 0))
+        model.reject_distance = float(np.percentile(spacing, 99) * 3)
+        return model
+
+    def distances(self, vectors):
+        """Squared distances (queries, training poses) via one matrix product"""
+        squared = self.squared_norms[None, :] - 2 * vectors @ self.vectors.T
+        squared += np.einsum("ij,ij->i", vectors, vectors)[:, None]
+        return squared
+
+    def predict_vectors(self, vectors):
+        """Label index per normalized vector, -1 where rejected"""
+        predicted = np.empty(len(vectors), np.int64)
+        for start in range(0, len(vectors), 4096):
+            squared = self.distances(vectors[start:start + 4096])
+            nearest = np.argpartition(squared, self.k - 1, axis=1)[:, :self.k]
+            votes = np.zeros((len(squared), len(self.names)), np.int64)
+            np.add.at(votes, (np.arange(len(squared))[:, None], self.labels[nearest]), 1)
+            chunk = votes.argmax(axis=1)
+            if self.reject_distance is not None:
+                closest = np.sqrt(np.maximum(squared.min(axis=1), 0))
+                chunk[closest > self.reject_distance] = -1
+            predicted[start:start + len(chunk)] = chunk
+        return predicted
+
+    def frame_aspect(self, aspect):
+        """Aspect to normalize with: the given one unless the model predates aspect correction"""
+        return 1.0 if self.aspect is None else aspect
+
+    def predict(self, landmarks, aspect=1.0):
+        """Batch classify (frames, 21, 3) landmarks into label names (None = no gesture)"""
+        predicted = self.predict_vectors(normalize(landmarks, self.frame_aspect(aspect)))
+        return [None if i < 0 or self.names[i] == NONE_LABEL else self.names[i] for i in predicted]
+
+    def classify(self, hand_landmarks, frame_shape=None):
+        """One MediaPipe hand -> label name or None; same signature as the modes' classifiers"""
+        points = self.points[0]
+        for i, lm in enumerate(hand_landmarks.landmark):
+            points[i] = (lm.x, lm.y, lm.z)
+        aspect = frame_shape[1] / frame_shape[0] if frame_shape is not None else self.aspect
+        index = self.predict_vectors(normalize(self.points, self.frame_aspect(aspect)))[0]
+        if index < 0 or self.names[index] == NONE_LABEL or self.names[index] in self.ignored:
+            return None
+        return self.names[index]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, vectors=self.vectors, labels=self.labels, names=np.array(self.names),
+                 k=self.k, reject_distance=np.nan if self.reject_distance is None else self.reject_distance,
+                 aspect=np.nan if self.aspect is None else self.aspect)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            reject = float(data["reject_distance"])
+            aspect = float(data["aspect"]) if "aspect" in data.files else np.nan
+            return cls(data["vectors"], data["labels"], data["names"].tolist(), int(data["k"]),
+                       None if np.isnan(reject) else reject, None if np.isnan(aspect) else aspect)
+
+
+def load_model(path=MODEL_PATH, labels=None):
+    """The configured model, or None to keep using the rule-based classifiers
+
+    labels are the gesture names the caller acts on; other names in the
+    model are reported and ignored, and a model sharing none of them is
+    not used at all.
+    """
+    if not path:
+        return None
+    if not os.path.exists(path):
+        print(f"⚠️  Gesture model {path} not found, using built-in rules")
+        return None
+    model = GestureClassifier.load(path)
+    if labels is not None:
+        gestures = [name for name in model.names if name != NONE_LABEL]
+        unknown = [name for name in gestures if name not in labels]
+        if len(unknown) == len(gestures):
+            print(f"⚠️  Gesture model {path} knows none of {', '.join(labels)}, using built-in rules")
+            return None
+        if unknown:
+            print(f"⚠️  Gesture model {path}: {', '.join(unknown)} not used here, ignored")
+            model.ignored = set(unknown)
+    print(f"🧠 Gesture model: {', '.join(model.names)} ({len(model.vectors)} poses, k={model.k})")
+    return model
+
+
+def load_frames(root, split=None, holdout=0.2):
+    """First-hand landmarks, label names and frame aspects of every labelled frame under root
+
+    split="train" / "test" keeps the first / last `holdout` share of each
+    session, so test frames are never neighbours of training frames.
+    """
+    landmarks, names, aspects = [], [], []
+    for path in find_sessions(root):
+        dataset = LandmarkDataset(path)
+        lm = np.asarray(dataset.landmarks[:, 0])
+        ids = np.asarray(dataset.label_ids).astype(np.int64)
+        rows = (ids >= 0) & ~np.isnan(lm[:, 0, 0])
+        cut = int(len(ids) * (1 - holdout))
+        if split == "train":
+            rows[cut:] = False
+        elif split == "test":
+            rows[:cut] = False
+        landmarks.append(lm[rows])
+        names.append(np.asarray(dataset.labels, dtype=object)[ids[rows]])
+        aspects.append(np.full(rows.sum(), dataset.width / dataset.height, np.float32))
+    if not landmarks:
+        return np.empty((0, POINTS, 3), np.float32), np.empty(0, dtype=object), np.empty(0, np.float32)
+    return np.concatenate(landmarks), np.concatenate(names), np.concatenate(aspects)
+
+
+def evaluate(model, landmarks, names, aspects=1.0):
+    """Print precision/recall per label on labelled frames"""
+    from tune_thresholds import precision_recall
+
+    started = time.perf_counter()
+    predicted = np.array([NONE_LABEL if p is None else p for p in model.predict(landmarks, aspects)], dtype=object)
+    elapsed = time.perf_counter() - started
+    truth = np.array(names, dtype=object)
+    print(f"   {len(truth)} frames classified in {elapsed * 1000:.0f} ms "
+          f"({elapsed / max(len(truth), 1) * 1e6:.1f} µs/frame batched)")
+    print(f"   {'gesture':<15}{'frames':>9}{'precision':>11}{'recall':>9}{'F1':>7}")
+    for name in sorted(set(truth.tolist()) | set(predicted.tolist())):
+        hit = (predicted == name) & (truth == name)
+        precision, recall, f1 = precision_recall(hit.sum(), (predicted == name).sum(), (truth == name).sum())
+        print(f"   {name:<15}{(truth == name).sum():>9}{precision:>11.3f}{recall:>9.3f}{f1:>7.3f}")
+    print(f"   accuracy {np.mean(predicted == truth):.3f}")
+
+
+def time_single_frame(model, landmarks, frames=500):
+    """Average classify() time for one hand, the way the modes call it"""
+    class Point:
+        __slots__ = ("x", "y", "z")
+
+    class Hand:
+        def __init__(self, points):
+            self.landmark = []
+            for x, y, z in points:
+                p = Point()
+                p.x, p.y, p.z = float(x), float(y), float(z)
+                self.landmark.append(p)
+
+    hands = [Hand(landmarks[i % len(landmarks)]) for i in range(min(frames, len(landmarks)))]
+    started = time.perf_counter()
+    for hand in hands:
+        model.classify(hand)
+    return (time.perf_counter() - started) / len(hands)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate the k-NN gesture classifier")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="train from recorded sessions (see landmark_dataset.py record)")
+    train.add_argument("root", help="a session directory or a directory of sessions")
+    train.add_argument("-o", "--output", required=True, help="model file (.npz)")
+    train.add_argument("--k", type=int, default=5)
+    train.add_argument("--max-per-label", type=int, default=600, help="training poses kept per label")
+    train.add_argument("--holdout", type=float, default=0.2, help="share of each session held out for evaluation")
+
+    test = sub.add_parser("evaluate", help="batch-classify recorded sessions with a trained model")
+    test.add_argument("root")
+    test.add_argument("--model", default=MODEL_PATH, required=MODEL_PATH is None)
+
+    args = parser.parse_args()
+    if args.command == "train":
+        landmarks, names, aspects = load_frames(args.root, "train" if args.holdout else None, args.holdout)
+        if not len(landmarks):
+            print(f"❌ No labelled frames under {args.root}")
+            return
+        started = time.perf_counter()
+        model = GestureClassifier.train(landmarks, names, args.k, args.max_per_label, aspect=aspects)
+        print(f"🧠 Trained on {len(model.vectors)} of {len(landmarks)} frames in {time.perf_counter() - started:.2f} s")
+        model.save(args.output)
+        print(f"💾 Saved {args.output}")
+        if args.holdout:
+            test_landmarks, test_names, test_aspects = load_frames(args.root, "test", args.holdout)
+            print(f"\n📊 Held-out last {args.holdout:.0%} of each session")
+            evaluate(model, test_landmarks, test_names, test_aspects)
+        print(f"⏱️  {time_single_frame(model, landmarks) * 1e6:.0f} µs per single-frame classify")
+    else:
+        model = GestureClassifier.load(args.model)
+        landmarks, names, aspects = load_frames(args.root)
+        if not len(landmarks):
+            print(f"❌ No labelled frames under {args.root}")
+            return
+        print(f"📊 {args.root}")
+        evaluate(model, landmarks, names, aspects)
+        print(f"⏱️  {time_single_frame(model, landmarks) * 1e6:.0f} µs per single-frame classify")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# gestures.py - Single-frame hand gesture predicates shared by the modes and the tools
+FINGER_TIPS = [8, 12, 16, 20]
+FINGER_PIPS = [6, 10, 14, 18]
+
+GESTURES = [
+    "fist", "five_fingers", "four_fingers", "three_fingers", "thumbs_up",
+    "pinky_only", "rock_sign", "peace_sign", "pointing",
+]
+
+
+def finger_states(landmarks):
+    """Returns list of which fingers are up [thumb, index, middle, ring, pinky]"""
+    lm = landmarks.landmark
+    fingers = [1 if lm[4].x < lm[3].x else 0]
+    for tip_id, pip_id in zip(FINGER_TIPS, FINGER_PIPS):
+        fingers.append(1 if lm[tip_id].y < lm[pip_id].y else 0)
+    return fingers
+
+
+def count_extended_fingers(landmarks):
+    return sum(finger_states(landmarks))
+
+
+def is_fist(landmarks):
+    """Thumb across the palm and every fingertip below its PIP joint"""
+    lm = landmarks.landmark
+    if lm[4].x <= lm[2].x:
+        return False
+    return all(lm[tip_id].y > lm[pip_id].y for tip_id, pip_id in zip(FINGER_TIPS, FINGER_PIPS))
+
+
+def is_rock_sign(landmarks):
+    """Index and pinky extended, middle and ring closed (thumb either way)"""
+    return finger_states(landmarks)[1:] == [1, 0, 0, 1]
+
+
+def classify_hand(landmarks):
+    """Name of the gesture one hand is making, using Gesture Mode's rules"""
+    fingers = finger_states(landmarks)
+    extended = sum(fingers)
+
+    if is_fist(landmarks):
+        return "fist"
+    if extended == 5:
+        return "five_fingers"
+    if extended == 3:
+        return "three_fingers"
+    if fingers == [1, 0, 0, 0, 0]:
+        return "thumbs_up"
+    if fingers[1:] == [0, 0, 0, 1]:
+        return "pinky_only"
+    if fingers[1:] == [1, 0, 0, 1]:
+        return "rock_sign"
+    if fingers == [0, 1, 1, 0, 0]:
+        return "peace_sign"
+    if extended == 4:
+        return "four_fingers"
+    if fingers[1:] == [1, 0, 0, 0]:
+        return "pointing"
+    return None
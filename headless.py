@@ -0,0 +1,146 @@
+# headless.py - Runs the menu and modes without a display, camera or real mouse/keyboard
+import os
+import sys
+import time
+import argparse
+import importlib
+
+import numpy as np
+
+from inference_pool import PoolResults
+
+# Recorded landmark session (landmark_dataset.py) replayed in place of MediaPipe
+LANDMARK_SOURCE = os.environ.get("HAND_LANDMARK_SOURCE")
+
+MODES = {
+    "menu": ("menu", "MainMenu"),
+    "mouse": ("mouse_mode", "MouseMode"),
+    "draw": ("draw_mode", "DrawingMode"),
+    "gesture": ("emote_mode", "GestureMode"),
+}
+
+
+class ReplayHands:
+    """Stands in for a MediaPipe Hands graph and returns recorded landmarks
+
+    landmarks is (frames, hands, 21, 3) with NaN where a hand is missing -
+    the landmark column of a recorded session, or an array built by a test.
+    Each process() call returns the next frame, whatever image it is given.
+    The tracker mirrors x afterwards, so it is un-mirrored here.
+    """
+
+    def __init__(self, landmarks, loop=True):
+        self.landmarks = landmarks
+        self.loop = loop
+        self.index = 0
+        self.done = False
+
+    @classmethod
+    def from_session(cls, path, loop=True):
+        from landmark_dataset import LandmarkDataset
+        return cls(LandmarkDataset(path).landmarks, loop)
+
+    def process(self, rgb):
+        if self.index >= len(self.landmarks):
+            if not self.loop or not len(self.landmarks):
+                self.done = True
+                return PoolResults([])
+            self.index = 0
+        frame = self.landmarks[self.index]
+        self.index += 1
+        hands = []
+        for points in frame:
+            if np.isnan(points[0, 0]):
+                continue
+            hands.append(([(1.0 - x, y, z) for x, y, z in points.tolist()], "Right", 1.0))
+        return PoolResults(hands)
+
+    def close(self):
+        pass
+
+
+def configure(source="synthetic", landmarks=None, record=None, pacing="fast"):
+    """Point everything at fake devices; call before importing the menu or a mode
+
+    Qt renders offscreen, frames come from source (synthetic by default),
+    landmarks optionally from a recorded session, and mouse/keyboard output
+    goes to the recording input backend, saved to record if given.
+    """
+    global LANDMARK_SOURCE
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ["HAND_VIDEO_PACING"] = pacing
+    os.environ["HAND_INPUT_BACKEND"] = "record"
+    os.environ["HAND_OCR_AUTOSTART"] = "0"
+    os.environ["HAND_IDLE_AFTER"] = "0"  # Wall-clock idling would make runs depend on machine speed
+    if record:
+        os.environ["HAND_INPUT_RECORD"] = record
+    if landmarks:
+        os.environ["HAND_LANDMARK_SOURCE"] = landmarks
+        LANDMARK_SOURCE = landmarks
+        if source == "synthetic":
+            # Match the frame size the landmarks were recorded at, so pixel thresholds hold
+            from landmark_dataset import LandmarkDataset
+            dataset = LandmarkDataset(landmarks)
+            source = f"synthetic:{dataset.width}x{dataset.height}"
+    os.environ["HAND_VIDEO_SOURCE"] = source
+
+
+def create_mode(name):
+    """Build the menu or a mode inside a (headless) QApplication"""
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    module_name, class_name = MODES[name]
+    mode = getattr(importlib.import_module(module_name), class_name)()
+    mode.timer.stop()  # The caller drives update_frame
+    return app, mode
+
+
+def drive(app, mode, frames):
+    """Call update_frame until frames are done or the source/replay runs out; per-call ms"""
+    latencies = []
+    cap = mode.cap
+    hands = getattr(mode.tracker, "hands", None)
+    while len(latencies) < frames and cap.isOpened() and not getattr(cap, "exhausted", False):
+        if getattr(hands, "done", False):
+            break
+        t0 = time.perf_counter()
+        mode.update_frame()
+        app.processEvents()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the menu or a mode headless and record its input events")
+    parser.add_argument("mode", choices=list(MODES))
+    parser.add_argument("--source", default="synthetic", help="video source spec")
+    parser.add_argument("--landmarks", help="recorded session to replay instead of running MediaPipe")
+    parser.add_argument("--frames", type=int, help="frames to run (default: the whole replay, or 300)")
+    parser.add_argument("--record", help="write the recorded input events here (JSON lines)")
+    args = parser.parse_args()
+
+    configure(args.source, args.landmarks, args.record)
+    frames = args.frames
+    if frames is None:
+        frames = len(ReplayHands.from_session(args.landmarks).landmarks) if args.landmarks else 300
+    app, mode = create_mode(args.mode)
+    backend = getattr(mode, "input", None)
+
+    start = time.perf_counter()
+    latencies = drive(app, mode, frames)
+    elapsed = time.perf_counter() - start
+    mode.cleanup()  # Waits for background typing, so its events are included
+    summary = backend.summary() if backend is not None else {}
+    typed = backend.typed_text() if backend is not None else ""
+
+    print(f"\n🧪 {args.mode}: {len(latencies)} frames in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed if elapsed > 0 else 0:.1f} fps)")
+    if summary:
+        print(f"   input events: {', '.join(f'{kind} {count}' for kind, count in sorted(summary.items()))}")
+    if typed:
+        print(f"   typed: {typed!r}")
+
+
+if __name__ == "__main__":
+    main()
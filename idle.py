@@ -0,0 +1,130 @@
+# idle.py - Drops to a cheap motion check when no hand has been seen for a while
+import os
+import time
+
+import cv2
+import numpy as np
+
+IDLE_AFTER = float(os.environ.get("HAND_IDLE_AFTER", "10"))  # Seconds without a hand; 0 disables
+IDLE_INTERVAL = float(os.environ.get("HAND_IDLE_INTERVAL", "0.2"))  # Seconds between idle checks
+
+
+class MotionDetector:
+    """Frame differencing on a tiny grayscale copy of the frame
+
+    Both the downscaled frame and the previous one live in preallocated
+    buffers, so a check costs one resize, one color conversion and one
+    absdiff on a 64x48 image.
+    """
+
+    def __init__(self, size=(64, 48), threshold=18, min_fraction=0.01):
+        self.size = size
+        self.threshold = threshold
+        self.min_pixels = max(1, int(size[0] * size[1] * min_fraction))
+        self.small = np.empty((size[1], size[0], 3), np.uint8)
+        self.gray = np.empty((size[1], size[0]), np.uint8)
+        self.previous = np.empty_like(self.gray)
+        self.diff = np.empty_like(self.gray)
+        self.primed = False
+
+    def reset(self):
+        self.primed = False
+
+    def moved(self, frame):
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        if not self.primed:
+            self.previous[:] = self.gray
+            self.primed = True
+            return False
+
+        cv2.absdiff(self.gray, self.previous, dst=self.diff)
+        self.previous[:] = self.gray
+        return int(np.count_nonzero(self.diff > self.threshold)) >= self.min_pixels
+
+
+class IdleMonitor:
+    """Tracks whether a hand has been seen recently and gates frames while idle
+
+    While idle, frames are only captured every `interval` seconds and are
+    shown to the motion detector instead of MediaPipe. The first frame with
+    motion wakes the tracker and is processed in full right away.
+    """
+
+    def __init__(self, idle_after=IDLE_AFTER, interval=IDLE_INTERVAL, detector=None):
+        self.idle_after = idle_after
+        self.interval = interval
+        self.detector = detector or MotionDetector()
+        self.idle = False
+        self.last_hand = time.perf_counter()
+        self.next_check = 0.0
+
+        # CPU accounting for the current and all past idle periods
+        self.idle_started = None
+        self.idle_cpu_started = None
+        self.idle_wall = 0.0
+        self.idle_cpu = 0.0
+        self.periods = 0
+
+    @property
+    def enabled(self):
+        return self.idle_after > 0
+
+    def hand_seen(self, count):
+        """Report how many hands the last full inference found"""
+        now = time.perf_counter()
+        if count:
+            self.last_hand = now
+        elif self.enabled and not self.idle and now - self.last_hand > self.idle_after:
+            self.enter_idle(now)
+
+    def enter_idle(self, now):
+        self.idle = True
+        self.next_check = now
+        self.detector.reset()
+        self.idle_started = now
+        self.idle_cpu_started = time.process_time()
+        self.periods += 1
+        print(f"💤 No hand for {self.idle_after:g}s - idling")
+
+    def leave_idle(self):
+        """Close the current idle period; returns its (wall, cpu) seconds"""
+        now = time.perf_counter()
+        wall = now - self.idle_started
+        cpu = time.process_time() - self.idle_cpu_started
+        self.idle_wall += wall
+        self.idle_cpu += cpu
+        self.idle = False
+        self.last_hand = now
+        return wall, cpu
+
+    def wake(self):
+        wall, cpu = self.leave_idle()
+        print(f"👋 Motion - waking after {wall:.0f}s idle at {cpu / max(wall, 1e-6):.1%} CPU")
+
+    def reset(self):
+        """Start active again, e.g. when the tracker switches to a new source"""
+        if self.idle:
+            self.leave_idle()
+        self.last_hand = time.perf_counter()
+
+    def wait_time(self):
+        """Seconds until the next idle check is due (0 when one is due now)"""
+        return max(0.0, self.next_check - time.perf_counter())
+
+    def check(self, frame):
+        """Look at one idle frame; returns True when it should wake the full pipeline"""
+        self.next_check = time.perf_counter() + self.interval
+        if self.detector.moved(frame):
+            self.wake()
+            return True
+        return False
+
+    def report(self):
+        wall, cpu = self.idle_wall, self.idle_cpu
+        if self.idle:
+            wall += time.perf_counter() - self.idle_started
+            cpu += time.process_time() - self.idle_cpu_started
+        if wall <= 0:
+            return "never idle"
+        return f"{self.periods} idle period(s), {wall:.0f}s total at {cpu / wall:.1%} CPU"
@@ -0,0 +1,242 @@
+# inference_pool.py - MediaPipe Hands spread across worker processes
+import time
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class Landmark:
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class HandLandmarks:
+    """Stands in for MediaPipe's NormalizedLandmarkList (only .landmark is used)"""
+
+    def __init__(self, points):
+        self.landmark = [Landmark(x, y, z) for x, y, z in points]
+
+
+class Classification:
+    __slots__ = ("label", "score")
+
+    def __init__(self, label, score):
+        self.label = label
+        self.score = score
+
+
+class Handedness:
+    def __init__(self, label, score):
+        self.classification = [Classification(label, score)]
+
+
+class PoolResults:
+    """Same shape as the object returned by Hands.process()"""
+
+    def __init__(self, hands):
+        self.multi_hand_landmarks = [HandLandmarks(points) for points, _, _ in hands] or None
+        self.multi_handedness = [Handedness(label, score) for _, label, score in hands] or None
+
+
+def worker_main(shm_name, frame_shape, job_queue, result_queue, hands_options):
+    """Worker process: owns one Hands graph and reads frames out of shared memory"""
+    import mediapipe as mp_lib
+
+    hands = mp_lib.solutions.hands.Hands(**hands_options)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame_bytes = int(np.prod(frame_shape))
+
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            seq, slot = job
+            frame = np.ndarray(frame_shape, np.uint8, buffer=shm.buf, offset=slot * frame_bytes)
+            results = hands.process(frame)
+            del frame  # Drop the view before the slot can be reused
+
+            found = []
+            if results.multi_hand_landmarks:
+                for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+                    points = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+                    label, score = "", 0.0
+                    if results.multi_handedness and i < len(results.multi_handedness):
+                        classification = results.multi_handedness[i].classification[0]
+                        label, score = classification.label, classification.score
+                    found.append((points, label, score))
+            result_queue.put((seq, slot, found))
+    finally:
+        hands.close()
+        shm.close()
+
+
+class InferencePool:
+    """Round-robins frames over worker processes and returns results in frame order
+
+    Frames are written into slots of one shared memory block, so only a slot
+    index crosses the process boundary. A reorder buffer holds results that
+    finish early until every earlier frame is back, which keeps the order
+    mouse mode relies on for clicks and drags. Note that each worker only
+    sees every Nth frame, so MediaPipe's frame-to-frame tracking is weaker
+    than with a single graph. A worker that dies has its frames counted as
+    lost and their slots reclaimed; it is restarted up to max_restarts times
+    and otherwise left out, so the pool keeps going on the workers it has.
+    """
+
+    def __init__(self, frame_shape, workers=2, hands_options=None, slots=None, max_restarts=3):
+        self.frame_shape = tuple(frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.workers = workers
+        self.slot_count = slots or workers * 3
+        self.hands_options = hands_options or {}
+        self.max_restarts = max_restarts
+
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_bytes * self.slot_count)
+        self.free_slots = queue.Queue()
+        for slot in range(self.slot_count):
+            self.free_slots.put(slot)
+
+        self.ctx = mp.get_context("spawn")
+        self.result_queue = self.ctx.Queue()
+        self.job_queues = [None] * workers
+        self.processes = [None] * workers
+        self.restarts = [0] * workers
+        self.retired = [False] * workers
+        for index in range(workers):
+            self.start_worker(index)
+
+        self.lock = threading.Lock()
+        self.next_submit = 0
+        self.next_worker = 0
+        self.next_emit = 0
+        self.pending = {}
+        self.submit_times = {}
+        self.in_flight = {}  # seq -> (worker, slot) until its result is back
+        self.lost = set()  # seqs whose worker died before answering
+        self.last_health_check = 0.0
+        self.dropped = 0
+        self.skipped = 0
+
+    def start_worker(self, index):
+        job_queue = self.ctx.Queue()
+        process = self.ctx.Process(
+            target=worker_main,
+            args=(self.shm.name, self.frame_shape, job_queue, self.result_queue, self.hands_options),
+            daemon=True,
+        )
+        process.start()
+        self.job_queues[index] = job_queue
+        self.processes[index] = process
+
+    def check_workers(self, interval=0.5):
+        """Reclaim the slots of dead workers and restart them (call with the lock held)"""
+        now = time.perf_counter()
+        if now - self.last_health_check < interval:
+            return
+        self.last_health_check = now
+        for index, process in enumerate(self.processes):
+            if self.retired[index] or process.is_alive():
+                continue
+            for seq, (worker, slot) in list(self.in_flight.items()):
+                if worker == index:
+                    del self.in_flight[seq]
+                    self.lost.add(seq)
+                    self.free_slots.put(slot)
+            if self.restarts[index] < self.max_restarts:
+                self.restarts[index] += 1
+                print(f"⚠️  Inference worker {index} exited ({process.exitcode}), restarting")
+                self.start_worker(index)
+            else:
+                self.retired[index] = True
+                print(f"❌ Inference worker {index} keeps exiting, continuing without it")
+
+    def slot_view(self, slot):
+        return np.ndarray(self.frame_shape, np.uint8, buffer=self.shm.buf, offset=slot * self.frame_bytes)
+
+    def acquire_slot(self, timeout=None):
+        """Return a free slot index, or None (counted as a dropped frame) if none frees up in time"""
+        try:
+            return self.free_slots.get(timeout=timeout) if timeout else self.free_slots.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return None
+
+    def submit(self, slot):
+        """Hand a filled slot to the next worker; returns the frame's sequence number (None if none are left)"""
+        with self.lock:
+            self.check_workers()
+            live = [index for index in range(self.workers) if not self.retired[index]]
+            if not live:
+                self.free_slots.put(slot)
+                self.dropped += 1
+                return None
+            worker = live[self.next_worker % len(live)]
+            self.next_worker += 1
+            seq = self.next_submit
+            self.next_submit += 1
+            self.submit_times[seq] = time.perf_counter()
+            self.in_flight[seq] = (worker, slot)
+            job_queue = self.job_queues[worker]
+        job_queue.put((seq, slot))
+        return seq
+
+    def get(self, timeout=0.05):
+        """Return the next (seq, results, latency_s) in frame order, or None if it isn't back yet"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            with self.lock:
+                self.check_workers()
+                while self.next_emit in self.lost:
+                    self.lost.discard(self.next_emit)
+                    self.submit_times.pop(self.next_emit, None)
+                    self.next_emit += 1
+                    self.skipped += 1
+                if self.next_emit in self.pending:
+                    return self.pop_next()
+                # A result that never comes back (e.g. a crashed worker) must not stall everything
+                if len(self.pending) > self.slot_count:
+                    oldest = min(self.pending)
+                    for seq in range(self.next_emit, oldest):
+                        self.submit_times.pop(seq, None)
+                        self.lost.discard(seq)
+                    self.skipped += oldest - self.next_emit
+                    self.next_emit = oldest
+                    return self.pop_next()
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            try:
+                seq, slot, found = self.result_queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            with self.lock:
+                if self.in_flight.pop(seq, None) is None:
+                    continue  # Already written off when its worker was found dead
+                self.pending[seq] = found
+            self.free_slots.put(slot)
+
+    def pop_next(self):
+        seq = self.next_emit
+        self.next_emit += 1
+        found = self.pending.pop(seq)
+        latency = time.perf_counter() - self.submit_times.pop(seq, time.perf_counter())
+        return seq, PoolResults(found), latency
+
+    def close(self):
+        for job_queue in self.job_queues:
+            job_queue.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.shm.close()
+        self.shm.unlink()
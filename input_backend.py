@@ -0,0 +1,444 @@
+# input_backend.py - Pluggable mouse/keyboard output: pyautogui, X11 XTest or Linux uinput
+import os
+import json
+import time
+import inspect
+import threading
+import subprocess
+
+from lazy import LazyModule
+
+# pyautogui, xtest, uinput, record or auto (XTest when an X display is reachable, else uinput, else pyautogui)
+INPUT_BACKEND = os.environ.get("HAND_INPUT_BACKEND", "auto")
+# With the record backend: JSON-lines file the recorded events are written to on close
+RECORD_PATH = os.environ.get("HAND_INPUT_RECORD")
+
+BUTTONS = {"left": 1, "middle": 2, "right": 3}
+
+
+def screen_size():
+    """Size of the primary screen, from Qt when an application is running, else from X"""
+    try:
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance()
+        if app is not None and app.primaryScreen() is not None:
+            geometry = app.primaryScreen().geometry()
+            return geometry.width(), geometry.height()
+    except ImportError:
+        pass
+    try:
+        from Xlib import display
+        connection = display.Display()
+        screen = connection.screen()
+        connection.close()
+        return screen.width_in_pixels, screen.height_in_pixels
+    except Exception:
+        return 1920, 1080
+
+
+class InputBackend:
+    """Sends synthetic mouse and keyboard events
+
+    Backends implement move(), button() and key(); clicks, hotkeys and typing
+    are built from those. Calls are serialized with a lock because the modes
+    type from background threads while the GUI thread moves the cursor.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.screen = None
+        self.unknown_keys = set()  # Keys already reported as missing, so typing warns once each
+
+    def size(self):
+        if self.screen is None:
+            self.screen = screen_size()
+        return self.screen
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def button(self, button, down):
+        raise NotImplementedError
+
+    def key(self, key, down):
+        """key is a name like "ctrl", "enter", "space" or a single character"""
+        raise NotImplementedError
+
+    def skip_key(self, key):
+        """Note a key this backend cannot send; it is dropped instead of failing the whole write"""
+        if key not in self.unknown_keys:
+            self.unknown_keys.add(key)
+            print(f"⚠️  {self.name} input has no key for {key!r}, skipping it")
+
+    def mouse_down(self, button="left"):
+        with self.lock:
+            self.button(button, True)
+
+    def mouse_up(self, button="left"):
+        with self.lock:
+            self.button(button, False)
+
+    def click(self, button="left", clicks=1):
+        with self.lock:
+            for _ in range(clicks):
+                self.button(button, True)
+                self.button(button, False)
+
+    def right_click(self):
+        self.click("right")
+
+    def double_click(self):
+        self.click("left", 2)
+
+    def press(self, key):
+        with self.lock:
+            self.key(key, True)
+            self.key(key, False)
+
+    def hotkey(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.key(key, True)
+            for key in reversed(keys):
+                self.key(key, False)
+
+    def write(self, text):
+        for char in text:
+            self.press(char)
+
+    def move_to(self, x, y):
+        with self.lock:
+            self.move(int(x), int(y))
+
+    def run(self, command):
+        """Run a system command the user asked for by gesture (shutdown, launching a mode); its exit code"""
+        return subprocess.run(command).returncode
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    """The original pyautogui calls, with its global PAUSE set to pause"""
+
+    name = "pyautogui"
+
+    def __init__(self, pause=0.0):
+        def configure(module):
+            module.FAILSAFE = False
+            module.PAUSE = pause
+
+        # Still imported on first use, so choosing this backend costs nothing at startup
+        self.pyautogui = LazyModule("pyautogui", configure)
+        super().__init__()
+
+    def size(self):
+        return tuple(self.pyautogui.size())
+
+    def move(self, x, y):
+        self.pyautogui.moveTo(x, y, duration=0)
+
+    def button(self, button, down):
+        if down:
+            self.pyautogui.mouseDown(button=button)
+        else:
+            self.pyautogui.mouseUp(button=button)
+
+    def key(self, key, down):
+        if down:
+            self.pyautogui.keyDown(key)
+        else:
+            self.pyautogui.keyUp(key)
+
+    def write(self, text):
+        with self.lock:
+            self.pyautogui.write(text)
+
+
+class XTestBackend(InputBackend):
+    """Fake input through the XTest extension on one persistent X connection (python-xlib)"""
+
+    name = "xtest"
+    KEYSYMS = {
+        "ctrl": "Control_L", "shift": "Shift_L", "alt": "Alt_L", "enter": "Return", "return": "Return",
+        "space": "space", "tab": "Tab", "backspace": "BackSpace", "esc": "Escape", "delete": "Delete",
+        "left": "Left", "right": "Right", "up": "Up", "down": "Down", "\n": "Return",
+    }
+
+    def __init__(self, display_name=None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        self.X, self.XK, self.xtest = X, XK, xtest
+        self.display = display.Display(display_name)
+        if not self.display.has_extension("XTEST"):
+            raise RuntimeError("X server has no XTEST extension")
+        self.keycodes = {}
+        self.shift = self.display.keysym_to_keycode(XK.string_to_keysym("Shift_L"))
+        super().__init__()
+        screen = self.display.screen()
+        self.screen = screen.width_in_pixels, screen.height_in_pixels
+
+    def keycode(self, key):
+        """(keycode, needs shift) for a key name or character, cached; None if the keymap lacks it"""
+        if key not in self.keycodes:
+            if key in self.KEYSYMS or len(key) > 1:
+                keysym = self.XK.string_to_keysym(self.KEYSYMS.get(key, key))
+            else:
+                keysym = ord(key)  # Latin-1 keysyms equal their code points
+            keycode = self.display.keysym_to_keycode(keysym) if keysym else 0
+            if not keycode:
+                self.keycodes[key] = None
+            else:
+                shifted = self.display.keycode_to_keysym(keycode, 0) != keysym
+                self.keycodes[key] = (keycode, shifted)
+        return self.keycodes[key]
+
+    def move(self, x, y):
+        self.xtest.fake_input(self.display, self.X.MotionNotify, x=x, y=y)
+        self.display.sync()
+
+    def button(self, button, down):
+        event = self.X.ButtonPress if down else self.X.ButtonRelease
+        self.xtest.fake_input(self.display, event, BUTTONS[button])
+        self.display.sync()
+
+    def key(self, key, down):
+        mapped = self.keycode(key)
+        if mapped is None:
+            self.skip_key(key)
+            return
+        keycode, shifted = mapped
+        if shifted and down:
+            self.xtest.fake_input(self.display, self.X.KeyPress, self.shift)
+        self.xtest.fake_input(self.display, self.X.KeyPress if down else self.X.KeyRelease, keycode)
+        if shifted and not down:
+            self.xtest.fake_input(self.display, self.X.KeyRelease, self.shift)
+        self.display.sync()
+
+    def close(self):
+        if self.display is not None:
+            self.display.close()
+            self.display = None
+
+
+class UInputBackend(InputBackend):
+    """A virtual kernel input device (python-evdev); works under X, Wayland and the console
+
+    Needs write access to /dev/uinput. Keys map through a US layout. The
+    pointer is an absolute device scaled to the screen size.
+    """
+
+    name = "uinput"
+    SHIFTED = {"!": "1", "@": "2", "#": "3", "$": "4", "%": "5", "^": "6", "&": "7", "*": "8", "(": "9",
+               ")": "0", "_": "-", "+": "=", "{": "[", "}": "]", "|": "\\", ":": ";", '"': "'",
+               "<": ",", ">": ".", "?": "/", "~": "`"}
+    CHARS = {"-": "MINUS", "=": "EQUAL", "[": "LEFTBRACE", "]": "RIGHTBRACE", "\\": "BACKSLASH",
+             ";": "SEMICOLON", "'": "APOSTROPHE", ",": "COMMA", ".": "DOT", "/": "SLASH", "`": "GRAVE",
+             " ": "SPACE", "\n": "ENTER", "\t": "TAB"}
+    NAMES = {"ctrl": "LEFTCTRL", "shift": "LEFTSHIFT", "alt": "LEFTALT", "enter": "ENTER", "return": "ENTER",
+             "space": "SPACE", "tab": "TAB", "backspace": "BACKSPACE", "esc": "ESC", "delete": "DELETE",
+             "left": "LEFT", "right": "RIGHT", "up": "UP", "down": "DOWN"}
+    MOUSE_BUTTONS = {"left": "BTN_LEFT", "middle": "BTN_MIDDLE", "right": "BTN_RIGHT"}
+
+    def __init__(self):
+        from evdev import UInput, AbsInfo, ecodes
+        super().__init__()
+        self.ecodes = ecodes
+        width, height = self.size()
+        keys = [code for name, code in ecodes.ecodes.items() if name.startswith("KEY_") and code < 0x100]
+        self.keys = set(keys)  # The keyboard part of the device; other codes would be dropped silently
+        keys += [getattr(ecodes, name) for name in self.MOUSE_BUTTONS.values()]
+        capabilities = {
+            ecodes.EV_KEY: sorted(set(keys)),
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X, AbsInfo(0, 0, width - 1, 0, 0, 0)),
+                (ecodes.ABS_Y, AbsInfo(0, 0, height - 1, 0, 0, 0)),
+            ],
+        }
+        self.device = UInput(capabilities, name="hand-control")
+        time.sleep(0.2)  # Give udev and the compositor a moment to pick the device up
+
+    def code(self, key):
+        """(evdev key code, needs shift) for a key name or character; None if the device has no such key"""
+        shifted = False
+        if key in self.NAMES:
+            name = self.NAMES[key]
+        elif key in self.CHARS:
+            name = self.CHARS[key]
+        elif key in self.SHIFTED:
+            shifted = True
+            base = self.SHIFTED[key]
+            name = self.CHARS.get(base, base)
+        elif len(key) == 1 and key.isalnum():
+            shifted = key.isupper()
+            name = key.upper()
+        else:
+            name = key.upper()
+        code = getattr(self.ecodes, "KEY_" + name, None)
+        if code not in self.keys:
+            return None
+        return code, shifted
+
+    def move(self, x, y):
+        self.device.write(self.ecodes.EV_ABS, self.ecodes.ABS_X, x)
+        self.device.write(self.ecodes.EV_ABS, self.ecodes.ABS_Y, y)
+        self.device.syn()
+
+    def button(self, button, down):
+        self.device.write(self.ecodes.EV_KEY, getattr(self.ecodes, self.MOUSE_BUTTONS[button]), int(down))
+        self.device.syn()
+
+    def key(self, key, down):
+        mapped = self.code(key)
+        if mapped is None:
+            self.skip_key(key)
+            return
+        code, shifted = mapped
+        if shifted and down:
+            self.device.write(self.ecodes.EV_KEY, self.ecodes.KEY_LEFTSHIFT, 1)
+        self.device.write(self.ecodes.EV_KEY, code, int(down))
+        if shifted and not down:
+            self.device.write(self.ecodes.EV_KEY, self.ecodes.KEY_LEFTSHIFT, 0)
+        self.device.syn()
+
+    def close(self):
+        if self.device is not None:
+            self.device.close()
+            self.device = None
+
+
+class RecordingBackend(InputBackend):
+    """Records timestamped events instead of sending them, for headless runs and tests
+
+    Clicks, hotkeys, key presses, typed text and system commands are kept as
+    one event each, the way a mode asked for them; drags show up as mouse_down, moves and
+    mouse_up, and drags() pairs them up again.
+    """
+
+    name = "record"
+    KEY_TEXT = {"space": " ", "enter": "\n", "return": "\n", "tab": "\t"}
+
+    def __init__(self, path=None, size=(1920, 1080)):
+        super().__init__()
+        self.path = path if path is not None else RECORD_PATH
+        self.screen = tuple(size)
+        self.position = (0, 0)
+        self.events = []
+        self.started = time.perf_counter()
+
+    def record(self, kind, **fields):
+        event = {"t": time.perf_counter() - self.started, "type": kind}
+        event.update(fields)
+        self.events.append(event)
+
+    def move(self, x, y):
+        self.position = (x, y)
+        self.record("move", x=x, y=y)
+
+    def button(self, button, down):
+        x, y = self.position
+        self.record("mouse_down" if down else "mouse_up", button=button, x=x, y=y)
+
+    def key(self, key, down):
+        self.record("key_down" if down else "key_up", key=key)
+
+    def click(self, button="left", clicks=1):
+        with self.lock:
+            x, y = self.position
+            self.record("click", button=button, clicks=clicks, x=x, y=y)
+
+    def press(self, key):
+        with self.lock:
+            self.record("press", key=key)
+
+    def hotkey(self, *keys):
+        with self.lock:
+            self.record("hotkey", keys=list(keys))
+
+    def write(self, text):
+        with self.lock:
+            self.record("write", text=text)
+
+    def run(self, command):
+        # Never shut down the machine or start another mode from a headless run
+        with self.lock:
+            self.record("command", command=list(command))
+        return 0
+
+    def of_type(self, *kinds):
+        return [event for event in self.events if event["type"] in kinds]
+
+    def typed_text(self):
+        """Everything typed through press() and write(), as one string"""
+        parts = []
+        for event in self.of_type("press", "write"):
+            if event["type"] == "write":
+                parts.append(event["text"])
+            else:
+                parts.append(self.KEY_TEXT.get(event["key"], event["key"] if len(event["key"]) == 1 else ""))
+        return "".join(parts)
+
+    def drags(self):
+        """[(button, (x, y) pressed, (x, y) released, seconds held), ...]"""
+        drags, pressed = [], {}
+        for event in self.of_type("mouse_down", "mouse_up"):
+            if event["type"] == "mouse_down":
+                pressed[event["button"]] = event
+            elif event["button"] in pressed:
+                down = pressed.pop(event["button"])
+                drags.append((event["button"], (down["x"], down["y"]), (event["x"], event["y"]), event["t"] - down["t"]))
+        return drags
+
+    def summary(self):
+        counts = {}
+        for event in self.events:
+            counts[event["type"]] = counts.get(event["type"], 0) + 1
+        return counts
+
+    def close(self):
+        if self.path:
+            with open(self.path, "w") as f:
+                for event in self.events:
+                    f.write(json.dumps(event) + "\n")
+            print(f"💾 {len(self.events)} input events recorded to {self.path}")
+            self.path = None
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "xtest": XTestBackend,
+    "uinput": UInputBackend,
+    "record": RecordingBackend,
+}
+
+
+def backend_options(backend, options):
+    """The options a backend's constructor takes, so "auto" can pass them to whichever it picks"""
+    accepted = inspect.signature(backend.__init__).parameters
+    return {key: value for key, value in options.items() if key in accepted}
+
+
+def open_backend(name=None, **options):
+    """Create the configured backend; "auto" picks the fastest one that works here"""
+    name = name or INPUT_BACKEND
+    if name != "auto":
+        backend = BACKENDS[name](**options)
+    else:
+        backend = None
+        candidates = []
+        if os.environ.get("DISPLAY"):
+            candidates.append("xtest")
+        if os.access("/dev/uinput", os.W_OK):
+            candidates.append("uinput")
+        for candidate in candidates:
+            try:
+                backend = BACKENDS[candidate](**backend_options(BACKENDS[candidate], options))
+                break
+            except Exception as e:
+                print(f"⚠️  {candidate} input unavailable: {e}")
+        if backend is None:
+            backend = PyAutoGUIBackend(**backend_options(PyAutoGUIBackend, options))
+    print(f"⌨️  Input backend: {backend.name}")
+    return backend
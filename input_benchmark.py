@@ -0,0 +1,151 @@
+# input_benchmark.py - Per-event latency and maximum event rate of each input backend under Xvfb
+import os
+import time
+import shutil
+import argparse
+import subprocess
+
+from input_backend import BACKENDS, open_backend
+
+# Backends that actually send events; "record" only keeps them in memory
+SENDING = [name for name in BACKENDS if name != "record"]
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def start_xvfb(display, width, height):
+    """Start a private Xvfb server and point DISPLAY at it"""
+    if not shutil.which("Xvfb"):
+        raise RuntimeError("Xvfb is not installed (apt install xvfb)")
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", f"{width}x{height}x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket_path = f"/tmp/.X11-unix/X{display.lstrip(':')}"
+    deadline = time.time() + 10
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.time() > deadline:
+            process.kill()
+            raise RuntimeError(f"Xvfb {display} did not start")
+        time.sleep(0.05)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+class PointerProbe:
+    """Watches the X pointer on its own connection to see when a move has landed"""
+
+    def __init__(self):
+        from Xlib import display
+        self.display = display.Display()
+        self.root = self.display.screen().root
+
+    def position(self):
+        pointer = self.root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def wait_for(self, x, y, timeout):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.position() == (x, y):
+                return True
+        return False
+
+    def close(self):
+        self.display.close()
+
+
+def measure(backend, probe, events, seconds, timeout):
+    width, height = backend.size()
+    points = [(width // 4, height // 4), (3 * width // 4, 3 * height // 4)]
+    call_us, delivered_us, lost = [], [], 0
+
+    for i in range(events):
+        x, y = points[i % 2]
+        t0 = time.perf_counter()
+        backend.move_to(x, y)
+        t1 = time.perf_counter()
+        call_us.append((t1 - t0) * 1e6)
+        if probe is not None:
+            if probe.wait_for(x, y, timeout):
+                delivered_us.append((time.perf_counter() - t0) * 1e6)
+            else:
+                lost += 1
+
+    def rate(send):
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            send(count)
+            count += 1
+        return count / (time.perf_counter() - started)
+
+    moves = rate(lambda i: backend.move_to(*points[i % 2]))
+    keys = rate(lambda i: backend.press("shift"))
+    return {
+        "call": call_us,
+        "delivered": delivered_us,
+        "lost": lost,
+        "moves_per_s": moves,
+        "keys_per_s": keys,
+    }
+
+
+def format_us(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the mouse/keyboard input backends")
+    parser.add_argument("backends", nargs="*", choices=SENDING, help="backends to measure (default: all)")
+    parser.add_argument("--events", type=int, default=500, help="cursor moves timed one by one")
+    parser.add_argument("--seconds", type=float, default=1.0, help="length of each max-rate burst")
+    parser.add_argument("--timeout", type=float, default=0.1, help="seconds to wait for a move to reach the X server")
+    parser.add_argument("--display", default=":87", help="Xvfb display to start")
+    parser.add_argument("--size", default="1920x1080", help="Xvfb screen size")
+    parser.add_argument("--no-xvfb", action="store_true", help="use the current $DISPLAY instead of starting Xvfb")
+    args = parser.parse_args()
+
+    xvfb = None
+    if not args.no_xvfb:
+        width, height = (int(v) for v in args.size.split("x"))
+        xvfb = start_xvfb(args.display, width, height)
+        print(f"🖥️  Xvfb on {args.display} ({args.size})")
+
+    rows = []
+    try:
+        probe = PointerProbe()
+        for name in args.backends or SENDING:
+            try:
+                backend = open_backend(name)
+            except Exception as e:
+                print(f"⚠️  {name}: unavailable ({e})")
+                continue
+            try:
+                # Xvfb has no input devices, so uinput events never reach its pointer
+                result = measure(backend, None if name == "uinput" and xvfb else probe,
+                                 args.events, args.seconds, args.timeout)
+            finally:
+                backend.close()
+            rows.append((name, result))
+        probe.close()
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    print(f"\n{'backend':<11}{'call p50':>10}{'call p99':>10}{'seen p50':>10}{'seen p99':>10}{'lost':>6}"
+          f"{'moves/s':>10}{'keys/s':>9}")
+    for name, r in rows:
+        print(f"{name:<11}{format_us(percentile(r['call'], 0.5)):>10}{format_us(percentile(r['call'], 0.99)):>10}"
+              f"{format_us(percentile(r['delivered'], 0.5)):>10}{format_us(percentile(r['delivered'], 0.99)):>10}"
+              f"{r['lost']:>6}{r['moves_per_s']:>10.0f}{r['keys_per_s']:>9.0f}")
+    print("\nTimes in µs. 'call' is how long the call blocks the caller; 'seen' is until the X server "
+          "reports the pointer at the new position.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# landmark_dataset.py - Columnar on-disk format for recorded hand landmark sessions
+import os
+import json
+import time
+
+import numpy as np
+
+from gestures import GESTURES
+
+FORMAT_VERSION = 1
+MAX_HANDS = 2
+POINTS = 21
+# Labels a session can carry besides the single-frame gestures
+LABELS = ["none"] + GESTURES + ["pinch", "clap"]
+UNLABELED = -1
+
+# One file per column; every row is one frame
+LANDMARKS_FILE = "landmarks.f32"  # (frames, MAX_HANDS, 21, 3) float32, NaN where no hand
+LABELS_FILE = "labels.i2"  # (frames,) int16 index into meta["labels"], -1 = unlabeled
+TIMESTAMPS_FILE = "timestamps.f64"  # (frames,) float64 seconds since the epoch
+META_FILE = "meta.json"
+
+
+class LandmarkRecorder:
+    """Appends frames to a session directory
+
+    Columns are plain little-endian arrays appended to their own files, so a
+    session can be read back with np.memmap without parsing and without
+    loading it into memory. Rows are buffered and written in blocks.
+    """
+
+    def __init__(self, path, width, height, labels=LABELS, block=1024):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.width = width
+        self.height = height
+        self.labels = list(labels)
+        self.frames = 0
+        if os.path.exists(os.path.join(path, META_FILE)):
+            # Appending to an existing session keeps its label ids
+            existing = LandmarkDataset(path)
+            self.frames = existing.frames
+            self.labels = existing.labels + [name for name in self.labels if name not in existing.labels]
+        self.label_ids = {name: i for i, name in enumerate(self.labels)}
+
+        self.block = block
+        self.landmarks = np.full((block, MAX_HANDS, POINTS, 3), np.nan, np.float32)
+        self.label_column = np.empty(block, np.int16)
+        self.time_column = np.empty(block, np.float64)
+        self.pending = 0
+
+        self.files = [open(os.path.join(path, name), "ab") for name in (LANDMARKS_FILE, LABELS_FILE, TIMESTAMPS_FILE)]
+
+    def append(self, results, label=None, timestamp=None):
+        """Add one frame of Hands results (mirrored landmarks, as the modes see them)"""
+        row = self.pending
+        self.landmarks[row] = np.nan
+        for hand, hand_landmarks in enumerate((results.multi_hand_landmarks or [])[:MAX_HANDS]):
+            self.landmarks[row, hand] = [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark]
+        if label is not None and label not in self.label_ids:
+            # New gestures need no code changes: unknown names get the next id
+            self.label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        self.label_column[row] = self.label_ids[label] if label is not None else UNLABELED
+        self.time_column[row] = time.time() if timestamp is None else timestamp
+
+        self.pending += 1
+        if self.pending == self.block:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            for column, f in zip((self.landmarks, self.label_column, self.time_column), self.files):
+                f.write(column[:self.pending].tobytes())
+                f.flush()
+            self.frames += self.pending
+            self.pending = 0
+        self.write_meta()
+
+    def write_meta(self):
+        meta = {
+            "version": FORMAT_VERSION,
+            "frames": self.frames,
+            "max_hands": MAX_HANDS,
+            "width": self.width,
+            "height": self.height,
+            "labels": self.labels,
+        }
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def close(self):
+        self.flush()
+        for f in self.files:
+            f.close()
+
+
+class LandmarkDataset:
+    """Read-only memory-mapped view of one recorded session"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.frames = self.meta["frames"]
+        self.width = self.meta["width"]
+        self.height = self.meta["height"]
+        self.labels = self.meta["labels"]
+
+        shape = (self.frames, self.meta["max_hands"], POINTS, 3)
+        self.landmarks = self.open_column(LANDMARKS_FILE, np.float32, shape)
+        self.label_ids = self.open_column(LABELS_FILE, np.int16, (self.frames,))
+        self.timestamps = self.open_column(TIMESTAMPS_FILE, np.float64, (self.frames,))
+
+    def open_column(self, name, dtype, shape):
+        if self.frames == 0:
+            return np.empty(shape, dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self):
+        return self.frames
+
+    def label_names(self, ids):
+        return [self.labels[i] if i >= 0 else None for i in ids]
+
+    def counts(self):
+        ids, counts = np.unique(np.asarray(self.label_ids), return_counts=True)
+        return {self.labels[i] if i >= 0 else "unlabeled": int(n) for i, n in zip(ids, counts)}
+
+
+def find_sessions(root):
+    """Session directories under root (root itself if it is one)"""
+    if os.path.exists(os.path.join(root, META_FILE)):
+        return [root]
+    return sorted(os.path.join(root, name) for name in os.listdir(root)
+                  if os.path.exists(os.path.join(root, name, META_FILE)))
+
+
+def record(path, label, seconds, source=None):
+    """Track hands from a video source and record every frame under one label"""
+    from video_source import open_source
+    from tracking import HandTracker
+
+    cap = open_source(source)
+    tracker = HandTracker(cap, max_num_hands=MAX_HANDS, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+    recorder = None
+    deadline = time.time() + seconds
+    print(f"🔴 Recording '{label}' for {seconds:g}s into {path}")
+    try:
+        while time.time() < deadline and cap.isOpened() and not getattr(cap, "exhausted", False):
+            for frame_shape, results, _ in tracker.poll(timeout=0.05):
+                if recorder is None:
+                    recorder = LandmarkRecorder(path, frame_shape[1], frame_shape[0])
+                recorder.append(results, label)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tracker.close()
+        cap.release()
+        if recorder is not None:
+            recorder.close()
+            print(f"💾 {recorder.frames} frames in {path}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record and inspect landmark sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="record a labelled session from a video source")
+    rec.add_argument("path", help="session directory (appended to if it exists)")
+    rec.add_argument("--label", required=True, help=f"gesture name, e.g. {', '.join(LABELS)}")
+    rec.add_argument("--seconds", type=float, default=10.0)
+    rec.add_argument("--source", default=None, help="video source spec (defaults to the camera)")
+
+    info = sub.add_parser("info", help="frame and label counts for sessions under a directory")
+    info.add_argument("root")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.path, args.label, args.seconds, args.source)
+    else:
+        for path in find_sessions(args.root):
+            dataset = LandmarkDataset(path)
+            print(f"{path}: {len(dataset)} frames, {dataset.width}x{dataset.height}, {dataset.counts()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# lazy.py - Defers heavy imports until the first time they are actually used
+import time
+import importlib
+import threading
+
+# name -> seconds the deferred import took, for the startup benchmark
+LOAD_TIMES = {}
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access
+
+    setup(module), if given, runs once right after the import - the place
+    for settings like pyautogui.FAILSAFE that used to be applied at startup.
+    """
+
+    def __init__(self, name, setup=None):
+        self.__dict__["_name"] = name
+        self.__dict__["_setup"] = setup
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is not None:
+            return module
+        with self.__dict__["_lock"]:
+            if self.__dict__["_module"] is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self.__dict__["_name"])
+                if self.__dict__["_setup"] is not None:
+                    self.__dict__["_setup"](module)
+                LOAD_TIMES[self.__dict__["_name"]] = time.perf_counter() - started
+                self.__dict__["_module"] = module
+        return self.__dict__["_module"]
+
+    @property
+    def loaded(self):
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
@@ -1,15 +1,19 @@
 # main.py - Main menu system that launches different modes
 import sys
-import cv2
-import numpy as np
-import mediapipe as mp
 from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QtGui import QPainter, QPen, QFont, QColor
+from PyQt5.QtGui import QPainter
 from PyQt5.QtCore import Qt, QTimer
 import subprocess
 import os
+from ocr_server import OCRClient, AUTOSTART as OCR_AUTOSTART
+from video_source import open_source
+from startup import open_tracking
+from temporal import TemporalRecognizer
+from gestures import count_extended_fingers
+from overlay import CachedPanel
+from input_backend import INPUT_BACKEND, RecordingBackend
 
-mp_hands = mp.solutions.hands
+FRAME_BUS_ENABLED = os.environ.get("HAND_FRAME_BUS", "0") == "1"
 
 class MainMenu(QWidget):
     def __init__(self):
@@ -19,12 +23,25 @@ class MainMenu(QWidget):
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.showFullScreen()
         
-        # Camera setup
-        self.cap = cv2.VideoCapture(0)
-        self.hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
+        # Camera setup - with the frame bus a broker process owns the camera
+        # and the menu and every mode attach to its shared memory instead
+        self.broker = None
+        if FRAME_BUS_ENABLED:
+            from frame_bus import start_broker, BUS_NAME
+            self.broker = start_broker(os.environ.get("HAND_VIDEO_SOURCE", "camera"))
+            os.environ["HAND_VIDEO_SOURCE"] = f"bus:{BUS_NAME}"
+        self.cap, self.tracker, _ = open_tracking(classify=self.classify_mode, max_num_hands=1, min_detection_confidence=0.7, min_tracking_confidence=0.7)
 
-        self.gesture_cooldown = 0
+        self.gestures = TemporalRecognizer(hold_overrides={"QUIT": 400})
         self.active_process = None
+        # Headless runs record mode launches instead of starting a mode that would replay forever
+        self.input = RecordingBackend() if INPUT_BACKEND == "record" else None
+        self.panel = CachedPanel(365, 220, title_size=16, text_size=12, title_y=30,
+                                 line_x=15, first_line_y=60, line_step=35)
+
+        # Start the OCR service now so drawing mode never waits on the model
+        if OCR_AUTOSTART:
+            OCRClient().ensure_server(wait=False)
 
         # Timer
         self.timer = QTimer()
@@ -41,38 +58,9 @@ class MainMenu(QWidget):
         print("   4️⃣  fingers = QUIT APPLICATION")
         print("="*60 + "\n")
 
-    def count_extended_fingers(self, landmarks, frame_shape):
-        fingers = []
-        
-        # Thumb
-        thumb_tip = landmarks.landmark[4]
-        thumb_ip = landmarks.landmark[3]
-        if thumb_tip.x < thumb_ip.x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-        
-        # Other fingers
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        
-        for tip_id, pip_id in zip(finger_tips, finger_pips):
-            tip = landmarks.landmark[tip_id]
-            pip = landmarks.landmark[pip_id]
-            if tip.y < pip.y:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-        
-        return sum(fingers)
-
-    def check_mode_selection(self, landmarks, frame_shape):
-        self.gesture_cooldown = max(0, self.gesture_cooldown - 1)
-        
-        if self.gesture_cooldown > 0:
-            return None
-            
-        extended_fingers = self.count_extended_fingers(landmarks, frame_shape)
+    def classify_mode(self, landmarks, frame_shape):
+        """Map the finger count to a menu choice (stateless, safe off the GUI thread)"""
+        extended_fingers = count_extended_fingers(landmarks)
         
         mode = None
         if extended_fingers == 1:
@@ -83,12 +71,11 @@ class MainMenu(QWidget):
             mode = "GESTURE"
         elif extended_fingers == 4:
             mode = "QUIT"
-            
-        if mode:
-            self.gesture_cooldown = 30
-            
         return mode
 
+    def check_mode_selection(self, mode):
+        return self.gestures.update(mode)
+
     def launch_mode(self, mode):
         if mode == "QUIT":
             print("👋 Quitting application...")
@@ -98,8 +85,10 @@ class MainMenu(QWidget):
             
         print(f"\n🚀 Launching {mode} mode...")
         
-        # Stop camera and timer while subprocess runs
+        # Stop camera and timer while subprocess runs (on the frame bus this
+        # only detaches; the broker keeps the device open)
         self.timer.stop()
+        self.tracker.stop()
         self.cap.release()
         
         # Hide main window
@@ -115,73 +104,54 @@ class MainMenu(QWidget):
         if mode in mode_files:
             try:
                 # Run the mode script and wait for it to complete
-                subprocess.run([sys.executable, mode_files[mode]])
+                command = [sys.executable, mode_files[mode]]
+                if self.input is not None:
+                    self.input.run(command)
+                else:
+                    subprocess.run(command)
             except Exception as e:
                 print(f"❌ Error launching {mode}: {e}")
         
         # Restart camera and timer after subprocess exits
         print(f"\n📋 {mode} mode closed. Returning to main menu...\n")
-        self.cap = cv2.VideoCapture(0)
+        self.cap = open_source()
+        self.tracker.set_source(self.cap)
+        self.gestures.reset()
         self.timer.start(16)
         self.show()
 
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            return
-
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
+        for frame_shape, results, mode in self.tracker.poll():
+            if results.multi_hand_landmarks:
+                mode = self.check_mode_selection(mode)
+                if mode:
+                    self.launch_mode(mode)
+                    return
 
-        if results.multi_hand_landmarks:
-            mode = self.check_mode_selection(results.multi_hand_landmarks[0], frame.shape)
-            if mode:
-                self.launch_mode(mode)
-
-        self.update()
+        # The menu never changes, so there is nothing to repaint here
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
         
-        # Draw compact menu with white opaque background
-        menu_width = 365
-        menu_height = 220
+        # Compact menu with white opaque background, rendered once and reused
         margin = 20
-        
-        # Semi-transparent white background
-        painter.setBrush(QColor(255, 255, 255, 230))  # White with opacity
-        painter.setPen(QPen(QColor(0, 0, 0, 150), 2))
-        painter.drawRoundedRect(margin, margin, menu_width, menu_height, 10, 10)
-        
-        # Title
-        font = QFont('Arial', 16, QFont.Bold)
-        painter.setFont(font)
-        painter.setPen(QPen(Qt.black))
-        painter.drawText(margin + 10, margin + 30, "HAND CONTROL SYSTEM")
-        
-        # Instructions
-        small_font = QFont('Arial', 12)
-        painter.setFont(small_font)
-        
-        y_pos = margin + 60
-        instructions = [
+        self.panel.paint(painter, margin, margin, "HAND CONTROL SYSTEM", [
             "👆 1 finger   → Drawing Mode",
             "🤟 3 fingers → Mouse Mode", 
             "🖐️ 5 fingers → Gesture Mode",
             "🖖 4 fingers → Quit Application"
-        ]
-        
-        for instruction in instructions:
-            painter.drawText(margin + 15, y_pos, instruction)
-            y_pos += 35
+        ])
 
     def cleanup(self):
+        self.tracker.close()
         if self.cap:
             self.cap.release()
-        if self.hands:
-            self.hands.close()
+        if self.broker:
+            from frame_bus import stop_broker
+            stop_broker(self.broker)
+            self.broker = None
+        if self.input is not None:
+            self.input.close()
 
     def closeEvent(self, event):
         self.cleanup()
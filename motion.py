@@ -0,0 +1,216 @@
+# motion.py - Landmark history per hand and motion gestures (swipes, claps) built on it
+import time
+
+import numpy as np
+
+POINTS = 21
+PALM = 9  # Middle finger knuckle: steadier than the wrist while fingers move
+
+
+class LandmarkHistory:
+    """Fixed-size ring buffer of recent landmarks and timestamps for each hand slot
+
+    Everything is preallocated: pushing a frame writes into the next row and
+    compute() fills reused time-ordered, velocity and acceleration buffers, so
+    tracking motion costs no array allocations per frame. Hands are kept in
+    the same slot from frame to frame by matching palm positions, since
+    MediaPipe does not keep its hand order stable.
+    """
+
+    def __init__(self, capacity=32, hands=2):
+        self.capacity = capacity
+        self.hands = hands
+        self.points = np.zeros((hands, capacity, POINTS, 3), np.float32)
+        self.times = np.zeros((hands, capacity), np.float64)
+        self.head = [0] * hands  # next row to write
+        self.count = [0] * hands
+        self.single = 0  # slot of the only hand, when just one is in view
+        self.slots = []  # slot of each hand in the last update(), in MediaPipe's order
+
+        # Output of compute(), oldest sample first; only the first count rows are valid
+        self.ordered = np.zeros((hands, capacity, POINTS, 3), np.float32)
+        self.ordered_times = np.zeros((hands, capacity), np.float64)
+        self.velocity = np.zeros((hands, capacity, POINTS, 3), np.float32)  # count - 1 rows
+        self.acceleration = np.zeros((hands, capacity, POINTS, 3), np.float32)  # count - 2 rows
+        self.dt = np.zeros((hands, capacity), np.float64)
+        self.mid_dt = np.zeros((hands, capacity), np.float64)
+        self.arange = np.arange(capacity)
+        self.order = np.zeros(capacity, np.intp)
+
+    def clear(self, hand):
+        self.head[hand] = 0
+        self.count[hand] = 0
+
+    def push(self, hand, hand_landmarks, t):
+        row = self.points[hand, self.head[hand]]
+        for i, lm in enumerate(hand_landmarks.landmark):
+            row[i, 0] = lm.x
+            row[i, 1] = lm.y
+            row[i, 2] = lm.z
+        self.times[hand, self.head[hand]] = t
+        self.head[hand] = (self.head[hand] + 1) % self.capacity
+        self.count[hand] = min(self.count[hand] + 1, self.capacity)
+
+    def latest(self, hand, point=PALM):
+        """Newest (x, y) of one landmark, normalized"""
+        row = (self.head[hand] - 1) % self.capacity
+        return self.points[hand, row, point, 0], self.points[hand, row, point, 1]
+
+    def update(self, results, t=None):
+        """Add this frame's hands; slots whose hand disappeared are cleared"""
+        t = time.time() if t is None else t
+        hands = (results.multi_hand_landmarks or [])[:self.hands]
+        if len(hands) == 1 and self.hands == 2:
+            # One hand left: keep it in whichever slot it was already in
+            self.single = self.nearest_slot(hands[0])
+            self.push(self.single, hands[0], t)
+            self.clear(1 - self.single)
+            self.slots = [self.single]
+            return 1
+        self.single = 0
+        swap = len(hands) == 2 and self.swapped(hands)
+        self.slots = [1 - hand if swap else hand for hand in range(len(hands))]
+        for hand, hand_landmarks in enumerate(hands):
+            self.push(self.slots[hand], hand_landmarks, t)
+        for slot in range(len(hands), self.hands):
+            self.clear(slot)
+        return len(hands)
+
+    def nearest_slot(self, hand_landmarks):
+        if not self.count[1]:
+            return 0
+        if not self.count[0]:
+            return 1
+        p = hand_landmarks.landmark[PALM]
+        x0, y0 = self.latest(0)
+        x1, y1 = self.latest(1)
+        return 0 if (p.x - x0) ** 2 + (p.y - y0) ** 2 <= (p.x - x1) ** 2 + (p.y - y1) ** 2 else 1
+
+    def swapped(self, hands):
+        """Whether MediaPipe listed the two hands in the opposite order to last frame"""
+        if not self.count[0] or not self.count[1]:
+            return False
+        cost = 0.0
+        for hand, hand_landmarks in enumerate(hands):
+            p = hand_landmarks.landmark[PALM]
+            same_x, same_y = self.latest(hand)
+            other_x, other_y = self.latest(1 - hand)
+            cost += (p.x - same_x) ** 2 + (p.y - same_y) ** 2 - (p.x - other_x) ** 2 - (p.y - other_y) ** 2
+        return cost > 0
+
+    def compute(self, hand):
+        """Fill ordered positions, velocity and acceleration for one slot; returns the sample count
+
+        velocity[i] is the per-second change between samples i and i + 1 and
+        acceleration[i] the change of velocity between i and i + 1.
+        """
+        n = self.count[hand]
+        if n == 0:
+            return 0
+        order = self.order[:n]
+        np.add(self.arange[:n], self.head[hand] - n, out=order)
+        np.remainder(order, self.capacity, out=order)
+        np.take(self.points[hand], order, axis=0, out=self.ordered[hand, :n])
+        np.take(self.times[hand], order, out=self.ordered_times[hand, :n])
+
+        positions, times = self.ordered[hand], self.ordered_times[hand]
+        velocity, dt = self.velocity[hand], self.dt[hand]
+        if n >= 2:
+            np.subtract(times[1:n], times[:n - 1], out=dt[:n - 1])
+            np.maximum(dt[:n - 1], 1e-3, out=dt[:n - 1])
+            np.subtract(positions[1:n], positions[:n - 1], out=velocity[:n - 1])
+            np.divide(velocity[:n - 1], dt[:n - 1, None, None], out=velocity[:n - 1])
+        if n >= 3:
+            mid_dt, acceleration = self.mid_dt[hand], self.acceleration[hand]
+            np.add(dt[:n - 2], dt[1:n - 1], out=mid_dt[:n - 2])
+            np.multiply(mid_dt[:n - 2], 0.5, out=mid_dt[:n - 2])
+            np.subtract(velocity[1:n - 1], velocity[:n - 2], out=acceleration[:n - 2])
+            np.divide(acceleration[:n - 2], mid_dt[:n - 2, None, None], out=acceleration[:n - 2])
+        return n
+
+    def since(self, hand, n, t):
+        """Index of the first ordered sample at or after time t (call compute() first)"""
+        return int(np.searchsorted(self.ordered_times[hand, :n], t))
+
+
+class MotionGestures:
+    """Swipes and claps detected from motion rather than a single pose
+
+    A swipe is the palm travelling swipe_distance (share of the frame width)
+    within swipe_window seconds, mostly sideways and at speed. A clap is both
+    palms coming within clap_distance pixels while closing in at clap_speed
+    pixels/s, so hands simply held together no longer count; it re-arms once
+    the palms are release_distance apart again.
+    """
+
+    def __init__(self, history=None, swipe_distance=0.25, swipe_window=0.4, swipe_speed=1.2,
+                 clap_distance=100, clap_speed=400, clap_window=0.25, release_distance=180, cooldown=0.8):
+        self.history = history or LandmarkHistory()
+        self.swipe_distance = swipe_distance
+        self.swipe_window = swipe_window
+        self.swipe_speed = swipe_speed
+        self.clap_distance = clap_distance
+        self.clap_speed = clap_speed
+        self.clap_window = clap_window
+        self.release_distance = release_distance
+        self.cooldown = cooldown
+        self.clap_armed = True
+        self.last_event_time = 0.0
+
+    def update(self, results, frame_shape, now=None):
+        """Feed one frame; returns "clap", "swipe_left", "swipe_right" or None"""
+        now = time.time() if now is None else now
+        hands = self.history.update(results, now)
+        if hands < 2:
+            self.clap_armed = True
+        if now - self.last_event_time < self.cooldown:
+            return None
+
+        event = self.clap(frame_shape, now) if hands >= 2 else None
+        if event is None and hands == 1:
+            event = self.swipe(self.history.single, now)
+        if event is not None:
+            self.last_event_time = now
+        return event
+
+    def clap(self, frame_shape, now):
+        h, w = frame_shape[:2]
+        history = self.history
+        n = min(history.compute(0), history.compute(1))
+        if n < 2:
+            return None
+        # Both slots are pushed on the same frames, so their newest n samples line up
+        a, b = history.ordered[0, history.count[0] - n:], history.ordered[1, history.count[1] - n:]
+        distance = np.hypot((a[n - 1, PALM, 0] - b[n - 1, PALM, 0]) * w, (a[n - 1, PALM, 1] - b[n - 1, PALM, 1]) * h)
+        if distance > self.release_distance:
+            self.clap_armed = True
+        if not self.clap_armed or distance >= self.clap_distance:
+            return None
+
+        times = history.ordered_times[0, history.count[0] - n:]
+        start = min(int(np.searchsorted(times[:n], now - self.clap_window)), n - 2)
+        before = np.hypot((a[start, PALM, 0] - b[start, PALM, 0]) * w, (a[start, PALM, 1] - b[start, PALM, 1]) * h)
+        closing_speed = (before - distance) / max(times[n - 1] - times[start], 1e-3)
+        if closing_speed < self.clap_speed:
+            return None
+        self.clap_armed = False
+        return "clap"
+
+    def swipe(self, hand, now):
+        history = self.history
+        n = history.compute(hand)
+        if n < 3:
+            return None
+        start = min(history.since(hand, n, now - self.swipe_window), n - 3)
+        positions = history.ordered[hand]
+        dx = positions[n - 1, PALM, 0] - positions[start, PALM, 0]
+        dy = positions[n - 1, PALM, 1] - positions[start, PALM, 1]
+        if abs(dx) < self.swipe_distance or abs(dx) < 2 * abs(dy):
+            return None
+        # Peak sideways speed, so a slow drift across the frame is not a swipe
+        vx = history.velocity[hand, start:n - 1, PALM, 0]
+        peak = vx.max() if dx > 0 else -vx.min()
+        if peak < self.swipe_speed:
+            return None
+        history.clear(hand)
+        return "swipe_right" if dx > 0 else "swipe_left"
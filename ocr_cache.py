@@ -0,0 +1,219 @@
+# ocr_cache.py - LRU cache of OCR results keyed on the drawn ink
+import os
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Size every drawing is normalized to before hashing
+NORMALIZED_SIZE = (128, 32)
+HASH_SIZE = (17, 8)
+
+
+def crop_to_ink(gray, ink_threshold=128):
+    """Crop a white-background grayscale image to the bounding box of its dark ink"""
+    points = cv2.findNonZero((gray < ink_threshold).astype(np.uint8))
+    if points is None:
+        return None
+    x, y, w, h = cv2.boundingRect(points)
+    return gray[y:y + h, x:x + w]
+
+
+def normalize_ink(gray):
+    """Cropped ink scaled to a fixed size and binarized, so small shifts hash the same"""
+    cropped = crop_to_ink(gray)
+    if cropped is None:
+        return None
+    small = cv2.resize(cropped, NORMALIZED_SIZE, interpolation=cv2.INTER_AREA)
+    return (small < 128).astype(np.uint8)
+
+
+def content_key(normalized):
+    return hashlib.sha1(np.packbits(normalized).tobytes()).hexdigest()
+
+
+def perceptual_hash(gray):
+    """Difference hash (dHash) of the cropped ink as a 128 bit integer"""
+    cropped = crop_to_ink(gray)
+    if cropped is None:
+        return None
+    small = cv2.resize(cropped, HASH_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def ink_shape(gray, min_area=4):
+    """(aspect ratio, stroke count) of the cropped ink
+
+    The hash is taken after squashing the ink to a fixed size, so words of
+    different length or with a different number of strokes can hash close
+    together; these two tell them apart again. Specks under min_area pixels
+    are not counted as strokes.
+    """
+    cropped = crop_to_ink(gray)
+    if cropped is None:
+        return None, None
+    height, width = cropped.shape[:2]
+    count, _, stats, _ = cv2.connectedComponentsWithStats((cropped < 128).astype(np.uint8), connectivity=8)
+    strokes = int((stats[1:, cv2.CC_STAT_AREA] >= min_area).sum())
+    return width / height, strokes
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class OCRCache:
+    """Remembers recognized text for drawings already seen
+
+    Lookups try the exact normalized-bitmap key first, then the optional
+    on-disk tier, then the closest perceptual hash within max_distance bits.
+    Since a near hit gets typed like any other result, it also has to have
+    the same number of strokes and an aspect ratio within max_aspect_change.
+    The disk tier keeps at most disk_capacity entries, dropping the least
+    recently used.
+    """
+
+    def __init__(self, capacity=256, disk_dir=None, max_distance=4, max_aspect_change=0.15, disk_capacity=4096):
+        self.capacity = capacity
+        self.disk_dir = disk_dir
+        self.max_distance = max_distance
+        self.max_aspect_change = max_aspect_change
+        self.disk_capacity = disk_capacity
+        self.entries = OrderedDict()  # key -> (phash, aspect, strokes, text)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.near_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.disk_count = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self.disk_count = len(self.disk_files())
+
+    def keys_for(self, gray):
+        """(content key, perceptual hash, aspect ratio, stroke count), or Nones for a blank drawing"""
+        normalized = normalize_ink(gray)
+        if normalized is None:
+            return None, None, None, None
+        aspect, strokes = ink_shape(gray)
+        return content_key(normalized), perceptual_hash(gray), aspect, strokes
+
+    def similar_shape(self, aspect, strokes, other_aspect, other_strokes):
+        if other_aspect is None or strokes != other_strokes:
+            return False
+        return abs(math.log(aspect / other_aspect)) <= self.max_aspect_change
+
+    def get(self, gray):
+        """Return cached text for a grayscale drawing, or None on a miss"""
+        key, phash, aspect, strokes = self.keys_for(gray)
+        if key is None:
+            return None
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][3]
+
+            entry = self.load_from_disk(key)
+            if entry is not None:
+                self.store(key, entry["phash"], entry.get("aspect"), entry.get("strokes"), entry["text"])
+                self.disk_hits += 1
+                return entry["text"]
+
+            if self.max_distance > 0:
+                best_key, best_distance = None, self.max_distance + 1
+                for other_key, (other_phash, other_aspect, other_strokes, _) in self.entries.items():
+                    distance = hamming(phash, other_phash)
+                    if distance < best_distance and self.similar_shape(aspect, strokes, other_aspect, other_strokes):
+                        best_key, best_distance = other_key, distance
+                if best_key is not None:
+                    self.entries.move_to_end(best_key)
+                    self.near_hits += 1
+                    return self.entries[best_key][3]
+
+            self.misses += 1
+            return None
+
+    def put(self, gray, text):
+        key, phash, aspect, strokes = self.keys_for(gray)
+        if key is None:
+            return
+
+        with self.lock:
+            self.store(key, phash, aspect, strokes, text)
+            self.save_to_disk(key, phash, aspect, strokes, text)
+
+    def store(self, key, phash, aspect, strokes, text):
+        self.entries[key] = (phash, aspect, strokes, text)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def disk_files(self):
+        return [name for name in os.listdir(self.disk_dir) if name.endswith(".json")]
+
+    def load_from_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self.disk_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # Recently used entries survive eviction
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def save_to_disk(self, key, phash, aspect, strokes, text):
+        if not self.disk_dir:
+            return
+        path = self.disk_path(key)
+        is_new = not os.path.exists(path)
+        try:
+            with open(path, "w") as f:
+                json.dump({"phash": phash, "aspect": aspect, "strokes": strokes, "text": text}, f)
+        except OSError as e:
+            print(f"⚠️  Could not write OCR cache entry: {e}")
+            return
+        if is_new:
+            self.disk_count += 1
+            if self.disk_count > self.disk_capacity:
+                self.evict_from_disk()
+
+    def evict_from_disk(self):
+        """Delete the least recently used tenth of the disk tier"""
+        paths = [os.path.join(self.disk_dir, name) for name in self.disk_files()]
+        try:
+            paths.sort(key=os.path.getmtime)
+        except OSError:
+            pass
+        keep = self.disk_capacity - self.disk_capacity // 10
+        for path in paths[:max(0, len(paths) - keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.disk_count = len(self.disk_files())
+
+    def stats(self):
+        lookups = self.hits + self.near_hits + self.disk_hits + self.misses
+        hit_rate = (lookups - self.misses) / lookups if lookups else 0.0
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "hit_rate": hit_rate,
+        }
@@ -0,0 +1,336 @@
+# ocr_server.py - Long-lived TrOCR service shared by every mode launch
+import sys
+import os
+import io
+import json
+import time
+import socket
+import struct
+import tempfile
+import threading
+try:
+    import fcntl
+except ImportError:  # Windows: no Unix sockets either, so the service is never started
+    fcntl = None
+import subprocess
+import socketserver
+
+MODEL_NAME = 'microsoft/trocr-base-handwritten'
+SOCKET_PATH = os.environ.get("HAND_OCR_SOCKET", os.path.join(tempfile.gettempdir(), "hand_ocr.sock"))
+# Start the service as soon as the menu or drawing mode opens (0 = only on first use)
+AUTOSTART = os.environ.get("HAND_OCR_AUTOSTART", "1") == "1"
+
+# Every message is a 4 byte big-endian length followed by the payload.
+# Requests carry PNG bytes (an empty payload is a ping), replies carry JSON.
+HEADER = struct.Struct(">I")
+# After the service failed to load the model, clients use the fallback this long before asking again
+RETRY_AFTER = 300.0
+
+
+def send_message(sock, payload):
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("socket closed mid-message")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(recv_exact(sock, HEADER.size))
+    return recv_exact(sock, size)
+
+
+class TrOCREngine:
+    """TrOCR processor + model kept resident in one process"""
+
+    def __init__(self, model_name=MODEL_NAME):
+        self.model_name = model_name
+        self.processor = None
+        self.model = None
+        self.lock = threading.Lock()
+        # Set once load_in_background() has finished, successfully or not
+        self.ready = threading.Event()
+        self.error = None
+
+    @property
+    def status(self):
+        if not self.ready.is_set():
+            return "loading"
+        return "failed" if self.error else "ok"
+
+    def load_in_background(self, warm_up=True):
+        """Load (and warm up) on a thread so the socket can answer pings meanwhile"""
+        def run():
+            try:
+                self.load()
+                if warm_up:
+                    self.warm_up()
+            except Exception as e:
+                self.error = str(e)
+                print(f"❌ TrOCR failed to load: {e}")
+            finally:
+                self.ready.set()
+
+        threading.Thread(target=run, name="trocr-load", daemon=True).start()
+
+    def load(self):
+        from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+        print("Loading TrOCR model...")
+        self.processor = TrOCRProcessor.from_pretrained(self.model_name)
+        self.model = VisionEncoderDecoderModel.from_pretrained(self.model_name)
+        self.model.eval()
+        print("✅ TrOCR model loaded!")
+
+    def warm_up(self):
+        """Run one blank image through generate so the first real request is fast"""
+        from PIL import Image
+
+        start = time.time()
+        self.recognize(Image.new("RGB", (384, 96), "white"))
+        print(f"🔥 TrOCR warmed up in {(time.time() - start) * 1000:.0f} ms")
+
+    def recognize(self, image):
+        """Return the text TrOCR reads from a PIL image"""
+        if self.model is None:
+            self.load()
+
+        with self.lock:
+            pixel_values = self.processor(images=image.convert("RGB"), return_tensors="pt").pixel_values
+            generated_ids = self.model.generate(pixel_values)
+            return self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+
+
+class OCRRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        from PIL import Image
+
+        while True:
+            try:
+                payload = recv_message(self.request)
+            except ConnectionError:
+                return
+
+            engine = self.server.engine
+            if not payload:
+                reply = {"status": engine.status}
+                if engine.error:
+                    reply["error"] = engine.error
+            else:
+                start = time.time()
+                engine.ready.wait()
+                try:
+                    if engine.error:
+                        raise RuntimeError(f"model failed to load: {engine.error}")
+                    image = Image.open(io.BytesIO(payload))
+                    text = engine.recognize(image)
+                    reply = {"text": text, "ms": (time.time() - start) * 1000}
+                except Exception as e:
+                    reply = {"error": str(e)}
+
+            send_message(self.request, json.dumps(reply).encode("utf-8"))
+
+
+class OCRServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=SOCKET_PATH, engine=None):
+        # Only a socket nobody answers on is stale; a live one belongs to another server
+        if os.path.exists(socket_path):
+            if socket_in_use(socket_path):
+                raise RuntimeError(f"another OCR service is listening on {socket_path}")
+            os.unlink(socket_path)
+        self.engine = engine or TrOCREngine()
+        super().__init__(socket_path, OCRRequestHandler)
+        self.socket_path = socket_path
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def socket_in_use(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def acquire_server_lock(socket_path):
+    """Hold an exclusive lock next to the socket for the life of the process
+
+    Returns the open lock file, or None when another server already holds it,
+    so clients racing to start the service end up with a single server.
+    """
+    if fcntl is None:
+        return None
+    lock_file = open(socket_path + ".lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class OCRClient:
+    """Talks to the OCR service, starting it if needed, with an in-process fallback"""
+
+    def __init__(self, socket_path=SOCKET_PATH, timeout=60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.local_engine = None
+        self.failed_at = None
+        self.failure = None
+
+    @staticmethod
+    def supported():
+        return hasattr(socket, "AF_UNIX")
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def ping(self):
+        """The service's reply to a ping ({"status": "ok" / "loading" / "failed"}), or None if unreachable"""
+        if not self.supported():
+            return None
+        try:
+            with self.connect() as sock:
+                sock.settimeout(2.0)
+                send_message(sock, b"")
+                return json.loads(recv_message(sock))
+        except (OSError, ConnectionError, ValueError):
+            return None
+
+    def is_running(self):
+        reply = self.ping()
+        return reply is not None and reply.get("status") == "ok"
+
+    def note_failure(self, reply):
+        self.failed_at = time.time()
+        self.failure = reply.get("error", "unknown error")
+        print(f"⚠️  OCR service could not load the model: {self.failure}")
+
+    def ensure_server(self, wait=True):
+        """Start the OCR service in the background unless one is already up
+
+        A server that is still loading is never started twice; with wait the
+        call blocks until the model is ready. Returns False when the service
+        can't be used, including for a while after it failed to load.
+        """
+        if not self.supported():
+            return False
+        if self.failed_at is not None and time.time() - self.failed_at < RETRY_AFTER:
+            return False
+        reply = self.ping()
+        if reply is not None:
+            if reply.get("status") == "failed":
+                self.note_failure(reply)
+                return False
+            if reply.get("status") == "ok":
+                self.failure = None
+                return True
+            if not wait:
+                return True
+            return self.wait_until_ready()
+
+        script = os.path.abspath(__file__)
+        subprocess.Popen(
+            [sys.executable, script, "--socket", self.socket_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        print("🚀 Started OCR service in the background")
+        return self.wait_until_ready() if wait else True
+
+    def wait_until_ready(self):
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            reply = self.ping()
+            if reply is not None and reply.get("status") == "ok":
+                return True
+            if reply is not None and reply.get("status") == "failed":
+                self.note_failure(reply)
+                return False
+            time.sleep(0.2)
+        return False
+
+    def recognize_png(self, png_bytes):
+        """Send PNG bytes to the service and return the recognized text"""
+        if self.ensure_server():
+            with self.connect() as sock:
+                send_message(sock, png_bytes)
+                reply = json.loads(recv_message(sock))
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+            return reply["text"]
+
+        if self.failure is not None:
+            # The service couldn't load the model; loading it here would fail the same way
+            raise RuntimeError(f"TrOCR unavailable: {self.failure}")
+        if self.ping() is not None:
+            # A service is up but still loading past our timeout; a second copy of the
+            # model here would only compete with it for memory
+            raise RuntimeError("OCR service is still loading the model, try again shortly")
+
+        # No service available - load the model into this process instead
+        from PIL import Image
+
+        if self.local_engine is None:
+            print("⚠️  OCR service unavailable, loading TrOCR locally")
+            self.local_engine = TrOCREngine()
+        return self.local_engine.recognize(Image.open(io.BytesIO(png_bytes)))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident TrOCR handwriting recognition service")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path to listen on")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up inference")
+    args = parser.parse_args()
+
+    # Clients that raced to start the service: only the first one keeps running
+    lock = acquire_server_lock(args.socket)
+    if lock is None and fcntl is not None:
+        print("📡 Another OCR service is already starting or running")
+        return
+
+    # Listen before loading so pings get "loading" instead of spawning more servers
+    engine = TrOCREngine()
+    try:
+        server = OCRServer(args.socket, engine)
+    except RuntimeError as e:
+        print(f"📡 {e}")
+        return
+    engine.load_in_background(warm_up=not args.no_warmup)
+    print(f"📡 OCR service listening on {args.socket} (model loading)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# overlay.py - Info panels rendered once into a pixmap and reused until their text changes
+from PyQt5.QtGui import QPainter, QPen, QFont, QColor, QPixmap
+from PyQt5.QtCore import Qt, QRect
+
+
+class CachedPanel:
+    """Rounded translucent panel with a title and instruction lines
+
+    The panel is drawn into a QPixmap the first time and again only when the
+    title, the lines or the number of extra rows change, so a repaint costs
+    one pixmap blit. Extra rows leave blank space at the bottom for content
+    drawn live on top, like countdown progress.
+    """
+
+    def __init__(self, width, height, title_size=12, text_size=11, title_x=10, title_y=25,
+                 line_x=10, first_line_y=50, line_step=30, extra_row_height=30):
+        self.width = width
+        self.height = height
+        self.title_font = QFont('Arial', title_size, QFont.Bold)
+        self.text_font = QFont('Arial', text_size)
+        self.title_x = title_x
+        self.title_y = title_y
+        self.line_x = line_x
+        self.first_line_y = first_line_y
+        self.line_step = line_step
+        self.extra_row_height = extra_row_height
+
+        self.key = None
+        self.pixmap = None
+        self.renders = 0
+
+    def panel_height(self, extra_rows=0):
+        return self.height + extra_rows * self.extra_row_height
+
+    def rect(self, x, y, extra_rows=0):
+        """Area the panel covers, border included, for partial repaints"""
+        return QRect(x - 1, y - 1, self.width + 2, self.panel_height(extra_rows) + 2)
+
+    def render(self, title, lines, extra_rows):
+        height = self.panel_height(extra_rows)
+        pixmap = QPixmap(self.width + 2, height + 2)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(QColor(255, 255, 255, 230))  # White with opacity
+        painter.setPen(QPen(QColor(0, 0, 0, 150), 2))
+        # Offset by one pixel so the 2px border isn't clipped
+        painter.drawRoundedRect(1, 1, self.width, height, 10, 10)
+
+        painter.setFont(self.title_font)
+        painter.setPen(QPen(Qt.black))
+        painter.drawText(1 + self.title_x, 1 + self.title_y, title)
+
+        painter.setFont(self.text_font)
+        y_pos = 1 + self.first_line_y
+        for line in lines:
+            painter.drawText(1 + self.line_x, y_pos, line)
+            y_pos += self.line_step
+        painter.end()
+
+        self.renders += 1
+        return pixmap
+
+    def paint(self, painter, x, y, title, lines, extra_rows=0):
+        """Blit the panel at (x, y); returns the baseline for the first extra row"""
+        key = (title, tuple(lines), extra_rows)
+        if key != self.key:
+            self.pixmap = self.render(title, lines, extra_rows)
+            self.key = key
+        painter.drawPixmap(x - 1, y - 1, self.pixmap)
+        return y + self.first_line_y + len(lines) * self.line_step
@@ -0,0 +1,179 @@
+# pipeline.py - Multi-stage frame executor with bounded queues between stages
+import time
+import queue
+import threading
+
+DROP_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class StageQueue:
+    """Bounded queue that applies a drop policy when it is full
+
+    block        producer waits for room (no frame is ever lost)
+    drop_oldest  the stalest queued item is discarded (lowest latency)
+    drop_newest  the incoming item is discarded
+    """
+
+    def __init__(self, maxsize=2, drop_policy="drop_oldest", on_drop=None):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"unknown drop policy {drop_policy!r}, expected one of {DROP_POLICIES}")
+        self.queue = queue.Queue(maxsize)
+        self.drop_policy = drop_policy
+        self.on_drop = on_drop  # called with each discarded item, e.g. to free its buffer
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item, stop_event):
+        if self.drop_policy == "block":
+            while not stop_event.is_set():
+                try:
+                    self.queue.put(item, timeout=0.05)
+                    break
+                except queue.Full:
+                    continue
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    if self.drop_policy == "drop_newest":
+                        self.dropped += 1
+                        if self.on_drop is not None:
+                            self.on_drop(item)
+                        return
+                    try:
+                        dropped = self.queue.get_nowait()
+                        self.dropped += 1
+                        if self.on_drop is not None:
+                            self.on_drop(dropped)
+                    except queue.Empty:
+                        pass
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def get(self, timeout=0.05):
+        return self.queue.get(timeout=timeout)
+
+    def get_nowait(self):
+        return self.queue.get_nowait()
+
+    def depth(self):
+        return self.queue.qsize()
+
+
+class Stage:
+    """One worker thread: takes items from its input queue, runs func, forwards the result"""
+
+    def __init__(self, name, func, in_queue, out_queue):
+        self.name = name
+        self.func = func
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.processed = 0
+        self.busy_time = 0.0
+        self.thread = None
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            if self.in_queue is None:
+                # Source stage: produces items on its own (e.g. camera capture)
+                start = time.perf_counter()
+                item = self.func()
+                if item is None:
+                    time.sleep(0.001)
+                    continue
+            else:
+                try:
+                    item = self.in_queue.get()
+                except queue.Empty:
+                    continue
+                start = time.perf_counter()
+                item = self.func(item)
+                if item is None:
+                    continue
+
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+            self.out_queue.put(item, stop_event)
+
+    def start(self, stop_event):
+        self.thread = threading.Thread(target=self.run, args=(stop_event,), name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+
+class Pipeline:
+    """Runs a source function and a chain of stage functions on separate threads
+
+    Each stage works on a different frame at the same time, so throughput is
+    set by the slowest stage instead of the sum of all of them. The final
+    queue is drained with poll() from the consumer (usually the Qt thread).
+    """
+
+    def __init__(self, source, stages, maxsize=2, drop_policy="drop_oldest", on_drop=None):
+        self.stop_event = threading.Event()
+        self.stages = []
+
+        out_queue = StageQueue(maxsize, drop_policy, on_drop)
+        self.stages.append(Stage("capture", source, None, out_queue))
+        for name, func in stages:
+            in_queue, out_queue = out_queue, StageQueue(maxsize, drop_policy, on_drop)
+            self.stages.append(Stage(name, func, in_queue, out_queue))
+        self.output = out_queue
+        self.started_at = None
+
+    @staticmethod
+    def max_in_flight(stage_count, maxsize):
+        """Upper bound on items alive at once: every queue full plus one per stage"""
+        return stage_count * maxsize + stage_count + 1
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        for stage in self.stages:
+            stage.start(self.stop_event)
+
+    def stop(self):
+        self.stop_event.set()
+        for stage in self.stages:
+            if stage.thread is not None:
+                stage.thread.join(timeout=1.0)
+
+    def poll(self, max_items=None, timeout=0):
+        """Return every finished item currently waiting, oldest first
+
+        Without a timeout this never blocks; with one it waits up to timeout
+        seconds for the first item when none is ready yet.
+        """
+        items = []
+        if timeout:
+            try:
+                items.append(self.output.get(timeout=timeout))
+            except queue.Empty:
+                return items
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self.output.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        report = []
+        for stage in self.stages:
+            report.append({
+                "stage": stage.name,
+                "processed": stage.processed,
+                "avg_ms": stage.busy_time / stage.processed * 1000 if stage.processed else 0.0,
+                "fps": stage.processed / elapsed if elapsed else 0.0,
+                "queue_depth": stage.out_queue.depth(),
+                "max_depth": stage.out_queue.max_depth,
+                "dropped": stage.out_queue.dropped,
+            })
+        return report
+
+    def report(self):
+        lines = []
+        for s in self.stats():
+            lines.append(f"  {s['stage']:<10} {s['fps']:6.1f} fps  {s['avg_ms']:6.1f} ms  "
+                         f"queue {s['queue_depth']}/{s['max_depth']} max  dropped {s['dropped']}")
+        return "\n".join(lines)
@@ -0,0 +1,264 @@
+# recognizer.py - Latency-budgeted routing between Tesseract and TrOCR
+import os
+import json
+import time
+import threading
+
+import cv2
+import numpy as np
+
+
+def looks_handwritten(gray, ink_threshold=128):
+    """Guess whether an image holds handwriting rather than printed text
+
+    Printed glyphs sit on a shared baseline and have similar heights, so the
+    spread of component bottoms and heights (relative to the median height)
+    stays small. Handwriting, or a single joined-up stroke, does not.
+    """
+    ink = (gray < ink_threshold).astype(np.uint8)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    bottoms = stats[1:, cv2.CC_STAT_TOP] + heights
+
+    # Ignore specks such as dots and noise
+    keep = heights >= max(3, int(np.median(heights) * 0.4)) if len(heights) else heights > 0
+    heights, bottoms = heights[keep], bottoms[keep]
+    if len(heights) < 3:
+        return True
+
+    median_height = float(np.median(heights))
+    baseline_jitter = float(np.std(bottoms)) / median_height
+    height_jitter = float(np.std(heights)) / median_height
+    return baseline_jitter > 0.2 or height_jitter > 0.35
+
+
+class Recognizer:
+    """Base class: recognize() returns (text, confidence in 0-1 or None if unknown)"""
+
+    name = "base"
+
+    def __init__(self):
+        self.load_error = None
+
+    def available(self):
+        return self.load_error is None
+
+    def load(self):
+        """Get ready ahead of the first recognize() call (optional)"""
+
+    def recognize(self, gray):
+        raise NotImplementedError
+
+
+class TesseractRecognizer(Recognizer):
+    name = "tesseract"
+
+    def __init__(self):
+        super().__init__()
+        self.engine = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.engine is None:
+                try:
+                    from tesseract_engine import TesseractEngine
+
+                    self.engine = TesseractEngine()
+                except Exception as e:
+                    self.load_error = str(e)
+                    raise
+        return self.engine
+
+    def recognize(self, gray):
+        text, confidence = self.load().recognize(gray)
+        return text, confidence / 100.0
+
+
+class TrOCRRecognizer(Recognizer):
+    name = "trocr"
+
+    def __init__(self, client=None):
+        super().__init__()
+        if client is None:
+            from ocr_server import OCRClient
+
+            client = OCRClient()
+        self.client = client
+
+    def load(self):
+        return self.client.ensure_server(wait=True)
+
+    def recognize(self, gray):
+        ok, png = cv2.imencode(".png", gray)
+        if not ok:
+            raise ValueError("could not encode the drawing as PNG")
+        return self.client.recognize_png(png.tobytes()), None
+
+
+class EngineStats:
+    """Running latency and accuracy estimates for one engine"""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.latency_ms = None
+        self.calls = 0
+        # Start from one agreement out of two so a single result doesn't dominate
+        self.correct = 1.0
+        self.judged = 2.0
+        self.skipped = 0  # Calls routed around this engine since it last ran (not saved)
+        self.failures = 0
+
+    def record_latency(self, ms):
+        self.calls += 1
+        if self.latency_ms is None:
+            self.latency_ms = ms
+        else:
+            self.latency_ms = self.alpha * ms + (1 - self.alpha) * self.latency_ms
+
+    def record_outcome(self, correct):
+        self.judged += 1
+        self.correct += 1 if correct else 0
+
+    @property
+    def accuracy(self):
+        return self.correct / self.judged
+
+    def to_dict(self):
+        return {"latency_ms": self.latency_ms, "calls": self.calls, "correct": self.correct, "judged": self.judged,
+                "failures": self.failures}
+
+    def load(self, data):
+        self.latency_ms = data.get("latency_ms")
+        self.calls = data.get("calls", 0)
+        self.correct = data.get("correct", self.correct)
+        self.judged = data.get("judged", self.judged)
+        self.failures = data.get("failures", 0)
+
+
+class RecognizerRouter:
+    """Tries the fast engine first and escalates to the accurate one when worthwhile
+
+    Escalation happens when the fast result is unconfident or the input looks
+    handwritten, as long as the accurate engine's measured latency still fits
+    in the remaining budget. When the fast engine has proven inaccurate on
+    this machine it is skipped for handwriting altogether. Each engine's
+    first call in a process includes loading it and is left out of the
+    latency figures, and an engine that keeps being routed around is still
+    run every probe_every calls, so a bad estimate can correct itself.
+    """
+
+    def __init__(self, fast, accurate, min_confidence=0.75, accuracy_floor=0.4, stats_path=None, probe_every=20):
+        self.fast = fast
+        self.accurate = accurate
+        self.min_confidence = min_confidence
+        self.accuracy_floor = accuracy_floor
+        self.stats_path = stats_path
+        self.probe_every = probe_every
+        self.stats = {fast.name: EngineStats(), accurate.name: EngineStats()}
+        self.warm = set()
+        self.lock = threading.Lock()
+        self.load_stats()
+
+    def run(self, engine, gray):
+        start = time.time()
+        text, confidence = engine.recognize(gray)
+        elapsed = (time.time() - start) * 1000
+        with self.lock:
+            engine_stats = self.stats[engine.name]
+            engine_stats.skipped = 0
+            if engine.name in self.warm:
+                engine_stats.record_latency(elapsed)
+            else:
+                self.warm.add(engine.name)  # Cold start: model load or service start-up
+        return text, confidence, elapsed
+
+    def routed_around(self, engine_stats):
+        """Count a skipped call; True while the engine should stay skipped, False when it is due a probe"""
+        with self.lock:
+            engine_stats.skipped += 1
+            return engine_stats.skipped < self.probe_every
+
+    def recognize(self, gray, budget_ms=None, handwriting=None):
+        """Return (text, engine name) within budget_ms where possible"""
+        if handwriting is None:
+            handwriting = looks_handwritten(gray)
+
+        fast_stats = self.stats[self.fast.name]
+        accurate_stats = self.stats[self.accurate.name]
+        skip_fast = handwriting and fast_stats.accuracy < self.accuracy_floor and self.routed_around(fast_stats)
+
+        fast_text = None
+        spent = 0.0
+        if self.fast.available() and not skip_fast:
+            try:
+                fast_text, confidence, spent = self.run(self.fast, gray)
+            except Exception as e:
+                print(f"⚠️  {self.fast.name} failed: {e}")
+            else:
+                confident = confidence is not None and confidence >= self.min_confidence
+                if confident and not handwriting:
+                    return fast_text, self.fast.name
+
+                expected = accurate_stats.latency_ms or 0.0
+                if budget_ms is not None and spent + expected > budget_ms and self.routed_around(accurate_stats):
+                    return fast_text, self.fast.name
+
+        try:
+            text, _, _ = self.run(self.accurate, gray)
+        except Exception as e:
+            print(f"⚠️  {self.accurate.name} failed: {e}")
+            with self.lock:
+                accurate_stats.failures += 1
+            self.save_stats()
+            if fast_text is None and skip_fast and self.fast.available():
+                # The fast engine was skipped for accuracy; a rough result beats none
+                fast_text, _, _ = self.run(self.fast, gray)
+            if fast_text is None:
+                raise
+            return fast_text, self.fast.name
+
+        # Both engines saw the same input, so agreement tells us how far the fast one can be trusted
+        if fast_text is not None:
+            agreed = " ".join(fast_text.lower().split()) == " ".join(text.lower().split())
+            with self.lock:
+                fast_stats.record_outcome(agreed)
+            self.save_stats()
+
+        return text, self.accurate.name
+
+    def record_feedback(self, engine_name, correct):
+        """Record whether a result the user saw was right"""
+        with self.lock:
+            self.stats[engine_name].record_outcome(correct)
+        self.save_stats()
+
+    def load_stats(self):
+        if not self.stats_path or not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, engine_stats in self.stats.items():
+            if name in data:
+                engine_stats.load(data[name])
+
+    def save_stats(self):
+        if not self.stats_path:
+            return
+        with self.lock:
+            data = {name: engine_stats.to_dict() for name, engine_stats in self.stats.items()}
+        try:
+            with open(self.stats_path, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save recognizer stats: {e}")
+
+    def summary(self):
+        parts = []
+        for name, engine_stats in self.stats.items():
+            latency = f"{engine_stats.latency_ms:.0f} ms" if engine_stats.latency_ms is not None else "n/a"
+            parts.append(f"{name}: {latency}, {engine_stats.accuracy:.0%} accurate")
+        return " | ".join(parts)
@@ -0,0 +1,165 @@
+# scheduler.py - Delayed and long-running actions that never block the Qt event loop
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPen
+
+
+class ScheduledAction:
+    """A countdown that runs an action when it reaches zero unless cancelled first"""
+
+    def __init__(self, name, label, seconds, action, cancel_gestures=(), background=True):
+        self.name = name
+        self.label = label
+        self.seconds = seconds
+        self.action = action
+        self.cancel_gestures = set(cancel_gestures)
+        self.background = background
+        self.started = time.time()
+        self.cancelled = False
+
+    @property
+    def remaining(self):
+        return max(0.0, self.seconds - (time.time() - self.started))
+
+    @property
+    def progress(self):
+        """Fraction of the countdown that has elapsed, 0..1"""
+        if self.seconds <= 0:
+            return 1.0
+        return min(1.0, (time.time() - self.started) / self.seconds)
+
+
+class BackgroundJob:
+    def __init__(self, name, label):
+        self.name = name
+        self.label = label
+        self.started = time.time()
+        self.future = None
+
+
+class ActionScheduler(QObject):
+    """Runs countdowns on a Qt timer and slow work on a single worker thread
+
+    Countdowns tick on the GUI thread, so they can be cancelled by a gesture
+    and drawn in the panel while frames keep flowing. Background jobs run one
+    at a time in submission order (typing must not interleave); their
+    on_done callbacks are delivered back on the GUI thread.
+    """
+
+    job_finished = pyqtSignal(object, object, object)  # job, callback, result
+
+    def __init__(self, parent=None, tick_ms=100):
+        super().__init__(parent)
+        self.countdowns = []
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="actions")
+        self.job_finished.connect(self.on_job_finished)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.tick_ms = tick_ms
+
+    def countdown(self, name, label, seconds, action, cancel_gestures=(), background=True):
+        """Run action after `seconds` unless cancel() or one of cancel_gestures comes first"""
+        self.cancel(name, quiet=True)
+        scheduled = ScheduledAction(name, label, seconds, action, cancel_gestures, background)
+        self.countdowns.append(scheduled)
+        if not self.timer.isActive():
+            self.timer.start(self.tick_ms)
+        return scheduled
+
+    def tick(self):
+        for scheduled in list(self.countdowns):
+            if scheduled.remaining > 0:
+                continue
+            self.countdowns.remove(scheduled)
+            if scheduled.background:
+                self.run_in_background(scheduled.name, scheduled.label, scheduled.action)
+            else:
+                scheduled.action()
+        if not self.countdowns:
+            self.timer.stop()
+
+    def pending(self, name):
+        return any(scheduled.name == name for scheduled in self.countdowns)
+
+    def cancel(self, name, quiet=False):
+        for scheduled in list(self.countdowns):
+            if scheduled.name == name:
+                scheduled.cancelled = True
+                self.countdowns.remove(scheduled)
+                if not quiet:
+                    print(f"🛑 {scheduled.label} cancelled")
+                return True
+        return False
+
+    def handle_gesture(self, gesture):
+        """Cancel any countdown this gesture stops; returns True if the gesture was used up"""
+        used = False
+        for scheduled in list(self.countdowns):
+            if gesture in scheduled.cancel_gestures:
+                used = self.cancel(scheduled.name) or used
+        return used
+
+    def run_in_background(self, name, label, func, *args, on_done=None):
+        """Run func(*args) on the worker thread; on_done(result) is called on the GUI thread"""
+        job = BackgroundJob(name, label)
+        with self.lock:
+            self.jobs.append(job)
+
+        def run():
+            try:
+                result = func(*args)
+            except Exception as e:
+                print(f"❌ {label} failed: {e}")
+                result = None
+            self.job_finished.emit(job, on_done, result)
+            return result
+
+        job.future = self.executor.submit(run)
+        return job
+
+    def on_job_finished(self, job, callback, result):
+        with self.lock:
+            if job in self.jobs:
+                self.jobs.remove(job)
+        if callback is not None:
+            callback(result)
+
+    def busy(self):
+        return bool(self.countdowns or self.jobs)
+
+    def status_lines(self):
+        """Short lines describing pending work, for the overlay panel"""
+        lines = []
+        for scheduled in self.countdowns:
+            lines.append((f"⏰ {scheduled.label} in {scheduled.remaining:.1f}s", scheduled.progress))
+        with self.lock:
+            for job in self.jobs:
+                lines.append((f"⏳ {job.label}...", None))
+        return lines
+
+    def shutdown(self, wait=False):
+        for scheduled in list(self.countdowns):
+            self.cancel(scheduled.name, quiet=True)
+        self.timer.stop()
+        self.executor.shutdown(wait=wait)
+
+
+def paint_status(painter, lines, x, y, width):
+    """Draw status_lines() rows under a panel's instructions, with a bar for countdowns"""
+    for text, progress in lines:
+        painter.setPen(QPen(QColor(180, 0, 0)))
+        painter.drawText(x, y, text)
+        if progress is not None:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(0, 0, 0, 40))
+            painter.drawRect(x, y + 6, width, 6)
+            painter.setBrush(QColor(200, 0, 0, 200))
+            painter.drawRect(x, y + 6, int(width * progress), 6)
+        y += 30
+    return y
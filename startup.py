@@ -0,0 +1,95 @@
+# startup.py - Opens the camera, builds the hand model and loads OCR in parallel
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tracking import HandTracker, build_hands, INFERENCE_WORKERS
+from video_source import open_source
+import headless
+
+
+def warm_hands(**hands_options):
+    """Build a Hands graph and push one blank frame through it
+
+    The first process() call is where MediaPipe finishes setting up the
+    graph and the TFLite interpreters, so doing it here keeps that cost off
+    the first real frame.
+    """
+    hands = build_hands(**hands_options)
+    hands.process(np.zeros((240, 320, 3), np.uint8))
+    return hands
+
+
+class Initializer:
+    """Runs startup tasks on threads and reports when each one is ready
+
+    result(name) waits for one task; tasks nobody waits on (like loading OCR)
+    just finish in the background and print their own ready time.
+    """
+
+    def __init__(self, workers=4):
+        self.started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="init")
+        self.futures = {}
+        self.ready_ms = {}
+        self.lock = threading.Lock()
+
+    def start(self, name, func, *args, **kwargs):
+        def run():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                print(f"⚠️  {name} failed to initialize: {e}")
+                raise
+            elapsed = (time.perf_counter() - self.started) * 1000
+            with self.lock:
+                self.ready_ms[name] = elapsed
+            print(f"🚦 {name} ready after {elapsed:.0f} ms")
+            return result
+
+        self.futures[name] = self.executor.submit(run)
+        return self.futures[name]
+
+    def result(self, name, timeout=None):
+        return self.futures[name].result(timeout)
+
+    def summary(self):
+        with self.lock:
+            ready = sorted(self.ready_ms.items(), key=lambda kv: kv[1])
+        pending = [name for name in self.futures if name not in self.ready_ms]
+        parts = [f"{name} {ms:.0f} ms" for name, ms in ready] + [f"{name} pending" for name in pending]
+        return ", ".join(parts)
+
+    def shutdown(self):
+        # Let background tasks finish on their own; just stop taking new ones
+        self.executor.shutdown(wait=False)
+
+
+def open_tracking(init=None, classify=None, flow_points=None, **hands_options):
+    """Open the video source and build a warmed-up Hands graph at the same time
+
+    Returns (cap, tracker, init). Pass an Initializer to add more tasks of
+    your own, e.g. loading OCR, before the camera and model are waited on.
+    """
+    init = init or Initializer()
+    init.start("camera", open_source)
+    replay = None
+    if headless.LANDMARK_SOURCE:
+        # Recorded landmarks stand in for MediaPipe; no graph, pool, flow or quality changes
+        replay = headless.ReplayHands.from_session(headless.LANDMARK_SOURCE)
+        print(f"🧪 Replaying landmarks from {headless.LANDMARK_SOURCE} ({len(replay.landmarks)} frames)")
+    elif INFERENCE_WORKERS <= 1:
+        # Pool workers build their own graphs
+        init.start("hands", warm_hands, **hands_options)
+
+    cap = init.result("camera")
+    if replay is not None:
+        tracker = HandTracker(cap, classify=classify, workers=1, adaptive=False, hands=replay, **hands_options)
+    else:
+        hands = init.result("hands") if "hands" in init.futures else None
+        tracker = HandTracker(cap, classify=classify, flow_points=flow_points, hands=hands, **hands_options)
+    print(f"🚦 Tracking ready: {init.summary()}")
+    init.shutdown()
+    return cap, tracker, init
@@ -0,0 +1,142 @@
+# startup_benchmark.py - Import cost and time to first processed frame for every entry point
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = {
+    "menu": "menu.py",
+    "draw": "draw_mode.py",
+    "mouse": "mouse_mode.py",
+    "gesture": "emote_mode.py",
+}
+
+
+def child_env(source):
+    env = dict(os.environ)
+    env["HAND_VIDEO_SOURCE"] = source
+    env["HAND_OCR_AUTOSTART"] = "0"  # Keep the OCR service out of the measurement
+    env["PYTHONUNBUFFERED"] = "1"
+    if not env.get("DISPLAY") and sys.platform.startswith("linux"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def parse_importtime(stderr, skip=()):
+    """Parse `-X importtime` output into (total_us, {top-level package: self_us})
+
+    Modules named in skip (those the interpreter loads before any user code)
+    are left out.
+    """
+    per_package = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_part, cumulative_part, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_part), int(cumulative_part)
+        except ValueError:
+            continue
+        if name.strip() in skip:
+            continue
+        package = name.strip().split(".")[0]
+        per_package[package] += self_us
+        # Unindented entries are imported directly by the entry module
+        if not name[1:].startswith(" "):
+            total += cumulative_us
+    return total, dict(per_package)
+
+
+def run_importtime(code, source):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=HERE, env=child_env(source), capture_output=True, text=True,
+    )
+
+
+def interpreter_modules(source):
+    """Modules imported by a bare interpreter, to subtract from every entry point"""
+    stderr = run_importtime("pass", source).stderr
+    return {line.split("|")[2].strip() for line in stderr.splitlines()
+            if line.startswith("import time:") and "imported package" not in line}
+
+
+def measure_imports(entry, source, skip):
+    module = os.path.splitext(ENTRY_POINTS[entry])[0]
+    result = run_importtime(f"import {module}", source)
+    if result.returncode != 0:
+        print(f"❌ import {module} failed: {result.stderr.splitlines()[-1] if result.stderr else ''}")
+    return parse_importtime(result.stderr, skip)
+
+
+def measure_first_frame(entry, source, timeout):
+    """Launch the entry point and wait for the tracker's first-frame marker"""
+    env = child_env(source)
+    env["HAND_STARTUP_T0"] = repr(time.time())
+    process = subprocess.Popen(
+        [sys.executable, ENTRY_POINTS[entry]],
+        cwd=HERE, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    # Read on a thread so a child that hangs without printing still times out
+    found = []
+    marker = threading.Event()
+
+    def watch():
+        for line in process.stdout:
+            if line.startswith("STARTUP first_frame"):
+                found.append(float(line.split()[-1]))
+                break
+        marker.set()
+
+    threading.Thread(target=watch, daemon=True).start()
+    try:
+        marker.wait(timeout)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return found[0] if found else None
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure startup time of the menu and each mode")
+    parser.add_argument("entries", nargs="*", choices=list(ENTRY_POINTS), help="entry points (default: all)")
+    parser.add_argument("--source", default="synthetic", help="video source spec for the first-frame run")
+    parser.add_argument("--runs", type=int, default=3, help="launches per entry point")
+    parser.add_argument("--top", type=int, default=8, help="packages to list by import cost")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for a first frame")
+    args = parser.parse_args()
+
+    skip = interpreter_modules(args.source)
+    for entry in args.entries or list(ENTRY_POINTS):
+        print(f"\n⏱️  {ENTRY_POINTS[entry]}")
+        import_runs = [measure_imports(entry, args.source, skip) for _ in range(args.runs)]
+        total_us = median([total for total, _ in import_runs])
+        _, packages = import_runs[-1]
+        print(f"   imports: {total_us / 1000:.0f} ms")
+        for package, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"     {package:<24}{self_us / 1000:8.1f} ms")
+
+        frames = [measure_first_frame(entry, args.source, args.timeout) for _ in range(args.runs)]
+        frames = [f for f in frames if f is not None]
+        if frames:
+            print(f"   first frame: {median(frames):.2f} s (median of {len(frames)})")
+        else:
+            print("   first frame: ❌ none within the timeout")
+
+
+if __name__ == "__main__":
+    main()
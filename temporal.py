@@ -0,0 +1,101 @@
+# temporal.py - Turns per-frame gesture labels into triggers using wall-clock timing
+import os
+import time
+from collections import Counter, deque
+
+WINDOW_MS = float(os.environ.get("HAND_GESTURE_WINDOW_MS", "200"))
+HOLD_MS = float(os.environ.get("HAND_GESTURE_HOLD_MS", "150"))
+COOLDOWN_MS = float(os.environ.get("HAND_GESTURE_COOLDOWN_MS", "800"))
+RELEASE_MS = float(os.environ.get("HAND_GESTURE_RELEASE_MS", "250"))
+
+
+class TemporalRecognizer:
+    """Fires a gesture once it has won a sliding vote for long enough
+
+    Every frame's label (None for no gesture) goes into a window of the last
+    window_ms. The label holding at least min_share of that window is the
+    current candidate; it fires once it has been the candidate for hold_ms.
+    After firing nothing fires for cooldown_ms, and the same gesture only
+    fires again after it has been released (not the candidate) for
+    release_ms. A gap in updates longer than release_ms, e.g. the hand
+    leaving the frame, counts as a release. All timings are in milliseconds,
+    so behaviour is the same at any frame rate.
+    """
+
+    def __init__(self, window_ms=WINDOW_MS, hold_ms=HOLD_MS, cooldown_ms=COOLDOWN_MS,
+                 release_ms=RELEASE_MS, min_share=0.6, hold_overrides=None):
+        self.window = window_ms / 1000.0
+        self.hold = hold_ms / 1000.0
+        self.cooldown = cooldown_ms / 1000.0
+        self.release = release_ms / 1000.0
+        self.min_share = min_share
+        # Per-gesture hold times, e.g. {"quit": 400} for destructive gestures
+        self.hold_overrides = {name: ms / 1000.0 for name, ms in (hold_overrides or {}).items()}
+
+        self.history = deque()
+        self.candidate = None
+        self.candidate_since = None
+        self.latched = None
+        self.released_since = None
+        self.cooldown_until = 0.0
+        self.last_update = None
+
+        self.fired = Counter()
+        self.latencies = []
+
+    def reset(self):
+        self.history.clear()
+        self.candidate = None
+        self.candidate_since = None
+        self.latched = None
+        self.released_since = None
+
+    def vote(self, now):
+        while self.history and now - self.history[0][0] > self.window:
+            self.history.popleft()
+        counts = Counter(label for _, label in self.history)
+        label, votes = counts.most_common(1)[0]
+        if votes < self.min_share * len(self.history):
+            return None
+        return label
+
+    def update(self, label, now=None):
+        """Add one frame's label; returns the gesture to act on now, or None"""
+        now = time.perf_counter() if now is None else now
+        if self.last_update is not None and now - self.last_update > self.release:
+            self.reset()
+        self.last_update = now
+        self.history.append((now, label))
+
+        winner = self.vote(now)
+        if winner != self.candidate:
+            self.candidate = winner
+            self.candidate_since = now
+
+        # Release hysteresis: the latched gesture must be gone for a while
+        if self.latched is not None:
+            if winner == self.latched:
+                self.released_since = None
+            elif self.released_since is None:
+                self.released_since = now
+            elif now - self.released_since >= self.release:
+                self.latched = None
+                self.released_since = None
+
+        if winner is None or winner == self.latched or now < self.cooldown_until:
+            return None
+        if now - self.candidate_since < self.hold_overrides.get(winner, self.hold):
+            return None
+
+        self.latched = winner
+        self.released_since = None
+        self.cooldown_until = now + self.cooldown
+        self.fired[winner] += 1
+        # Time from the first frame showing the gesture to the trigger
+        first_seen = next((t for t, l in self.history if l == winner), self.candidate_since)
+        self.latencies.append(now - first_seen)
+        return winner
+
+    def stats(self):
+        latency = sum(self.latencies) / len(self.latencies) * 1000 if self.latencies else 0.0
+        return {"fired": dict(self.fired), "mean_latency_ms": latency}
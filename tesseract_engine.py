@@ -0,0 +1,233 @@
+# tesseract_engine.py - Persistent Tesseract OCR engine used by image_parser
+import os
+import sys
+import glob
+import time
+import ctypes
+import ctypes.util
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+TESSERACT_CONFIG = r'--oem 3 --psm 6'
+PSM_SINGLE_BLOCK = 6  # Same page segmentation as --psm 6
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+# Where the tesseract binary usually lives when it is not on PATH
+DEFAULT_TESSERACT_PATHS = {
+    "win32": [
+        r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+        r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+    ],
+    "darwin": ["/opt/homebrew/bin/tesseract", "/usr/local/bin/tesseract"],
+    "linux": ["/usr/bin/tesseract", "/usr/local/bin/tesseract"],
+}
+
+
+def find_tesseract_cmd():
+    """Locate the tesseract executable: $TESSERACT_CMD, then PATH, then platform defaults"""
+    env_cmd = os.environ.get("TESSERACT_CMD")
+    if env_cmd:
+        return env_cmd
+
+    on_path = shutil.which("tesseract")
+    if on_path:
+        return on_path
+
+    platform = "win32" if sys.platform.startswith("win") else sys.platform
+    platform = "linux" if platform.startswith("linux") else platform
+    for candidate in DEFAULT_TESSERACT_PATHS.get(platform, []):
+        if os.path.exists(candidate):
+            return candidate
+    return "tesseract"
+
+
+def find_tesseract_library():
+    """Path or name of the libtesseract shared library, or None
+
+    $TESSERACT_LIB wins; otherwise the system library search, then the
+    directory of the tesseract binary (where the Windows installer puts it).
+    """
+    env_lib = os.environ.get("TESSERACT_LIB")
+    if env_lib:
+        return env_lib
+    found = ctypes.util.find_library("tesseract")
+    if found:
+        return found
+    binary_dir = os.path.dirname(shutil.which(find_tesseract_cmd()) or "")
+    if binary_dir:
+        candidates = glob.glob(os.path.join(binary_dir, "libtesseract*.dll")) + glob.glob(os.path.join(binary_dir, "libtesseract*.dylib"))
+        if candidates:
+            return sorted(candidates)[-1]
+    return None
+
+
+class TessBaseAPI:
+    """Minimal ctypes binding of Tesseract's C API, for when tesserocr isn't installed
+
+    libtesseract ships with every Tesseract install, so this keeps the model
+    loaded in-process without extra Python packages.
+    """
+
+    def __init__(self, library, lang="eng", psm=PSM_SINGLE_BLOCK):
+        lib = ctypes.CDLL(library)
+        lib.TessBaseAPICreate.restype = ctypes.c_void_p
+        lib.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                            ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p  # Freed with TessDeleteText, so not c_char_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIMeanTextConf.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+        self.lib = lib
+
+        self.handle = lib.TessBaseAPICreate()
+        if lib.TessBaseAPIInit3(self.handle, None, lang.encode()) != 0:
+            lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+            raise RuntimeError(f"libtesseract could not load language '{lang}'")
+        lib.TessBaseAPISetPageSegMode(self.handle, psm)
+
+    def recognize(self, gray):
+        """(text, mean confidence) for a 2-D uint8 array"""
+        import numpy as np
+
+        gray = np.ascontiguousarray(gray, np.uint8)
+        height, width = gray.shape[:2]
+        self.lib.TessBaseAPISetImage(self.handle, gray.ctypes.data, width, height, 1, gray.strides[0])
+        pointer = self.lib.TessBaseAPIGetUTF8Text(self.handle)
+        try:
+            text = ctypes.string_at(pointer).decode("utf-8", "replace") if pointer else ""
+        finally:
+            if pointer:
+                self.lib.TessDeleteText(pointer)
+        return text, float(self.lib.TessBaseAPIMeanTextConf(self.handle))
+
+    def close(self):
+        if self.handle is not None:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+
+class TesseractEngine:
+    """One Tesseract instance kept initialized for the life of the process
+
+    Uses the tesserocr bindings when installed, otherwise libtesseract
+    directly through ctypes, so the language model is loaded once and every
+    image is recognized in-process. Only when neither is available does it
+    fall back to pytesseract, which runs the tesseract binary per image and
+    rebuilds the text from its word boxes: words single-spaced, one line per
+    text line, no blank lines between paragraphs.
+    """
+
+    def __init__(self, lang="eng"):
+        self.lang = lang
+        self.api = None
+        self.capi = None
+        self.backend = None
+
+        try:
+            import tesserocr
+
+            self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.DEFAULT)
+            self.backend = "tesserocr"
+            return
+        except ImportError:
+            pass
+
+        library = find_tesseract_library()
+        if library:
+            try:
+                self.capi = TessBaseAPI(library, lang)
+                self.backend = "libtesseract"
+                return
+            except (OSError, AttributeError, RuntimeError) as e:
+                print(f"⚠️  libtesseract unusable ({e})")
+
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = find_tesseract_cmd()
+        self.backend = "pytesseract"
+        print("⚠️  Neither tesserocr nor libtesseract found; running the tesseract binary per image")
+
+    def recognize(self, gray):
+        """Return (text, confidence 0-100) for a grayscale image array"""
+        if self.api is not None:
+            from PIL import Image
+
+            self.api.SetImage(Image.fromarray(gray))
+            return self.api.GetUTF8Text().strip(), float(self.api.MeanTextConf())
+
+        if self.capi is not None:
+            text, confidence = self.capi.recognize(gray)
+            return text.strip(), confidence
+
+        import pytesseract
+
+        data = pytesseract.image_to_data(gray, lang=self.lang, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            conf = float(data["conf"][i])
+            if conf < 0 or not word.strip():
+                continue
+            line_id = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(line_id, []).append(word)
+            confidences.append(conf)
+
+        text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return text, confidence
+
+    def recognize_file(self, image_path):
+        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            raise ValueError(f"could not read image {image_path}")
+        return self.recognize(img)
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+        if self.capi is not None:
+            self.capi.close()
+            self.capi = None
+
+
+# One engine per worker process, created by the pool initializer
+_worker_engine = None
+
+
+def init_worker(lang="eng"):
+    global _worker_engine
+    _worker_engine = TesseractEngine(lang)
+
+
+def ocr_file(image_path):
+    start = time.time()
+    try:
+        text, confidence = _worker_engine.recognize_file(image_path)
+        return {"path": image_path, "text": text, "confidence": confidence, "ms": (time.time() - start) * 1000}
+    except Exception as e:
+        return {"path": image_path, "error": str(e)}
+
+
+def find_images(directory):
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, "**", "*"), recursive=True)):
+        if path.lower().endswith(IMAGE_EXTENSIONS):
+            paths.append(path)
+    return paths
+
+
+def batch_ocr(paths, workers=None, lang="eng"):
+    """OCR many images across a process pool, yielding results as they finish"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(lang,)) as pool:
+        futures = [pool.submit(ocr_file, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,373 @@
+# tracking.py - Shared camera-to-landmarks path for the menu and every mode
+import os
+import time
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from pipeline import Pipeline
+from inference_pool import InferencePool
+from adaptive_quality import QualityController, ADAPTIVE_ENABLED
+from idle import IdleMonitor
+from fingertip_flow import FingertipFlow, FLOW_ENABLED
+
+PIPELINE_ENABLED = os.environ.get("HAND_PIPELINE", "0") == "1"
+INFERENCE_WORKERS = int(os.environ.get("HAND_INFERENCE_WORKERS", "1"))
+PIPELINE_QUEUE_SIZE = int(os.environ.get("HAND_PIPELINE_QUEUE", "2"))
+PIPELINE_DROP_POLICY = os.environ.get("HAND_PIPELINE_DROP", "drop_oldest")
+# Set by startup_benchmark.py: wall-clock time the process was launched
+STARTUP_T0 = os.environ.get("HAND_STARTUP_T0")
+
+
+def build_hands(**options):
+    """Build a MediaPipe Hands graph, importing MediaPipe only when first needed"""
+    import mediapipe as mp
+
+    return mp.solutions.hands.Hands(**options)
+
+
+def mirror_landmarks(results):
+    """Mirror landmark x in place, matching what cv2.flip(frame, 1) used to do to the pixels"""
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            for lm in hand_landmarks.landmark:
+                lm.x = 1.0 - lm.x
+    return results
+
+
+class FrameReader:
+    """Reads frames into reused buffers and converts them to RGB in place
+
+    After the first frames no per-frame arrays are allocated: the capture
+    decodes straight into a preallocated frame and the color conversion
+    writes into its matching RGB array. With buffers > 1 the reader hands
+    out pairs from a free list: the pair read last is self.slot, and it is
+    only reused after release(), so a frame still being processed by a later
+    pipeline stage is never overwritten however fast the source is. Frames
+    are left unmirrored; mirror_landmarks handles that.
+    """
+
+    def __init__(self, cap, buffers=1):
+        self.cap = cap
+        self.slots = [[None, None] for _ in range(buffers)]
+        self.pooled = buffers > 1
+        self.free = queue.SimpleQueue()
+        for index in range(buffers):
+            self.free.put(index)
+        self.slot = None
+        self.frame = None
+        self.rgb = None
+
+    def grab(self):
+        """Read the next BGR frame into a free buffer; returns None when no frame was read"""
+        if self.pooled:
+            try:
+                index = self.free.get_nowait()
+            except queue.Empty:
+                return None  # Every buffer is still in flight
+        else:
+            index = 0
+        slot = self.slots[index]
+
+        if slot[0] is None:
+            ret, frame = self.cap.read()
+        else:
+            ret, frame = self.cap.read(image=slot[0])
+        if not ret:
+            self.release(index)
+            return None
+
+        # First frame, or the driver changed resolution - (re)allocate buffers
+        if frame is not slot[0]:
+            slot[0] = frame
+            slot[1] = np.empty_like(frame)
+
+        self.slot = index
+        self.frame, self.rgb = slot
+        return self.frame
+
+    def release(self, index):
+        """Give a buffer pair back once its frame is done with (or dropped)"""
+        if self.pooled and index is not None:
+            self.free.put(index)
+
+    def read(self):
+        if self.grab() is None:
+            return None
+        cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        return self.rgb
+
+
+class HandTracker:
+    """Reads frames and runs MediaPipe Hands on them, returning mirrored landmarks
+
+    The tracker owns the Hands graph, built from hands_options unless an
+    already built one is passed as hands. classify, if given, is a
+    stateless function (landmarks, frame_shape) -> gesture name applied to
+    the first hand. With pipelined=True capture, inference and
+    classification each run on their own thread joined by bounded queues,
+    and poll() hands finished frames to the Qt thread. With workers > 1
+    inference is spread over an InferencePool of processes instead.
+    With adaptive=True (in-process inference only) a QualityController
+    trades model complexity, input size, hands tracked and decimation for
+    speed to hold the target frame rate. After a while without a hand the
+    tracker idles: frames are sampled slowly and only a cheap motion check
+    runs until something moves. flow_points lists landmarks (e.g. index and
+    thumb tip) that may be carried forward with optical flow between full
+    detections when HAND_OPTICAL_FLOW=1.
+    """
+
+    def __init__(self, cap, classify=None, pipelined=None, workers=None,
+                 queue_size=PIPELINE_QUEUE_SIZE, drop_policy=PIPELINE_DROP_POLICY,
+                 adaptive=None, flow_points=None, hands=None, **hands_options):
+        self.cap = cap
+        self.classify = classify
+        self.hands_options = hands_options
+        self.workers = INFERENCE_WORKERS if workers is None else workers
+        # Pool workers build their own graphs, so only build one here when it is used
+        if hands is None and self.workers <= 1:
+            hands = build_hands(**hands_options)
+        self.hands = hands
+        self.pipelined = PIPELINE_ENABLED if pipelined is None else pipelined
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.pipeline = None
+        self.pool = None
+        self.feeder = None
+        self.feeding = threading.Event()
+
+        adaptive = ADAPTIVE_ENABLED if adaptive is None else adaptive
+        self.quality = None
+        if adaptive and self.workers <= 1:
+            self.quality = QualityController(max_num_hands=hands_options.get("max_num_hands", 2))
+        self.frame_index = 0
+        self.last_results = None
+        self.scaled = None
+        self.first_frame_seen = False
+        self.idle_monitor = IdleMonitor()
+        self.flow = None
+        if FLOW_ENABLED and flow_points and self.workers <= 1:
+            self.flow = FingertipFlow(flow_points)
+
+        self.start()
+
+    def start(self):
+        self.idle_monitor.reset()
+        if self.flow is not None:
+            self.flow.reset()
+        if self.workers > 1:
+            self.start_pool()
+        elif self.pipelined:
+            self.start_pipeline()
+        else:
+            self.reader = FrameReader(self.cap)
+
+    def start_pipeline(self):
+        stages = [("inference", self.infer_stage), ("classify", self.classify_stage)]
+        self.reader = FrameReader(self.cap, Pipeline.max_in_flight(len(stages) + 1, self.queue_size))
+        self.pipeline = Pipeline(self.capture_stage, stages, self.queue_size, self.drop_policy,
+                                 on_drop=self.release_frame)
+        self.pipeline.start()
+        print(f"🧵 Pipelined tracking: queues of {self.queue_size}, {self.drop_policy}")
+
+    def start_pool(self):
+        """Feed frames to worker processes; ordered results come back through the pipeline"""
+        self.reader = FrameReader(self.cap)
+        self.feeding.clear()
+        self.feeder = threading.Thread(target=self.feed_pool, name="pool-feeder", daemon=True)
+        self.feeder.start()
+        self.pipeline = Pipeline(self.pool_stage, [("classify", self.classify_stage)], self.queue_size, self.drop_policy)
+        self.pipeline.start()
+        print(f"🧵 Inference pool: {self.workers} worker processes")
+
+    def feed_pool(self):
+        while not self.feeding.is_set():
+            frame = self.grab_frame()
+            if frame is None:
+                time.sleep(0.001)
+                continue
+            if self.pool is None:
+                self.pool = InferencePool(frame.shape, self.workers, self.hands_options)
+            if frame.shape != self.pool.frame_shape:
+                continue
+
+            # Convert straight into shared memory; a full pool drops the frame
+            slot = self.pool.acquire_slot()
+            if slot is None:
+                continue
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.pool.slot_view(slot))
+            self.pool.submit(slot)
+
+    def pool_stage(self):
+        if self.pool is None:
+            time.sleep(0.01)
+            return None
+        result = self.pool.get()
+        if result is None:
+            return None
+        seq, results, latency = result
+        return {"frame_shape": self.pool.frame_shape, "results": mirror_landmarks(results), "latency": latency}
+
+    def grab_frame(self):
+        """Next BGR frame, or None; while idle only frames with motion get through, at the idle rate"""
+        if not self.idle_monitor.idle:
+            return self.reader.grab()
+
+        wait = self.idle_monitor.wait_time()
+        if wait > 0:
+            # Background threads can sleep it off; the Qt thread just skips this tick
+            if threading.current_thread() is not threading.main_thread():
+                time.sleep(min(wait, 0.05))
+            return None
+        frame = self.reader.grab()
+        if frame is None:
+            return None
+        if not self.idle_monitor.check(frame):
+            self.reader.release(self.reader.slot)
+            return None
+        return frame
+
+    def capture_stage(self):
+        frame = self.grab_frame()
+        if frame is None:
+            return None
+        rgb = self.reader.rgb
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb)
+        return {"rgb": rgb, "buffer": self.reader.slot, "frame_shape": rgb.shape, "captured_at": time.perf_counter()}
+
+    def release_frame(self, item):
+        """Return an item's frame buffers to the reader; called after inference and for dropped items"""
+        self.reader.release(item.pop("buffer", None))
+        item.pop("rgb", None)
+
+    def infer_stage(self, item):
+        try:
+            if self.flow is not None:
+                results = self.flow.track(item["rgb"])
+                if results is not None:
+                    item["results"] = results
+                    return item
+
+            if self.quality is not None:
+                self.adaptive_infer_stage(item)
+            else:
+                item["results"] = mirror_landmarks(self.hands.process(item["rgb"]))
+
+            if self.flow is not None and not item.get("reused"):
+                self.flow.detected(item["results"], item["rgb"])
+            return item
+        finally:
+            # Later stages only need the landmarks
+            self.release_frame(item)
+
+    def adaptive_infer_stage(self, item):
+        level = self.quality.level
+        self.frame_index += 1
+
+        # Decimated frames reuse the last landmarks instead of running the model
+        if self.last_results is not None and self.frame_index % level.decimation:
+            item["results"] = self.last_results
+            item["reused"] = True
+            return item
+
+        started = time.perf_counter()
+        rgb = item["rgb"]
+        if level.input_scale != 1.0:
+            height, width = rgb.shape[:2]
+            size = (int(width * level.input_scale), int(height * level.input_scale))
+            if self.scaled is None or self.scaled.shape[:2] != (size[1], size[0]):
+                self.scaled = np.empty((size[1], size[0], 3), np.uint8)
+            cv2.resize(rgb, size, dst=self.scaled, interpolation=cv2.INTER_AREA)
+            rgb = self.scaled
+
+        # Landmarks are normalized, so results from a smaller input need no rescaling
+        results = mirror_landmarks(self.hands.process(rgb))
+        hands_seen = len(results.multi_hand_landmarks or [])
+        new_level = self.quality.record(time.perf_counter() - started, hands_seen)
+        if new_level is not None:
+            self.rebuild_hands(new_level)
+
+        self.last_results = results
+        item["results"] = results
+        return item
+
+    def rebuild_hands(self, level):
+        """Swap in a Hands graph configured for a new quality level"""
+        options = dict(self.hands_options)
+        options["model_complexity"] = level.model_complexity
+        options["max_num_hands"] = self.quality.hands_for(level)
+        old = self.hands
+        self.hands = build_hands(**options)
+        old.close()
+
+    def classify_stage(self, item):
+        results = item["results"]
+        item["gesture"] = None
+        self.idle_monitor.hand_seen(len(results.multi_hand_landmarks or []))
+        if self.classify is not None and results.multi_hand_landmarks:
+            item["gesture"] = self.classify(results.multi_hand_landmarks[0], item["frame_shape"])
+        return item
+
+    def process(self):
+        """Read and analyze one frame on the calling thread"""
+        item = self.capture_stage()
+        if item is None:
+            return None
+        return self.classify_stage(self.infer_stage(item))
+
+    def poll(self, timeout=0):
+        """Return [(frame_shape, results, gesture), ...] for every frame ready since the last call
+
+        The Qt modes poll from a timer and never block; loops that only call
+        poll() pass a timeout so they wait for a frame instead of spinning.
+        """
+        if self.pipeline is not None:
+            items = self.pipeline.poll(timeout=timeout)
+        else:
+            item = self.process()
+            items = [] if item is None else [item]
+            if item is None and timeout:
+                # Nothing new: sleep until the next idle sample is due, or briefly for the camera
+                idle_wait = self.idle_monitor.wait_time() if self.idle_monitor.idle else 0
+                time.sleep(min(timeout, idle_wait or 0.005))
+        if items and not self.first_frame_seen:
+            self.first_frame_seen = True
+            if STARTUP_T0:
+                print(f"STARTUP first_frame {time.time() - float(STARTUP_T0):.3f}", flush=True)
+        return [(item["frame_shape"], item["results"], item["gesture"]) for item in items]
+
+    def set_source(self, cap):
+        """Switch to a new capture, e.g. after the menu reopens the camera"""
+        self.stop()
+        self.cap = cap
+        self.start()
+
+    def stop(self):
+        """Stop background threads and processes; the Hands graph stays usable"""
+        if self.feeder is not None:
+            self.feeding.set()
+            self.feeder.join(timeout=1.0)
+            self.feeder = None
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            print("📊 Pipeline stages:")
+            print(self.pipeline.report())
+            self.pipeline = None
+        if self.pool is not None:
+            print(f"📊 Inference pool: {self.pool.dropped} frames dropped, {self.pool.skipped} lost")
+            self.pool.close()
+            self.pool = None
+        if self.idle_monitor.periods:
+            print(f"📊 Idle: {self.idle_monitor.report()}")
+        if self.flow is not None:
+            print(f"📊 Optical flow: {self.flow.report()}")
+        if self.quality is not None:
+            print(f"📊 Quality level {self.quality.level_index}: {self.quality.level}")
+
+    def close(self):
+        self.stop()
+        if self.hands:
+            self.hands.close()
+            self.hands = None
@@ -0,0 +1,207 @@
+# tune_thresholds.py - Sweeps gesture thresholds over recorded landmark sessions
+import time
+import argparse
+
+import numpy as np
+
+from gestures import GESTURES, FINGER_TIPS, FINGER_PIPS
+from landmark_dataset import LandmarkDataset, find_sessions
+
+CHUNK = 1 << 18  # frames evaluated at once; bounds memory on multi-million-frame sets
+
+# Thresholds currently hard-coded in the modes, marked in the report
+CURRENT = {
+    "pinch": {35: "draw stop", 40: "mouse click", 50: "draw start"},
+    "clap": {100: "gesture mode"},
+    "margin": {0.0: "all modes"},
+}
+PINCH_SWEEP = np.arange(10, 151, 5)  # pixels between index tip (8) and thumb tip (4)
+CLAP_SWEEP = np.arange(20, 301, 10)  # pixels between the two palms (landmark 9)
+MARGIN_SWEEP = np.round(np.arange(-0.03, 0.0601, 0.01), 3)  # tip must be this far above its PIP
+
+NO_GESTURE = len(GESTURES)  # classify() index for "no gesture", matching the "none" label
+
+
+def finger_states(lm, margin=0.0):
+    """Vectorized gestures.finger_states over (frames, 21, 3): (frames, 5) bool
+
+    margin is how far (in normalized image height) a fingertip has to be above
+    its PIP joint to count as extended; 0 is the rule the modes use.
+    """
+    thumb = lm[:, 4, 0] < lm[:, 3, 0]
+    fingers = lm[:, FINGER_TIPS, 1] + margin < lm[:, FINGER_PIPS, 1]
+    return np.concatenate([thumb[:, None], fingers], axis=1)
+
+
+def classify(lm, margin=0.0):
+    """Vectorized gestures.classify_hand: index into GESTURES, NO_GESTURE for None"""
+    fingers = finger_states(lm, margin)
+    extended = fingers.sum(axis=1)
+    rest = fingers[:, 1:]
+    fist = (lm[:, 4, 0] > lm[:, 2, 0]) & (lm[:, FINGER_TIPS, 1] > lm[:, FINGER_PIPS, 1]).all(axis=1)
+
+    def pattern(bits, columns=slice(None)):
+        return (fingers[:, columns] == np.array(bits, bool)).all(axis=1)
+
+    # Same order as classify_hand; np.select picks the first rule that matches
+    rules = [
+        ("fist", fist),
+        ("five_fingers", extended == 5),
+        ("three_fingers", extended == 3),
+        ("thumbs_up", pattern([1, 0, 0, 0, 0])),
+        ("pinky_only", (rest == np.array([0, 0, 0, 1], bool)).all(axis=1)),
+        ("rock_sign", (rest == np.array([1, 0, 0, 1], bool)).all(axis=1)),
+        ("peace_sign", pattern([0, 1, 1, 0, 0])),
+        ("four_fingers", extended == 4),
+        ("pointing", (rest == np.array([1, 0, 0, 0], bool)).all(axis=1)),
+    ]
+    conditions = [condition for _, condition in rules]
+    choices = [GESTURES.index(name) for name, _ in rules]
+    return np.select(conditions, choices, NO_GESTURE)
+
+
+def pixel_distance(a, b, width, height):
+    return np.hypot((a[:, 0] - b[:, 0]) * width, (a[:, 1] - b[:, 1]) * height)
+
+
+class Collected:
+    """Everything the sweeps need, reduced from the raw landmark columns"""
+
+    def __init__(self, classes):
+        self.frames = 0
+        self.classes = classes
+        self.confusion = {margin: np.zeros((classes, classes), np.int64) for margin in MARGIN_SWEEP}
+        self.pinch_distance, self.pinch_truth = [], []
+        self.clap_distance, self.clap_truth = [], []
+
+
+def collect(paths):
+    """Stream every session chunk by chunk into confusion matrices and distance columns"""
+    gesture_classes = GESTURES + ["none"]
+    data = Collected(len(gesture_classes))
+
+    for path in paths:
+        dataset = LandmarkDataset(path)
+        # Map this session's label ids onto the gesture classes (-1 = not a gesture label)
+        to_class = np.array([gesture_classes.index(name) if name in gesture_classes else -1
+                             for name in dataset.labels] + [-1], np.int64)
+        pinch_id = dataset.labels.index("pinch") if "pinch" in dataset.labels else -2
+        clap_id = dataset.labels.index("clap") if "clap" in dataset.labels else -2
+
+        for start in range(0, len(dataset), CHUNK):
+            landmarks = np.asarray(dataset.landmarks[start:start + CHUNK])
+            labels = np.asarray(dataset.label_ids[start:start + CHUNK]).astype(np.int64)
+            data.frames += len(labels)
+
+            labelled = labels >= 0
+            first = ~np.isnan(landmarks[:, 0, 0, 0])
+            both = first & ~np.isnan(landmarks[:, 1, 0, 0])
+
+            # Single-hand gestures: the modes classify the first hand only
+            truth = to_class[labels]
+            rows = first & (truth >= 0)
+            hand = landmarks[rows, 0]
+            for margin, confusion in data.confusion.items():
+                predicted = classify(hand, margin)
+                confusion += np.bincount(truth[rows] * data.classes + predicted,
+                                         minlength=data.classes ** 2).reshape(data.classes, data.classes)
+
+            rows = first & labelled
+            data.pinch_distance.append(pixel_distance(landmarks[rows, 0, 8], landmarks[rows, 0, 4],
+                                                      dataset.width, dataset.height))
+            data.pinch_truth.append(labels[rows] == pinch_id)
+
+            rows = both & labelled
+            data.clap_distance.append(pixel_distance(landmarks[rows, 0, 9], landmarks[rows, 1, 9],
+                                                     dataset.width, dataset.height))
+            data.clap_truth.append(labels[rows] == clap_id)
+
+    for name in ("pinch_distance", "pinch_truth", "clap_distance", "clap_truth"):
+        parts = getattr(data, name)
+        setattr(data, name, np.concatenate(parts) if parts else np.empty(0))
+    return data
+
+
+def precision_recall(true_positive, predicted, actual):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positive / predicted, np.nan)
+        recall = np.where(actual > 0, true_positive / actual, np.nan)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), np.nan)
+    return precision, recall, f1
+
+
+def sweep_below(distance, truth, thresholds):
+    """Precision/recall of `distance < t` for every t, from one sorted pass"""
+    order = np.argsort(distance, kind="stable")
+    distance, truth = distance[order], truth[order]
+    predicted = np.searchsorted(distance, thresholds, side="left")
+    true_positive = np.concatenate([[0], np.cumsum(truth)])[predicted]
+    return precision_recall(true_positive, predicted, truth.sum())
+
+
+def report_gestures(data):
+    names = GESTURES + ["none"]
+    print("\n✋ Single-hand gestures (first hand, tip-above-PIP margin sweep)")
+    macro = {}
+    for margin, confusion in data.confusion.items():
+        precision, recall, f1 = precision_recall(np.diag(confusion), confusion.sum(axis=0), confusion.sum(axis=1))
+        present = confusion.sum(axis=1) > 0
+        macro[margin] = np.nanmean(f1[present]) if present.any() else np.nan
+        mark = f"  ← {CURRENT['margin'][margin]}" if margin in CURRENT["margin"] else ""
+        print(f"   margin {margin:+.2f}: macro F1 {macro[margin]:.3f}{mark}")
+
+    best = max(macro, key=lambda m: -1 if np.isnan(macro[m]) else macro[m])
+    for margin in sorted({0.0, best}):
+        confusion = data.confusion[margin]
+        precision, recall, f1 = precision_recall(np.diag(confusion), confusion.sum(axis=0), confusion.sum(axis=1))
+        print(f"\n   margin {margin:+.2f}{' (best)' if margin == best else ''}")
+        print(f"   {'gesture':<15}{'frames':>9}{'precision':>11}{'recall':>9}{'F1':>7}")
+        for i, name in enumerate(names):
+            if confusion[i].sum() or confusion[:, i].sum():
+                print(f"   {name:<15}{confusion[i].sum():>9}{precision[i]:>11.3f}{recall[i]:>9.3f}{f1[i]:>7.3f}")
+
+
+def report_sweep(title, distance, truth, thresholds, current):
+    print(f"\n{title}")
+    if not truth.any():
+        print("   no labelled positives recorded")
+        return
+    thresholds = np.union1d(thresholds, list(current))
+    precision, recall, f1 = sweep_below(distance, truth, thresholds)
+    best = int(np.nanargmax(f1)) if not np.isnan(f1).all() else None
+    print(f"   {int(truth.sum())} positive / {int((~truth).sum())} negative frames")
+    print(f"   {'< px':>6}{'precision':>11}{'recall':>9}{'F1':>7}")
+    for i, t in enumerate(thresholds):
+        notes = []
+        if t in current:
+            notes.append(current[t])
+        if i == best:
+            notes.append("best F1")
+        note = f"  ← {', '.join(notes)}" if notes else ""
+        print(f"   {t:>6g}{precision[i]:>11.3f}{recall[i]:>9.3f}{f1[i]:>7.3f}{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precision/recall of gesture rules and thresholds on recorded sessions")
+    parser.add_argument("root", help="a session directory or a directory of sessions")
+    args = parser.parse_args()
+
+    paths = find_sessions(args.root)
+    if not paths:
+        print(f"❌ No sessions under {args.root}")
+        return
+
+    started = time.perf_counter()
+    data = collect(paths)
+    elapsed = time.perf_counter() - started
+    print(f"📂 {data.frames} frames from {len(paths)} session(s) evaluated in {elapsed:.2f} s")
+
+    report_gestures(data)
+    report_sweep("🤏 Pinch (index tip to thumb tip distance < t)", data.pinch_distance,
+                 data.pinch_truth.astype(bool), PINCH_SWEEP, CURRENT["pinch"])
+    report_sweep("👏 Clap (palm to palm distance < t)", data.clap_distance,
+                 data.clap_truth.astype(bool), CLAP_SWEEP, CURRENT["clap"])
+
+
+if __name__ == "__main__":
+    main()
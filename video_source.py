@@ -0,0 +1,243 @@
+# video_source.py - Interchangeable frame sources: camera, video file, image folder, synthetic
+import os
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from camera import open_camera
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class VideoSource:
+    """Base class that looks like cv2.VideoCapture to the rest of the code
+
+    Subclasses implement next_frame(). With realtime=True the source
+    behaves like a live camera: frames are handed out no faster than fps,
+    and frames whose time passed while the consumer was busy are skipped
+    rather than queued, so a slow consumer sees fewer frames instead of
+    falling further and further behind. Otherwise frames come as fast as
+    they are asked for, which is what throughput benchmarks want.
+    """
+
+    def __init__(self, fps=30.0, realtime=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.frames_read = 0
+        self.frames_skipped = 0
+        self.position = 0  # Index of the next frame on the source's own timeline
+        self.exhausted = False
+        self.opened = True
+        self.start_time = None
+        self.last_frame_time = None
+
+    def next_frame(self, image):
+        raise NotImplementedError
+
+    def skip(self, count):
+        """Move past count frames without returning them; subclasses override this where it's cheaper"""
+        for _ in range(count):
+            if self.next_frame(None) is None:
+                break
+
+    def read(self, image=None):
+        if not self.opened or self.exhausted:
+            return False, None
+
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        if self.realtime and self.fps > 0:
+            late = int((now - self.start_time) * self.fps) - self.position
+            if late > 0:
+                self.skip(late)
+                self.position += late
+                self.frames_skipped += late
+
+        frame = self.next_frame(image)
+        if frame is None:
+            self.exhausted = True
+            return False, None
+
+        if self.realtime and self.fps > 0:
+            due = self.start_time + self.position / self.fps
+            if due > now:
+                time.sleep(due - now)
+                now = due
+
+        self.position += 1
+        self.frames_read += 1
+        self.last_frame_time = now
+        return True, frame
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.opened = False
+
+
+class VideoFileSource(VideoSource):
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"could not open video {path}")
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.path = path
+        self.loop = loop
+
+    def next_frame(self, image):
+        ret, frame = self.cap.read(image=image) if image is not None else self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image=image) if image is not None else self.cap.read()
+        return frame if ret else None
+
+    def skip(self, count):
+        # grab() advances without decoding
+        for _ in range(count):
+            if not self.cap.grab():
+                if not self.loop:
+                    break
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class ImageSequenceSource(VideoSource):
+    """Plays a directory of images in name order
+
+    Images are decoded up front by default so disk and PNG decode time stay
+    out of pipeline measurements. Files that can't be decoded are skipped
+    with a warning.
+    """
+
+    def __init__(self, directory, fps=30.0, realtime=True, loop=False, preload=True):
+        super().__init__(fps, realtime)
+        self.paths = sorted(p for p in glob.glob(os.path.join(directory, "*")) if p.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.paths:
+            raise ValueError(f"no images found in {directory}")
+        self.loop = loop
+        self.index = 0
+        self.frames = None
+        if preload:
+            decoded = [(p, cv2.imread(p)) for p in self.paths]
+            for path, frame in decoded:
+                if frame is None:
+                    print(f"⚠️  Skipping unreadable image {path}")
+            decoded = [(p, frame) for p, frame in decoded if frame is not None]
+            if not decoded:
+                raise ValueError(f"no readable images in {directory}")
+            self.paths = [p for p, _ in decoded]
+            self.frames = [frame for _, frame in decoded]
+
+    def load(self, index):
+        if self.frames is not None:
+            return self.frames[index]
+        frame = cv2.imread(self.paths[index])
+        if frame is None:
+            print(f"⚠️  Skipping unreadable image {self.paths[index]}")
+        return frame
+
+    def skip(self, count):
+        self.index += count
+        if self.loop:
+            self.index %= len(self.paths)
+
+    def next_frame(self, image):
+        frame = None
+        for _ in range(len(self.paths)):
+            if self.index >= len(self.paths):
+                if not self.loop:
+                    return None
+                self.index = 0
+            frame = self.load(self.index)
+            self.index += 1
+            if frame is not None:
+                break
+        if frame is None:
+            return None
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return image
+        return frame.copy()
+
+
+class SyntheticSource(VideoSource):
+    """Generates frames with a moving blob; no hands, so it measures pipeline overhead only"""
+
+    def __init__(self, width=640, height=480, fps=30.0, realtime=True, frames=None):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.limit = frames
+        self.background = np.zeros((height, width, 3), np.uint8)
+        self.background[:] = np.linspace(40, 120, width, dtype=np.uint8)[None, :, None]
+
+    def skip(self, count):
+        pass  # Frames are a function of position, so there is nothing to move past
+
+    def next_frame(self, image):
+        if self.limit is not None and self.position >= self.limit:
+            return None
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+
+        np.copyto(image, self.background)
+        t = self.position / self.fps if self.fps else self.position
+        x = int(self.width * (0.5 + 0.35 * np.sin(t)))
+        y = int(self.height * (0.5 + 0.35 * np.cos(t * 0.7)))
+        cv2.circle(image, (x, y), self.height // 8, (120, 160, 210), -1)
+        return image
+
+
+def open_source(spec=None, realtime=None):
+    """Open a frame source from a spec string
+
+    camera[:N]         live webcam (the default)
+    file:PATH          video file (a bare path works too)
+    dir:PATH           directory of images (a bare path works too)
+    synthetic[:WxH]    generated frames
+    bus[:NAME]         frames published by frame_bus.py
+
+    The spec defaults to $HAND_VIDEO_SOURCE, and pacing to
+    $HAND_VIDEO_PACING ("realtime" or "fast").
+    """
+    spec = spec or os.environ.get("HAND_VIDEO_SOURCE", "camera")
+    if realtime is None:
+        realtime = os.environ.get("HAND_VIDEO_PACING", "realtime") != "fast"
+
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec, realtime=realtime)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, realtime=realtime)
+
+    kind, _, arg = spec.partition(":")
+    if kind == "camera":
+        return open_camera(int(arg) if arg else None)
+    if kind == "synthetic":
+        if arg:
+            width, height = (int(v) for v in arg.lower().split("x"))
+            return SyntheticSource(width, height, realtime=realtime)
+        return SyntheticSource(realtime=realtime)
+    if kind == "bus":
+        from frame_bus import FrameBusSource, BUS_NAME
+
+        return FrameBusSource(arg or BUS_NAME)
+    if kind == "dir":
+        return ImageSequenceSource(arg, realtime=realtime)
+    if kind == "file":
+        return VideoFileSource(arg, realtime=realtime)
+    raise ValueError(f"unknown video source: {spec}")